@@ -9,8 +9,27 @@ https://docs.djangoproject.com/en/4.0/howto/deployment/asgi/
 
 import os
 
+from django.conf import settings
+from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'happytails.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+if settings.DEBUG:
+    # what runserver did: serve the admin and browsable API static files
+    django_application = ASGIStaticFilesHandler(django_application)
+
+# imported after Django is set up
+from myapp.sse import sse_app  # noqa: E402
+
+SSE_PATH = '/api/events/'
+
+
+async def application(scope, receive, send):
+    # live updates are served outside the Django request cycle so an idle
+    # stream holds no worker thread
+    if scope['type'] == 'http' and scope['path'] == SSE_PATH:
+        await sse_app(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
@@ -36,6 +36,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'mozilla_django_oidc',
     "myapp",
@@ -43,10 +44,12 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'myapp.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'myapp.replicas.ReplicaRoutingMiddleware',
     'mozilla_django_oidc.middleware.SessionRefresh',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
@@ -88,6 +91,24 @@ DATABASES = {
     }
 }
 
+# read replicas of `default`, as "host[:port]" entries in DB_REPLICAS
+# (comma separated); safe GET endpoints read from them, see myapp.replicas.
+# To try it locally, an entry can point at the primary itself.
+DATABASE_REPLICAS = []
+for index, replica in enumerate(filter(None, os.environ.get('DB_REPLICAS', '').split(',')), 1):
+    replica_host, _, replica_port = replica.strip().partition(':')
+    DATABASES[f'replica{index}'] = dict(
+        DATABASES['default'],
+        HOST=replica_host,
+        PORT=replica_port or DATABASES['default']['PORT'],
+        TEST={'MIRROR': 'default'},
+    )
+    DATABASE_REPLICAS.append(f'replica{index}')
+
+DATABASE_ROUTERS = ['myapp.replicas.ReplicaRouter']
+# seconds a session keeps reading from the primary after a write
+REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', '10'))
+
 # Create data directory if it doesn't exist
 os.makedirs(BASE_DIR / 'data', exist_ok=True)
 
@@ -133,6 +154,19 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# responses smaller than this are sent uncompressed (myapp.middleware)
+COMPRESSION_MIN_SIZE = 1024
+
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'myapp.renderers.FastJSONRenderer',
+    ],
+}
+
+if DEBUG:
+    # the browsable API renders an HTML page (and a form per serializer) on every request
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].append('rest_framework.renderers.BrowsableAPIRenderer')
+
 # Keycloak OIDC Configuration
 OIDC_RP_CLIENT_ID = os.environ.get('OIDC_RP_CLIENT_ID', 'project-client')
 OIDC_RP_CLIENT_SECRET = os.environ.get('OIDC_RP_CLIENT_SECRET', 'QUMf2W089NKFq4UaykDkL9gAuH9H36Ke')
@@ -191,6 +225,45 @@ OIDC_AUTHENTICATION_CALLBACK_URL = 'oidc_authentication_callback'
 SESSION_COOKIE_SECURE = False 
 SESSION_COOKIE_SAMESITE = 'Lax'
 
+# Email (notifications). Console backend by default, SMTP in production via env.
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'HappyTails <noreply@happytails.ro>')
+SERVER_EMAIL = DEFAULT_FROM_EMAIL
+EMAIL_SUBJECT_PREFIX = '[HappyTails] '
+# shelter administrators receiving alerts, comma separated
+ADMINS = [('HappyTails admin', email) for email in os.environ.get('ADMIN_EMAILS', '').split(',') if email]
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# media storage for uploaded photos: 'local' (MEDIA_ROOT) or 's3' (requires boto3)
+MEDIA_STORAGE = os.environ.get('MEDIA_STORAGE', 'local')
+# local storage: let nginx send the files, e.g. '/protected-media/' mapped to an
+# `internal` location aliasing MEDIA_ROOT; empty -> Django streams them (development)
+MEDIA_ACCEL_REDIRECT_PREFIX = os.environ.get('MEDIA_ACCEL_REDIRECT_PREFIX', '')
+MEDIA_S3_BUCKET = os.environ.get('MEDIA_S3_BUCKET', 'happytails-media')
+MEDIA_S3_ENDPOINT_URL = os.environ.get('MEDIA_S3_ENDPOINT_URL') or None
+MEDIA_S3_REGION = os.environ.get('MEDIA_S3_REGION') or None
+
+
+# Adoption visits: opening hours per weekday (0 = Monday, closed days left out)
+# in the shelter's time zone, slot length, and how many families can visit
+# in the same slot
+VISIT_TIME_ZONE = 'Europe/Bucharest'
+VISIT_HOURS = {0: (10, 18), 1: (10, 18), 2: (10, 18), 3: (10, 18), 4: (10, 18), 5: (10, 14)}
+VISIT_SLOT_MINUTES = 60
+VISIT_SLOT_CAPACITY = int(os.environ.get('VISIT_SLOT_CAPACITY', 2))
+
+# Background jobs (myapp.jobs, `manage.py run_jobs`): queue -> how many of its
+# jobs may run at once across all workers
+JOB_QUEUES = {'default': 4, 'mail': 2, 'images': 2}
+# seconds before a running job is considered abandoned by its worker
+JOB_TIMEOUT = 600
+# development without a worker: run jobs in the web process after commit
+JOBS_EAGER = os.environ.get('JOBS_EAGER', 'False') == 'True'
+
+# myapp_activity is partitioned by month (manage.py activity_partitions):
+# partitions created ahead of the current month, months kept before it
+# (None keeps everything)
+ACTIVITY_PARTITIONS_AHEAD = 3
+ACTIVITY_RETENTION_MONTHS = int(os.environ['ACTIVITY_RETENTION_MONTHS']) if os.environ.get('ACTIVITY_RETENTION_MONTHS') else None
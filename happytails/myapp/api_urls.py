@@ -4,6 +4,10 @@ from . import api_views
 from myapp.views.adoption_views import AdoptionViewSet 
 from myapp.views.visit_views import VisitViewSet
 from myapp.views.activity_views import ActivityViewSet
+from myapp.views.volunteer_views import VolunteerAvailabilityViewSet
+from myapp.views.calendar_views import calendar_feed
+from myapp.views.report_views import IssueReportViewSet
+from myapp.views.media_views import media_file
 
 
 router = DefaultRouter()
@@ -11,6 +15,8 @@ router.register(r'animals', api_views.AnimalViewSet, basename='animal')
 router.register(r'adoptions', AdoptionViewSet, basename='adoption') 
 router.register(r'visits', VisitViewSet, basename='visit')  
 router.register(r'activities', ActivityViewSet, basename='activity') 
+router.register(r'availability', VolunteerAvailabilityViewSet, basename='availability')
+router.register(r'reports', IssueReportViewSet, basename='report')
 
 
 urlpatterns = [
@@ -21,4 +27,6 @@ urlpatterns = [
     path('api/logout/', api_views.custom_logout, name='api_logout'),
     path('api/register/', api_views.register_view, name='api_register'),
     path('api/debug/', api_views.debug_view, name='api_debug'),
+    path('api/calendar/<str:token>.ics', calendar_feed, name='calendar_feed'),
+    path('media/<path:name>', media_file, name='media_file'),
 ]
\ No newline at end of file
@@ -2,17 +2,31 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.pagination import PageNumberPagination
 from django.shortcuts import get_object_or_404
 from django.contrib.auth import logout
 from django.conf import settings
 from urllib.parse import urlencode
-from .models import Animal
-from .serializers import AnimalSerializer, AnimalCreateUpdateSerializer, UserSerializer
+from datetime import timedelta
+from django.utils import timezone
+from .models import Animal, AnimalEvent, VaccinationSchedule
+from .serializers import AnimalSerializer, AnimalCreateUpdateSerializer, AnimalEventSerializer, VaccinationScheduleSerializer, UserSerializer
+from .services.animal_history import record_event
 from .decorators import get_user_roles
+from .conditional import ConditionalResponseMixin
+from .sync import IncrementalSyncMixin
+from .middleware import breach_sensitive
+from .replicas import ReplicaReadMixin
 import secrets
 
 
-class AnimalViewSet(viewsets.ModelViewSet):
+class HistoryPagination(PageNumberPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class AnimalViewSet(ReplicaReadMixin, ConditionalResponseMixin, IncrementalSyncMixin, viewsets.ModelViewSet):
     """    
     list: Get all animals (all roles)
     retrieve: Get specific animal details (all roles)
@@ -24,6 +38,11 @@ class AnimalViewSet(viewsets.ModelViewSet):
     queryset = Animal.objects.all()
     serializer_class = AnimalSerializer
     permission_classes = [IsAuthenticated]
+    conditional_models = (Animal, Animal.favorites.through, AnimalEvent)
+    conditional_media_urls = True
+    conditional_actions = ('list', 'retrieve', 'favorites', 'history')
+    replica_actions = ('list', 'retrieve', 'favorites', 'history', 'vaccinations_due')
+    sync_serializer_class = AnimalSerializer
 
     def get_queryset(self):
         roles = get_user_roles(self.request)
@@ -190,6 +209,83 @@ class AnimalViewSet(viewsets.ModelViewSet):
         })
 
 
+    @action(detail=True, methods=['get', 'post', 'put'], url_path='history')
+    def history(self, request, pk=None):
+        """GET /animals/{id}/history/ - paginated timeline; POST/PUT appends an event (admin, volunteer)"""
+        roles = get_user_roles(request)
+        if 'admin' not in roles and 'volunteer' not in roles:
+            return Response({
+                'success': False,
+                'error': 'Only administrators and volunteers can access the animal history',
+                'required_roles': ['admin', 'volunteer'],
+                'user_roles': roles
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        animal = self.get_object()
+        
+        if request.method == 'GET':
+            # newest first, served by the (animal, occurred_at) index
+            events = animal.events.select_related('recorded_by').order_by('-occurred_at', '-id')
+            event_type = request.query_params.get('type', None)
+            if event_type:
+                events = events.filter(event_type=event_type)
+            
+            paginator = HistoryPagination()
+            page = paginator.paginate_queryset(events, request, view=self)
+            serializer = AnimalEventSerializer(page, many=True)
+            
+            return Response({
+                'success': True,
+                'data': serializer.data,
+                'count': paginator.page.paginator.count,
+                'next': paginator.get_next_link(),
+                'previous': paginator.get_previous_link()
+            })
+        
+        serializer = AnimalEventSerializer(data=request.data)
+        if serializer.is_valid():
+            event = record_event(animal, recorded_by=request.user, **serializer.validated_data)
+            return Response({
+                'success': True,
+                'message': f'{event.get_event_type_display()} recorded for {animal.name}',
+                'data': AnimalEventSerializer(event).data
+            }, status=status.HTTP_201_CREATED)
+        
+        return Response({
+            'success': False,
+            'errors': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    @action(detail=False, methods=['get'], url_path='vaccinations-due')
+    def vaccinations_due(self, request):
+        """GET /animals/vaccinations-due/?days=7 - vaccinations due or overdue in the next N days (admin)"""
+        roles = get_user_roles(request)
+        if 'admin' not in roles:
+            return Response({
+                'success': False,
+                'error': 'Only administrators can view the vaccination schedule',
+                'required_role': 'admin',
+                'user_roles': roles
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        try:
+            days = max(int(request.query_params.get('days', 7)), 0)
+        except ValueError:
+            days = 7
+        
+        # one range scan on the next_due_at index, overdue first
+        schedules = VaccinationSchedule.objects.filter(
+            next_due_at__lte=timezone.now() + timedelta(days=days)
+        ).exclude(animal__status='AD').select_related('animal').order_by('next_due_at')
+        serializer = VaccinationScheduleSerializer(schedules, many=True)
+        
+        return Response({
+            'success': True,
+            'data': serializer.data,
+            'count': len(serializer.data)
+        })
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def home(request):
@@ -274,11 +370,11 @@ def custom_logout(request):
     query = urlencode(params)
     full_logout_url = f'{logout_url}?{query}'
     
-    return Response({
+    return breach_sensitive(Response({
         'success': True,
         'message': 'Logged out successfully',
         'keycloak_logout_url': full_logout_url
-    })
+    }))
 
 
 @api_view(['GET'])
@@ -318,8 +414,8 @@ def register_view(request):
     
     auth_url = f"{base_url}?{urlencode(params)}"
     
-    return Response({
+    return breach_sensitive(Response({
         'success': True,
         'message': 'Redirect to Keycloak registration',
         'registration_url': auth_url
-    })
+    }))
@@ -0,0 +1,137 @@
+"""
+Conditional GET for the API read endpoints.
+
+A response is identified by the request (path, query, renderer), the
+caller (user and roles) and the version of every table the endpoint reads.
+A trigger logs the id of each transaction that writes to a tracked table in
+myapp_tablechange, and the version of a table is the latest of them, so the
+ETag costs one small indexed query and a 304 is answered before any
+queryset or serializer runs. Writers only insert their own log row and never
+wait on each other.
+
+Transaction ids are taken when a transaction starts, so a writer that commits
+after a younger one does not raise the version. While a transaction older
+than a version is still running the response gets no ETag, and the version
+seen once it committed is the one the clients compare against.
+`manage.py run_jobs` purges the log down to the latest row per table.
+
+Requests routed to a read replica (myapp.replicas) read the versions from
+that replica too, so a lagging replica never pairs an old body with the
+primary's current version.
+"""
+import hashlib
+import time
+from django.db import connection, connections
+from django.utils.cache import patch_vary_headers
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+from myapp.decorators import get_user_roles
+from myapp.replicas import read_alias
+from myapp.storage import media_url_lifetime
+
+
+class NotModified(APIException):
+    status_code = status.HTTP_304_NOT_MODIFIED
+    default_detail = ''
+
+
+def table_versions(tables):
+    """latest writing transaction of each table, or None while an older transaction may still commit
+
+    Read from the database the request's querysets use: a lagging replica
+    reports the versions of the rows it serves.
+    """
+    with connections[read_alias()].cursor() as cursor:
+        cursor.execute(
+            "SELECT txid_snapshot_xmin(txid_current_snapshot()), "
+            "ARRAY(SELECT (SELECT max(change_seq) FROM myapp_tablechange WHERE table_name = name) "
+            "FROM unnest(%s::text[]) WITH ORDINALITY AS tables (name, position) ORDER BY position)",
+            [list(tables)]
+        )
+        oldest_running, versions = cursor.fetchone()
+    versions = [version or 0 for version in versions]
+    if versions and max(versions) >= oldest_running:
+        return None
+    return versions
+
+
+def purge_table_changes():
+    """keep the latest change of each table, the only one table_versions() reads"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "DELETE FROM myapp_tablechange old USING myapp_tablechange newer "
+            "WHERE newer.table_name = old.table_name AND newer.change_seq > old.change_seq"
+        )
+        return cursor.rowcount
+
+
+def _etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(',')]
+    return etag in candidates or f'W/{etag}' in candidates
+
+
+class ConditionalResponseMixin:
+    """ETag / 304 for the read actions of a viewset
+
+    conditional_models: models (or m2m through tables) the responses depend on
+    conditional_actions: GET actions that get validators
+    conditional_time_bucket: seconds, for responses that also depend on the
+        clock (overdue flags, "upcoming" filters); None when they do not
+    conditional_media_urls: True when responses embed media URLs, which
+        expire; the ETag changes before a cached copy's links do
+    """
+    conditional_models = ()
+    conditional_actions = ('list', 'retrieve')
+    conditional_time_bucket = None
+    conditional_media_urls = False
+    conditional_cache_control = 'private, no-cache'
+
+    def get_conditional_tables(self):
+        return sorted({model._meta.db_table for model in self.conditional_models})
+
+    def get_etag(self, request):
+        parts = [
+            request.get_full_path(),
+            request.accepted_renderer.format,
+            request.user.pk,
+            ','.join(sorted(get_user_roles(request))),
+        ]
+        versions = table_versions(self.get_conditional_tables())
+        if versions is None:
+            return None
+        parts += versions
+        if self.conditional_time_bucket:
+            parts.append(int(time.time() // self.conditional_time_bucket))
+        if self.conditional_media_urls:
+            parts.append(f'media:{int(time.time() // media_url_lifetime())}')
+        return '"%s"' % hashlib.md5('|'.join(str(part) for part in parts).encode()).hexdigest()
+
+    def initial(self, request, *args, **kwargs):
+        # authentication and permissions first, then the validators
+        super().initial(request, *args, **kwargs)
+
+        self.etag = None
+        if request.method in ('GET', 'HEAD') and self.action in self.conditional_actions:
+            self.etag = self.get_etag(request)
+            if self.etag and _etag_matches(request.META.get('HTTP_IF_NONE_MATCH'), self.etag):
+                raise NotModified()
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return Response(status=status.HTTP_304_NOT_MODIFIED)
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+
+        etag = getattr(self, 'etag', None)
+        if etag and response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            response['ETag'] = etag
+            response['Cache-Control'] = self.conditional_cache_control
+            patch_vary_headers(response, ('Cookie', 'Authorization'))
+        return response
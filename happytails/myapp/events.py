@@ -0,0 +1,61 @@
+"""
+Domain events, in process.
+
+A state transition emits one event (`emit('activity.accepted',
+activity=activity, previous=...)`) from the code that made it; subscribers
+are plain functions registered with `@subscribe(...)` in an app's
+`handlers.py` and are called as `handler(name, **payload)`. Dispatch happens
+once the current transaction commits, so a rolled back transition (or
+savepoint) never reaches a subscriber, and a subscriber sees the committed
+rows.
+
+Subscribers run one after the other in the request's process; one that fails
+is logged and does not stop the others. Their work is either best effort
+(live updates) or repairable (the read models, see
+myapp.services.read_models), so losing an event is never fatal.
+"""
+import logging
+from django.db import transaction
+from django.utils.module_loading import autodiscover_modules
+
+
+logger = logging.getLogger(__name__)
+
+_subscribers = []
+_discovered = False
+
+
+def subscribe(*names):
+    """register a function for the given events; 'activity.*' matches every activity event"""
+    def decorator(func):
+        for name in names:
+            _subscribers.append((name, func))
+        return func
+    return decorator
+
+
+def _matches(pattern, name):
+    if pattern.endswith('.*'):
+        return name.startswith(pattern[:-1])
+    return pattern == name
+
+
+def subscribers(name):
+    global _discovered
+    if not _discovered:
+        autodiscover_modules('handlers')
+        _discovered = True
+    return [func for pattern, func in _subscribers if _matches(pattern, name)]
+
+
+def dispatch(name, payload):
+    for func in subscribers(name):
+        try:
+            func(name, **payload)
+        except Exception:
+            logger.exception("handler %s.%s failed for %s", func.__module__, func.__name__, name)
+
+
+def emit(name, **payload):
+    """deliver `name` to its subscribers once the current transaction commits"""
+    transaction.on_commit(lambda: dispatch(name, payload))
@@ -1,7 +1,33 @@
+import os
 from django import forms
 from .models import Animal
+from .services.images import schedule_image_processing
+from .storage import sniff_image_extension
+
+
+class ImageUploadField(forms.FileField):
+    """signature check only, the image is decoded off the request by services.images"""
+    default_error_messages = {
+        'invalid_image': 'Încărcați o imagine validă (JPEG, PNG, GIF sau WebP).',
+    }
+
+    def to_python(self, data):
+        upload = super().to_python(data)
+        if upload is None:
+            return None
+
+        extension = sniff_image_extension(upload.read(16))
+        upload.seek(0)
+        if extension is None:
+            raise forms.ValidationError(self.error_messages['invalid_image'], code='invalid_image')
+
+        upload.name = os.path.splitext(upload.name)[0] + extension
+        return upload
+
 
 class AnimalForm(forms.ModelForm):
+    image = ImageUploadField(required=False)
+
     class Meta:
         model = Animal
         fields = ['name', 'age', 'breed', 'story', 'image', 'status'] 
@@ -12,4 +38,10 @@ class AnimalForm(forms.ModelForm):
             'breed': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Rasa'}),
             'story': forms.Textarea(attrs={'class': 'form-control', 'rows': 4, 'placeholder': 'Povestea animalului...'}),
             'status': forms.Select(attrs={'class': 'form-select'}),
-        }
\ No newline at end of file
+        }
+
+    def save(self, commit=True):
+        animal = super().save(commit=commit)
+        if commit and 'image' in self.changed_data and animal.image:
+            schedule_image_processing(animal.image.name)
+        return animal
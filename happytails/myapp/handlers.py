@@ -0,0 +1,48 @@
+"""domain event subscribers (see myapp.events): live updates and the dashboard read models"""
+from myapp.events import subscribe
+from myapp.realtime import activity_event, adoption_event, publish, visit_event
+from myapp.services import read_models
+
+
+@subscribe('activity.created', 'activity.accepted', 'activity.started', 'activity.completed')
+def publish_activity(name, activity, **payload):
+    activity_event(activity, name)
+
+
+@subscribe('activities.assigned')
+def publish_assignment(name, day, plan, **payload):
+    channels = {'role:admin'} | {f'user:{volunteer_id}' for volunteer_id in plan}
+    publish(channels, name, {'date': day, 'plan': plan})
+
+
+@subscribe('visit.*')
+def publish_visit(name, visit, **payload):
+    visit_event(visit, name)
+
+
+@subscribe('adoption.*')
+def publish_adoption(name, adoption, **payload):
+    adoption_event(adoption, name)
+
+
+@subscribe('activity.*')
+def project_activity(name, activity, previous=None, **payload):
+    states = [previous] if previous else []
+    if name != 'activity.deleted':
+        states.append(read_models.activity_state(activity))
+    read_models.refresh_activities(states)
+
+
+@subscribe('activities.assigned')
+def project_assignment(name, day, plan, animals, **payload):
+    # the tasks moved from the unassigned slice of the day to their volunteers
+    for assigned_to in [None] + sorted(plan):
+        read_models.refresh_day(day, assigned_to)
+    for animal_id in sorted(animals):
+        read_models.refresh_animal(animal_id)
+
+
+@subscribe('activities.cascaded')
+def project_cascade(name, states, **payload):
+    # activities deleted or unassigned along with their animal or volunteer
+    read_models.refresh_activities(states)
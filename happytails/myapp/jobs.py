@@ -0,0 +1,182 @@
+"""
+Background jobs stored in PostgreSQL (myapp_job), no broker required.
+
+Tasks are plain functions registered with `@task('name', queue=...)` in an
+app's `tasks.py`; `enqueue('name', **kwargs)` inserts a row in the caller's
+transaction, so a job exists exactly when the work that asked for it
+committed. Workers (`manage.py run_jobs`, as many processes or hosts as
+needed) claim batches with SELECT ... FOR UPDATE SKIP LOCKED: concurrent
+claims never wait on each other and never get the same row.
+
+settings.JOB_QUEUES caps how many jobs of a queue run at once across all
+workers; claims of one queue are serialized by an advisory lock so the cap
+holds. Failed jobs are retried with exponential backoff until max_attempts,
+jobs of a worker that died are picked up again after JOB_TIMEOUT.
+
+Everything goes through enqueue() and the registry, so a broker-backed
+transport can later replace the table without touching the callers.
+"""
+import logging
+import random
+import traceback
+from collections import namedtuple
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+from myapp.models import Job
+
+
+logger = logging.getLogger(__name__)
+
+TaskSpec = namedtuple('TaskSpec', 'func queue priority max_attempts')
+
+# first key of the two-key advisory lock taken while claiming
+CLAIM_LOCK_NAMESPACE = 0x4A42
+DEFAULT_CONCURRENCY = 4
+DEFAULT_TIMEOUT = 600
+RETRY_BASE_SECONDS = 30
+RETRY_MAX_SECONDS = 3600
+
+_registry = {}
+_discovered = False
+
+
+def task(name, queue='default', priority=0, max_attempts=5):
+    """register a function as a background task"""
+    def decorator(func):
+        _registry[name] = TaskSpec(func, queue, priority, max_attempts)
+        return func
+    return decorator
+
+
+def get_task(name):
+    global _discovered
+    if not _discovered:
+        autodiscover_modules('tasks')
+        _discovered = True
+    return _registry[name]
+
+
+def enqueue(name, /, run_at=None, priority=None, **kwargs):
+    """queue `name(**kwargs)`; the job becomes visible when the current transaction commits
+
+    kwargs must be JSON serializable (dates and datetimes arrive as ISO strings).
+    """
+    spec = get_task(name)
+    if getattr(settings, 'JOBS_EAGER', False):
+        # development without a worker: run after commit, in this process
+        transaction.on_commit(lambda: _run_eager(name, spec, kwargs))
+        return None
+
+    return Job.objects.create(
+        queue=spec.queue,
+        task=name,
+        kwargs=kwargs,
+        priority=spec.priority if priority is None else priority,
+        run_at=run_at or timezone.now(),
+        max_attempts=spec.max_attempts,
+    )
+
+
+def _run_eager(name, spec, kwargs):
+    try:
+        spec.func(**kwargs)
+    except Exception:
+        logger.exception("job %s failed", name)
+
+
+def queue_concurrency(queue):
+    return getattr(settings, 'JOB_QUEUES', {}).get(queue, DEFAULT_CONCURRENCY)
+
+
+def job_timeout():
+    return timedelta(seconds=getattr(settings, 'JOB_TIMEOUT', DEFAULT_TIMEOUT))
+
+
+def retry_delay(attempts):
+    """30 s, 1 min, 2 min ... capped at an hour, with jitter so retries do not come in waves"""
+    delay = min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS)
+    return timedelta(seconds=delay * random.uniform(0.75, 1.25))
+
+
+def requeue_stale(queue):
+    """jobs still running after JOB_TIMEOUT belong to a dead worker: retry or fail them"""
+    return Job.objects.filter(
+        queue=queue,
+        status='RN',
+        locked_at__lt=timezone.now() - job_timeout()
+    ).update(
+        status=Case(When(attempts__gte=F('max_attempts'), then=Value('FL')), default=Value('QD')),
+        last_error='worker timed out',
+        locked_by='',
+    )
+
+
+@transaction.atomic
+def claim(queue, worker_id, limit):
+    """lock up to `limit` due jobs of `queue` for this worker, within the queue's concurrency"""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(%s, hashtext(%s))", [CLAIM_LOCK_NAMESPACE, queue])
+
+    now = timezone.now()
+    running = Job.objects.filter(queue=queue, status='RN').count()
+    limit = min(limit, queue_concurrency(queue) - running)
+    if limit <= 0:
+        return []
+
+    jobs = list(
+        Job.objects.select_for_update(skip_locked=True)
+        .filter(queue=queue, status='QD', run_at__lte=now)
+        .order_by('priority', 'run_at', 'id')[:limit]
+    )
+    if jobs:
+        Job.objects.filter(pk__in=[job.pk for job in jobs]).update(
+            status='RN', locked_by=worker_id, locked_at=now, attempts=F('attempts') + 1
+        )
+        for job in jobs:
+            job.status, job.locked_by, job.locked_at = 'RN', worker_id, now
+            job.attempts += 1
+    return jobs
+
+
+def has_due(queues):
+    return Job.objects.filter(queue__in=queues, status='QD', run_at__lte=timezone.now()).exists()
+
+
+def release(claimed):
+    """give back claimed jobs that were not started (worker shutting down)"""
+    if claimed:
+        Job.objects.filter(pk__in=[job.pk for job in claimed], status='RN', locked_by=claimed[0].locked_by).update(
+            status='QD', locked_by='', locked_at=None, attempts=F('attempts') - 1
+        )
+
+
+def run(job):
+    """execute a claimed job and record the outcome; returns True when it succeeded"""
+    mine = Job.objects.filter(pk=job.pk, status='RN', locked_by=job.locked_by)
+    try:
+        spec = get_task(job.task)
+    except KeyError:
+        mine.update(status='FL', last_error=f'unknown task {job.task}', finished_at=timezone.now())
+        return False
+
+    try:
+        spec.func(**job.kwargs)
+    except Exception:
+        error = traceback.format_exc()[-4000:]
+        logger.warning("job %s #%s failed (attempt %s/%s)", job.task, job.pk, job.attempts, job.max_attempts)
+        if job.attempts >= job.max_attempts:
+            mine.update(status='FL', last_error=error, finished_at=timezone.now())
+        else:
+            mine.update(status='QD', last_error=error, locked_by='', run_at=timezone.now() + retry_delay(job.attempts))
+        return False
+
+    mine.update(status='DN', last_error='', finished_at=timezone.now())
+    return True
+
+
+def purge_finished(older_than):
+    return Job.objects.filter(status='DN', finished_at__lt=timezone.now() - older_than).delete()[0]
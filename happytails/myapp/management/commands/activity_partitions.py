@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from myapp.services import partitions
+
+
+class Command(BaseCommand):
+    help = "Create the monthly activity partitions ahead of time and archive the months past retention"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ahead', type=int, default=None,
+                            help='months to create after the current one (default: settings.ACTIVITY_PARTITIONS_AHEAD)')
+        parser.add_argument('--retain', type=int, default=getattr(settings, 'ACTIVITY_RETENTION_MONTHS', None),
+                            help='months kept in the table before the current one; older ones are archived')
+        parser.add_argument('--drop', action='store_true',
+                            help='drop archived months instead of keeping them as myapp_activity_archive_* tables')
+
+    def handle(self, *args, **options):
+        for month, moved in partitions.ensure_partitions(options['ahead']).items():
+            self.stdout.write(f"created {partitions.partition_name(month)} ({moved} activities moved from the default partition)")
+
+        if options['retain'] is None:
+            return
+        archived, kept = partitions.archive_partitions(options['retain'], drop=options['drop'])
+        for month, rows in archived.items():
+            action = 'dropped' if options['drop'] else 'archived'
+            self.stdout.write(f"{action} {partitions.partition_name(month)} ({rows} activities)")
+        for month, reason in kept.items():
+            self.stdout.write(self.style.WARNING(f"kept {partitions.partition_name(month)}: {reason}"))
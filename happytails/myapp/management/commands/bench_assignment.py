@@ -0,0 +1,56 @@
+import random
+import statistics
+import time
+from django.core.management.base import BaseCommand
+from myapp.services.assignment import Task, plan_assignments
+
+
+HOUR = 3600
+
+
+class Command(BaseCommand):
+    help = "Benchmark the activity assignment planner on synthetic data (no database access)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=3000)
+        parser.add_argument('--volunteers', type=int, default=250)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+
+        # shelter open 08:00 - 20:00, morning / afternoon / full-day shifts
+        shift_patterns = [[(8 * HOUR, 14 * HOUR)], [(14 * HOUR, 20 * HOUR)], [(8 * HOUR, 20 * HOUR)]]
+        shifts = {
+            volunteer: rng.choice(shift_patterns)
+            for volunteer in range(options['volunteers'])
+        }
+
+        tasks = []
+        for task_id in range(options['tasks']):
+            start = rng.randrange(8 * HOUR, 18 * HOUR, 15 * 60)
+            duration = rng.choice([15, 30, 30, 45, 60]) * 60
+            deadline = min(start + rng.choice([1, 2, 3, 4]) * HOUR, 20 * HOUR)
+            tasks.append(Task(task_id, start, deadline, duration, rng.randrange(4)))
+
+        timings = []
+        for _ in range(options['repeat']):
+            started = time.perf_counter()
+            plan, unassigned = plan_assignments(tasks, shifts)
+            timings.append(time.perf_counter() - started)
+
+        loads = [0] * options['volunteers']
+        durations = {task.id: task.duration for task in tasks}
+        for task_id, (volunteer, _) in plan.items():
+            loads[volunteer] += durations[task_id] / 60
+
+        self.stdout.write(f"tasks={len(tasks)} volunteers={len(shifts)}")
+        self.stdout.write(f"planned={len(plan)} unassigned={len(unassigned)}")
+        self.stdout.write(
+            f"load minutes: min={min(loads):.0f} max={max(loads):.0f} "
+            f"stdev={statistics.pstdev(loads):.1f}"
+        )
+        self.stdout.write(
+            f"time: best={min(timings) * 1000:.1f} ms median={statistics.median(timings) * 1000:.1f} ms"
+        )
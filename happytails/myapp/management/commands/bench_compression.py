@@ -0,0 +1,57 @@
+import time
+from django.core.management.base import BaseCommand
+from myapp.management.commands.bench_renderers import synthetic_activities
+from myapp.middleware import brotli, brotli_bytes, gzip_bytes
+from myapp.renderers import FastJSONRenderer
+from myapp.serializers import ActivityListSerializer
+
+
+# downlink of the network profiles volunteers' phones see in the shelter yard
+NETWORKS = (
+    ('2G/EDGE', 240_000),
+    ('slow 3G', 400_000),
+    ('fast 3G', 1_600_000),
+)
+
+
+class Command(BaseCommand):
+    help = "Measure bytes on the wire and transfer time of compressed activity lists (no database access)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[20, 200, 2000])
+        parser.add_argument('--seed', type=int, default=42)
+
+    def _timed(self, func, data, repeat=5):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = func(data)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return result, best
+
+    def handle(self, *args, **options):
+        codecs = [('identity', lambda data: data), ('gzip', gzip_bytes)]
+        if brotli is not None:
+            codecs.append(('br', brotli_bytes))
+        else:
+            self.stdout.write("brotli not installed, gzip only")
+
+        header = f"{'rows':>6} {'encoding':>9} {'bytes':>10} {'ratio':>6} {'cpu ms':>7}"
+        header += ''.join(f" {name + ' ms':>13}" for name, _ in NETWORKS)
+        self.stdout.write(header)
+
+        for size in options['sizes']:
+            activities = synthetic_activities(size, options['seed'])
+            payload = FastJSONRenderer().render({
+                'success': True,
+                'data': ActivityListSerializer(activities, many=True).data,
+                'count': size
+            })
+
+            for name, codec in codecs:
+                body, cpu = self._timed(codec, payload)
+                line = f"{size:>6} {name:>9} {len(body):>10} {len(payload) / len(body):>6.1f} {cpu * 1000:>7.2f}"
+                for _, bits_per_second in NETWORKS:
+                    line += f" {(len(body) * 8 / bits_per_second + cpu) * 1000:>13.0f}"
+                self.stdout.write(line)
@@ -0,0 +1,73 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from myapp.models import Activity, Animal
+from myapp.renderers import FastJSONRenderer, orjson
+from myapp.serializers import ActivityListSerializer
+
+
+def synthetic_activities(count, seed=42):
+    """unsaved activities with their animals and volunteers attached"""
+    rng = random.Random(seed)
+    now = timezone.now()
+
+    animals = [Animal(id=i, name=f'Animal {i}', breed='Metis', age='2', size='M', story='') for i in range(200)]
+    volunteers = [User(id=i, username=f'voluntar{i}') for i in range(50)]
+    activities = []
+    for i in range(count):
+        scheduled = now + timedelta(minutes=rng.randrange(-3000, 3000))
+        activities.append(Activity(
+            id=i,
+            animal=rng.choice(animals),
+            activity_type=rng.choice(Activity.ACTIVITY_TYPES)[0],
+            title=f'Plimbare de seară cu {i}',
+            scheduled_time=scheduled,
+            deadline=scheduled + timedelta(hours=rng.choice([1, 2, 4])),
+            duration_minutes=rng.choice([15, 30, 60]),
+            status=rng.choice(['PD', 'AS', 'IP', 'CM']),
+            priority=rng.choice(Activity.PRIORITY_CHOICES)[0],
+            assigned_to=rng.choice(volunteers + [None]),
+        ))
+    return activities
+
+
+class Command(BaseCommand):
+    help = "Benchmark serialization and JSON rendering of a large activity list (no database access)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--activities', type=int, default=5000)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def _timed(self, repeat, func):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = func()
+            timings.append(time.perf_counter() - started)
+        return result, min(timings), statistics.median(timings)
+
+    def handle(self, *args, **options):
+        activities = synthetic_activities(options['activities'], options['seed'])
+
+        repeat = options['repeat']
+        data, best, median = self._timed(repeat, lambda: ActivityListSerializer(activities, many=True).data)
+        self.stdout.write(f"activities={len(activities)}")
+        self.stdout.write(f"serializer:        best={best * 1000:.1f} ms median={median * 1000:.1f} ms")
+
+        payload = {'success': True, 'data': data, 'count': len(data)}
+        stdlib, best, median = self._timed(repeat, lambda: JSONRenderer().render(payload))
+        self.stdout.write(f"JSONRenderer:      best={best * 1000:.1f} ms median={median * 1000:.1f} ms ({len(stdlib)} bytes)")
+
+        if orjson is None:
+            self.stdout.write("FastJSONRenderer:  orjson not installed, same as JSONRenderer")
+            return
+
+        fast, best, median = self._timed(repeat, lambda: FastJSONRenderer().render(payload))
+        self.stdout.write(f"FastJSONRenderer:  best={best * 1000:.1f} ms median={median * 1000:.1f} ms ({len(fast)} bytes)")
+        self.stdout.write(f"identical output: {fast == stdlib}")
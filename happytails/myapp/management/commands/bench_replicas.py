@@ -0,0 +1,85 @@
+from collections import Counter
+from contextlib import ExitStack
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django.utils.crypto import get_random_string
+from myapp.models import Animal
+from myapp.replicas import replicas, routing_stats
+
+
+READ_PATHS = [
+    '/api/animals/',
+    '/api/animals/favorites/',
+    '/api/animals/vaccinations-due/',
+    '/api/activities/',
+    '/api/activities/dashboard/',
+    '/api/activities/pending/',
+    '/api/adoptions/',
+    '/api/adoptions/review-queue/',
+    '/api/visits/',
+]
+
+
+class Command(BaseCommand):
+    help = "Count the SQL statements the read endpoints run on the primary and on the replicas"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def _counting(self, counts, alias):
+        def wrapper(execute, sql, params, many, context):
+            counts[alias] += 1
+            return execute(sql, params, many, context)
+        return wrapper
+
+    def _run(self, client, paths, repeat):
+        """statements per database alias for `repeat` rounds of GETs"""
+        counts = Counter()
+        with ExitStack() as stack:
+            for alias in settings.DATABASES:
+                stack.enter_context(connections[alias].execute_wrapper(self._counting(counts, alias)))
+            for _ in range(repeat):
+                for path in paths:
+                    response = client.get(path)
+                    if response.status_code != 200:
+                        raise CommandError(f'GET {path}: {response.status_code}')
+        return counts
+
+    def _report(self, label, counts):
+        total = sum(counts.values())
+        on_replicas = sum(count for alias, count in counts.items() if alias in replicas())
+        self.stdout.write(f'{label}: {total} statements, {on_replicas} on replicas '
+                          f'({on_replicas / total:.0%} off the primary)' if total else f'{label}: no statements')
+        for alias, count in sorted(counts.items()):
+            self.stdout.write(f'  {alias:<12} {count}')
+
+    def handle(self, *args, **options):
+        if not replicas():
+            raise CommandError('no replicas configured, set DB_REPLICAS')
+        repeat = options['repeat']
+
+        user = User.objects.create_user(f'bench_replicas_{get_random_string(8)}')
+        try:
+            client = Client()
+            client.force_login(user)
+            session = client.session
+            session['user_roles'] = ['admin', 'volunteer', 'client']
+            session.save()
+
+            self._report('reads', self._run(client, READ_PATHS, repeat))
+
+            # a write pins the session to the primary for REPLICA_STICKY_SECONDS
+            animal = Animal.objects.first()
+            if animal is not None:
+                client.post(f'/api/animals/{animal.pk}/toggle-favorite/')
+                client.post(f'/api/animals/{animal.pk}/toggle-favorite/')
+                self._report('reads after a write', self._run(client, READ_PATHS, 1))
+        finally:
+            user.delete()
+
+        self.stdout.write('router decisions in this process:')
+        for key, count in sorted(routing_stats().items()):
+            self.stdout.write(f'  {key:<20} {count}')
@@ -0,0 +1,107 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from myapp.models import Activity, Adoption, Animal, Visit
+from myapp.serializers import (
+    ActivityListSerializer, ActivityListValuesSerializer,
+    AdoptionListSerializer, AdoptionListValuesSerializer,
+    VisitListSerializer, VisitListValuesSerializer
+)
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Benchmark the list serializers against their values() counterparts (rows are rolled back)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def _timed(self, repeat, func):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = func()
+            timings.append(time.perf_counter() - started)
+        return result, min(timings), statistics.median(timings)
+
+    def _seed(self, rows, rng):
+        now = timezone.now()
+        stamp = int(time.time())
+        users = User.objects.bulk_create([
+            User(username=f'bench{stamp}_{i}', email=f'bench{i}@example.com') for i in range(100)
+        ])
+        animals = Animal.objects.bulk_create([
+            Animal(name=f'Animal {i}', breed='Metis', age='2', size='M', story='',
+                   image=f'animals/{i:02x}/{i:064x}.jpg' if i % 2 else None)
+            for i in range(300)
+        ])
+        adoptions = Adoption.objects.bulk_create([
+            # distinct (user, animal) pairs: at most one pending application each
+            Adoption(user=users[i % len(users)], animal=animals[i // len(users) % len(animals)],
+                     status=rng.choice(Adoption.STATUS_CHOICES)[0], phone='0700000000',
+                     address='-', reason='-', experience='-', living_situation='-',
+                     visit_scheduled=bool(i % 3), visit_date=now + timedelta(days=i % 30) if i % 3 else None)
+            for i in range(rows)
+        ])
+        Visit.objects.bulk_create([
+            Visit(adoption=rng.choice(adoptions), volunteer=rng.choice(users + [None]),
+                  scheduled_date=now + timedelta(hours=rng.randrange(-500, 500)),
+                  status=rng.choice(Visit.STATUS_CHOICES)[0])
+            for _ in range(rows)
+        ])
+        # deadlines on the half hour, far from the "X ore" / "X zile" boundaries,
+        # so both serializers see the same labels
+        Activity.objects.bulk_create([
+            Activity(animal=rng.choice(animals), activity_type=rng.choice(Activity.ACTIVITY_TYPES)[0],
+                     title=f'Plimbare {i}', scheduled_time=now + timedelta(hours=rng.randrange(-48, 96)),
+                     deadline=now + timedelta(hours=rng.randrange(-48, 96), minutes=30),
+                     duration_minutes=rng.choice([15, 30, 60]), status=rng.choice(['PD', 'AS', 'IP', 'CM']),
+                     priority=rng.choice(Activity.PRIORITY_CHOICES)[0], assigned_to=rng.choice(users + [None]))
+            for i in range(rows)
+        ])
+        return [user.pk for user in users], [animal.pk for animal in animals]
+
+    def handle(self, *args, **options):
+        rows, repeat = options['rows'], options['repeat']
+        request = RequestFactory().get('/api/')
+        context = {'request': request}
+        renderer = JSONRenderer()
+
+        try:
+            with transaction.atomic():
+                user_ids, animal_ids = self._seed(rows, random.Random(options['seed']))
+                cases = [
+                    ('activities', ActivityListSerializer, ActivityListValuesSerializer,
+                     Activity.objects.filter(animal_id__in=animal_ids).select_related('animal', 'assigned_to')),
+                    ('adoptions', AdoptionListSerializer, AdoptionListValuesSerializer,
+                     Adoption.objects.filter(user_id__in=user_ids).select_related('user', 'animal')),
+                    ('visits', VisitListSerializer, VisitListValuesSerializer,
+                     Visit.objects.filter(adoption__user_id__in=user_ids).select_related(
+                         'adoption', 'adoption__animal', 'adoption__user', 'volunteer')),
+                ]
+                for name, model_serializer, values_serializer, queryset in cases:
+                    queryset = queryset.order_by('pk')
+                    slow, slow_best, _ = self._timed(
+                        repeat, lambda: model_serializer(queryset.all(), many=True, context=context).data)
+                    fast, fast_best, _ = self._timed(
+                        repeat, lambda: values_serializer(queryset.all(), context=context).data)
+                    self.stdout.write(
+                        f"{name:<11} rows={len(fast)} ModelSerializer={slow_best * 1000:.0f} ms "
+                        f"values()={fast_best * 1000:.0f} ms speedup={slow_best / fast_best:.1f}x "
+                        f"identical={renderer.render(slow) == renderer.render(fast)}"
+                    )
+                raise Rollback()
+        except Rollback:
+            pass
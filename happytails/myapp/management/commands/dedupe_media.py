@@ -0,0 +1,49 @@
+import os
+from django.core.files import File
+from django.core.management.base import BaseCommand
+from myapp.models import Animal
+from myapp.storage import content_name, file_digest, sniff_image_extension
+
+
+class Command(BaseCommand):
+    help = "Move animal photos uploaded before content addressing to their sha256 names, merging duplicates"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        field = Animal._meta.get_field('image')
+        storage = field.storage
+        directory = field.upload_to.rstrip('/')
+
+        _, files = storage.listdir(directory)
+        moved = saved_bytes = 0
+        targets = set()
+
+        for filename in sorted(files):
+            if filename.startswith('.'):
+                continue
+            name = f'{directory}/{filename}'
+            with storage.open(name, 'rb') as source:
+                extension = sniff_image_extension(source.read(16)) or os.path.splitext(filename)[1].lower()
+                source.seek(0)
+                if options['dry_run']:
+                    new_name = content_name(directory, file_digest(File(source)), extension)
+                else:
+                    new_name = storage.save(f'{directory}/{os.path.splitext(filename)[0]}{extension}', File(source))
+
+            if new_name in targets:
+                saved_bytes += storage.size(name)
+            targets.add(new_name)
+
+            rows = Animal.objects.filter(image=name)
+            self.stdout.write(f"{name} -> {new_name} ({rows.count()} animals)")
+            if not options['dry_run']:
+                rows.update(image=new_name)
+                storage.delete(name)
+            moved += 1
+
+        self.stdout.write(
+            f"{moved} files, {len(targets)} distinct blobs, {saved_bytes / 1024:.0f} KB of duplicates"
+            + (" (dry run)" if options['dry_run'] else " removed")
+        )
@@ -0,0 +1,52 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from myapp.models import Animal
+
+
+class Command(BaseCommand):
+    help = "Delete content-addressed animal photos no row points at any more"
+
+    def add_arguments(self, parser):
+        # an upload writes the blob before its transaction commits the row,
+        # and a re-upload of the same bytes only refreshes the blob's mtime
+        parser.add_argument('--grace-hours', type=float, default=24,
+                            help="keep unreferenced blobs younger than this")
+        parser.add_argument('--dry-run', action='store_true')
+
+    def _blobs(self, storage, directory):
+        # only content-addressed names (animals/ab/ab...); files at the top
+        # level predate content addressing and are dedupe_media's business
+        directories, _ = storage.listdir(directory)
+        for prefix in directories:
+            _, files = storage.listdir(f'{directory}/{prefix}')
+            for filename in files:
+                if not filename.startswith('.'):
+                    yield f'{directory}/{prefix}/{filename}'
+
+    def handle(self, *args, **options):
+        field = Animal._meta.get_field('image')
+        storage = field.storage
+        directory = field.upload_to.rstrip('/')
+        cutoff = timezone.now() - timedelta(hours=options['grace_hours'])
+
+        referenced = set(Animal.objects.exclude(image='').exclude(image__isnull=True)
+                         .values_list('image', flat=True))
+        removed = freed = 0
+        for name in sorted(self._blobs(storage, directory)):
+            if name in referenced or storage.get_modified_time(name) > cutoff:
+                continue
+            # the listing can be minutes old by now
+            if Animal.objects.filter(image=name).exists():
+                continue
+            size = storage.size(name)
+            self.stdout.write(f"{name} ({size / 1024:.0f} KB)")
+            if not options['dry_run']:
+                storage.delete(name)
+            removed += 1
+            freed += size
+
+        self.stdout.write(
+            f"{removed} unreferenced blobs, {freed / 1024:.0f} KB"
+            + (" (dry run)" if options['dry_run'] else " removed")
+        )
@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from myapp.services.notifications import notify_admins
+from myapp.services.visit_matching import MATCH_HORIZON_DAYS, match_upcoming_visits
+
+
+class Command(BaseCommand):
+    help = ("Match the upcoming unassigned visits with volunteers on shift and mail administrators "
+            "the ones nobody can host (run daily from cron)")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=MATCH_HORIZON_DAYS)
+
+    def handle(self, *args, **options):
+        unmatched = match_upcoming_visits(options['days'])
+        if not unmatched:
+            self.stdout.write("every upcoming visit has a volunteer")
+            return
+
+        lines = [
+            f"- {timezone.localtime(visit.scheduled_date):%d.%m.%Y %H:%M} "
+            f"{visit.adoption.animal.name} with {visit.adoption.user.username} (#{visit.pk})"
+            for visit in unmatched
+        ]
+        self.stdout.write("\n".join(lines))
+        if not settings.ADMINS:
+            self.stderr.write("no administrators to alert, set ADMIN_EMAILS")
+            return
+        notify_admins(f"{len(unmatched)} visits without a volunteer", "\n".join(lines)
+                      + "\n\nAdd shifts for these days; new shifts are matched automatically.")
+        self.stdout.write(f"{len(unmatched)} unmatched visits sent to the administrators")
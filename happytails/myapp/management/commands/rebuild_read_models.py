@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from myapp.services.read_models import rebuild
+
+
+class Command(BaseCommand):
+    help = "Recompute the dashboard read models (activity day counts, open tasks per animal) from the activities"
+
+    def handle(self, *args, **options):
+        rows = rebuild()
+        self.stdout.write(self.style.SUCCESS(f"{rows} read model rows rebuilt"))
@@ -0,0 +1,68 @@
+import os
+import signal
+import socket
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from myapp import jobs
+from myapp.conditional import purge_table_changes
+
+
+class Command(BaseCommand):
+    help = "Run background jobs; start as many workers as needed, they share the work through the database"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queues', help="comma separated, default: every queue in settings.JOB_QUEUES")
+        parser.add_argument('--batch', type=int, default=10, help="jobs claimed per round and queue")
+        parser.add_argument('--interval', type=float, default=1.0, help="seconds to sleep when there is nothing to do")
+        parser.add_argument('--once', action='store_true', help="run what is due, then exit")
+        parser.add_argument('--purge-days', type=int, default=7, help="delete finished jobs older than this")
+
+    def handle(self, *args, **options):
+        queues = (options['queues'] or ','.join(getattr(settings, 'JOB_QUEUES', {'default': 1}))).split(',')
+        worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        self.stdout.write(f"worker {worker_id} on {', '.join(queues)}")
+        purge_after = timedelta(days=options['purge_days'])
+        next_purge = 0
+        done = failed = 0
+
+        while not self.stopping:
+            if time.monotonic() >= next_purge:
+                jobs.purge_finished(purge_after)
+                purge_table_changes()
+                for queue in queues:
+                    jobs.requeue_stale(queue)
+                next_purge = time.monotonic() + 60
+
+            claimed = 0
+            for queue in queues:
+                batch = jobs.claim(queue, worker_id, options['batch'])
+                claimed += len(batch)
+                for position, job in enumerate(batch):
+                    if self.stopping:
+                        jobs.release(batch[position:])
+                        break
+                    if jobs.run(job):
+                        done += 1
+                    else:
+                        failed += 1
+                    close_old_connections()
+
+            # a claim can come back empty only because other workers fill the queue's concurrency
+            if options['once'] and not claimed and not jobs.has_due(queues):
+                break
+            if not claimed:
+                close_old_connections()
+                time.sleep(options['interval'])
+
+        self.stdout.write(f"worker {worker_id} stopped: {done} done, {failed} failed")
+
+    def _stop(self, signum, frame):
+        # finish the job at hand, then exit
+        self.stopping = True
@@ -0,0 +1,47 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from myapp.models import IssueReport
+from myapp.services.notifications import notify_admins
+
+
+class Command(BaseCommand):
+    help = "Mail administrators a digest of the open issue reports they have not been told about yet"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=200)
+
+    def handle(self, *args, **options):
+        # notified_at is stamped once the digest is queued; with nobody to
+        # mail the reports wait for the next run
+        if not settings.ADMINS:
+            self.stderr.write("no administrators to alert, set ADMIN_EMAILS")
+            return
+
+        with transaction.atomic():
+            # urgent reports were already sent when they were filed (notified_at set)
+            reports = list(
+                IssueReport.objects.select_for_update(skip_locked=True, of=('self',))
+                .filter(resolved_at__isnull=True, notified_at__isnull=True)
+                .select_related('animal', 'reporter')
+                .order_by('-severity', 'created_at')[:options['limit']]
+            )
+            if not reports:
+                self.stdout.write("no new reports")
+                return
+
+            lines = [
+                f"- [{report.get_severity_display()}] {report.get_category_display()}: {report.title}"
+                f"{f' ({report.animal.name})' if report.animal_id else ''}"
+                f" - {report.reporter.username if report.reporter else '-'}, "
+                f"{timezone.localtime(report.created_at):%d.%m.%Y %H:%M}"
+                for report in reports
+            ]
+            notify_admins(f"{len(reports)} new issue reports", "\n".join(lines))
+
+            IssueReport.objects.filter(pk__in=[report.pk for report in reports]).update(
+                notified_at=timezone.now()
+            )
+
+        self.stdout.write(f"{len(reports)} reports sent in the digest")
@@ -0,0 +1,60 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from myapp.models import VaccinationSchedule
+from myapp.services.notifications import notify_admins
+
+
+class Command(BaseCommand):
+    help = "Alert administrators about vaccinations due in the next N days (each due date is alerted once)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7)
+        parser.add_argument('--batch-size', type=int, default=100)
+
+    def handle(self, *args, **options):
+        # alert_pending is cleared once the mail is queued; with nobody to mail
+        # the schedules stay pending for the next run
+        if not settings.ADMINS:
+            self.stderr.write("no administrators to alert, set ADMIN_EMAILS")
+            return
+
+        now = timezone.now()
+        horizon = now + timedelta(days=options['days'])
+        sent = 0
+
+        while True:
+            with transaction.atomic():
+                # range scan on the partial (alert_pending) index; rows locked by
+                # a concurrent run are skipped instead of alerted twice
+                batch = list(
+                    VaccinationSchedule.objects.select_for_update(skip_locked=True, of=('self',))
+                    .filter(alert_pending=True, next_due_at__lte=horizon)
+                    .exclude(animal__status='AD')
+                    .select_related('animal')
+                    .order_by('next_due_at')[:options['batch_size']]
+                )
+                if not batch:
+                    break
+
+                lines = []
+                for schedule in batch:
+                    state = 'OVERDUE' if schedule.next_due_at < now else 'due'
+                    lines.append(
+                        f"- {schedule.animal.name} (#{schedule.animal_id}): {schedule.vaccine} "
+                        f"{state} {timezone.localtime(schedule.next_due_at):%d.%m.%Y}"
+                    )
+                notify_admins(
+                    f"Vaccinations due in the next {options['days']} days ({len(batch)})",
+                    "\n".join(lines)
+                )
+
+                VaccinationSchedule.objects.filter(pk__in=[s.pk for s in batch]).update(
+                    alert_pending=False,
+                    alerted_at=now
+                )
+                sent += len(batch)
+
+        self.stdout.write(f"{sent} vaccination alerts sent")
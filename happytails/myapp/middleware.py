@@ -0,0 +1,173 @@
+"""
+Response compression for the API.
+
+Replaces django.middleware.gzip.GZipMiddleware with:
+
+- brotli when the client accepts it and the `brotli` package is installed,
+  gzip otherwise (q-values in Accept-Encoding are honoured);
+- a minimum size (settings.COMPRESSION_MIN_SIZE) below which compressing
+  costs more than it saves, and a content type allow-list (photos and other
+  binary media are already compressed);
+- streaming responses compressed chunk by chunk.
+
+BREACH: a body that holds a secret next to attacker-influenced text leaks
+the secret through the compressed length. Responses marked with
+`breach_sensitive()` (tokens, OIDC parameters) are never compressed, and
+pages that embed the CSRF token only get gzip with a random-length file name
+in the header, which adds noise to the length (as Django 4.2 does).
+"""
+import gzip
+import secrets
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.text import StreamingBuffer
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+DEFAULT_MIN_SIZE = 1024
+COMPRESSIBLE_TYPES = (
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml',
+    'text/',
+)
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+# random file name length for the gzip header of CSRF-bearing pages
+MAX_RANDOM_BYTES = 100
+
+
+def breach_sensitive(response):
+    """mark a response whose body carries a secret, it is sent uncompressed"""
+    response.breach_sensitive = True
+    return response
+
+
+def accepted_encodings(header):
+    """{'gzip': 1.0, 'br': 0.8, ...} from an Accept-Encoding header"""
+    encodings = {}
+    for part in header.split(','):
+        name, _, params = part.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        encodings[name] = quality
+    return encodings
+
+
+def choose_encoding(header, allow_brotli=True):
+    encodings = accepted_encodings(header)
+    candidates = ['br', 'gzip'] if (brotli is not None and allow_brotli) else ['gzip']
+    wildcard = encodings.get('*', 0.0)
+    best, best_quality = None, 0.0
+    for name in candidates:
+        quality = encodings.get(name, wildcard)
+        # ties go to the first candidate (brotli compresses JSON better)
+        if quality > best_quality:
+            best, best_quality = name, quality
+    return best
+
+
+def _gzip_filename(padded):
+    return secrets.token_hex(secrets.randbelow(MAX_RANDOM_BYTES) + 1) if padded else ''
+
+
+def gzip_bytes(data, padded=False):
+    buf = StreamingBuffer()
+    with gzip.GzipFile(filename=_gzip_filename(padded), mode='wb', compresslevel=GZIP_LEVEL,
+                       fileobj=buf, mtime=0) as zfile:
+        zfile.write(data)
+    return buf.read()
+
+
+def gzip_stream(sequence, padded=False):
+    buf = StreamingBuffer()
+    with gzip.GzipFile(filename=_gzip_filename(padded), mode='wb', compresslevel=GZIP_LEVEL,
+                       fileobj=buf, mtime=0) as zfile:
+        yield buf.read()
+        for item in sequence:
+            zfile.write(item)
+            data = buf.read()
+            if data:
+                yield data
+    yield buf.read()
+
+
+def brotli_bytes(data):
+    return brotli.compress(data, quality=BROTLI_QUALITY)
+
+
+def brotli_stream(sequence):
+    compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+    for item in sequence:
+        data = compressor.process(item)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.min_size = getattr(settings, 'COMPRESSION_MIN_SIZE', DEFAULT_MIN_SIZE)
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        return self.process_response(request, response)
+
+    def process_response(self, request, response):
+        if request.method == 'HEAD' or response.status_code in (204, 304):
+            return response
+        if response.has_header('Content-Encoding') or getattr(response, 'breach_sensitive', False):
+            return response
+
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if content_type == 'text/event-stream' or not content_type.startswith(COMPRESSIBLE_TYPES):
+            return response
+        if not response.streaming and len(response.content) < self.min_size:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        # get_token() was called (CsrfViewMiddleware then (re)sets the cookie),
+        # so the CSRF token is likely in the body: gzip with a padded header
+        padded = settings.CSRF_COOKIE_NAME in response.cookies or bool(request.META.get('CSRF_COOKIE_USED'))
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''), allow_brotli=not padded)
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if encoding == 'br':
+                response.streaming_content = brotli_stream(response.streaming_content)
+            else:
+                response.streaming_content = gzip_stream(response.streaming_content, padded)
+            del response.headers['Content-Length']
+        else:
+            if encoding == 'br':
+                compressed = brotli_bytes(response.content)
+            else:
+                compressed = gzip_bytes(response.content, padded)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        # the representation changed, a strong validator has to become weak
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
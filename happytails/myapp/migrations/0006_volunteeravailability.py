@@ -0,0 +1,36 @@
+# Generated by Django 4.0.3 on 2026-10-19 05:16
+
+from django.conf import settings
+import django.contrib.postgres.fields.ranges
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('myapp', '0005_alter_visit_recommendation_activity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VolunteerAvailability',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('SH', 'Shift'), ('OF', 'Day off'), ('VC', 'Vacation')], default='SH', max_length=2)),
+                ('period', django.contrib.postgres.fields.ranges.DateTimeRangeField(help_text='Intervalul [început, sfârșit)')),
+                ('notes', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('volunteer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='availabilities', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Volunteer availabilities',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='volunteeravailability',
+            index=django.contrib.postgres.indexes.GistIndex(fields=['period'], name='availability_period_gist'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 4.0.3 on 2026-10-19 05:25
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('myapp', '0007_calendartoken'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='animal',
+            name='arrived_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='animal',
+            name='last_vaccination_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='animal',
+            name='last_vaccine',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='animal',
+            name='next_vaccination_due',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='animal',
+            name='provenance',
+            field=models.CharField(blank=True, max_length=200),
+        ),
+        migrations.CreateModel(
+            name='AnimalEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_type', models.CharField(choices=[('ARR', 'Arrival'), ('VAC', 'Vaccination'), ('MED', 'Medical'), ('BHV', 'Behavioral'), ('OTH', 'Other')], max_length=3)),
+                ('occurred_at', models.DateTimeField()),
+                ('title', models.CharField(max_length=200)),
+                ('details', models.TextField(blank=True)),
+                ('provenance', models.CharField(blank=True, help_text='De unde provine animalul', max_length=200)),
+                ('vaccine', models.CharField(blank=True, max_length=100)),
+                ('next_due_at', models.DateTimeField(blank=True, help_text='Următorul rapel', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('animal', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='myapp.animal')),
+                ('recorded_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='recorded_animal_events', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='animalevent',
+            index=models.Index(fields=['animal', 'occurred_at'], name='animalevent_timeline_idx'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 4.0.3 on 2026-10-19 05:26
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_schedule(apps, schema_editor):
+    """one row per (animal, vaccine) from the latest recorded vaccination"""
+    AnimalEvent = apps.get_model('myapp', 'AnimalEvent')
+    VaccinationSchedule = apps.get_model('myapp', 'VaccinationSchedule')
+
+    latest = {}
+    for event in AnimalEvent.objects.filter(event_type='VAC').exclude(vaccine='').order_by('occurred_at'):
+        latest[(event.animal_id, event.vaccine)] = event
+
+    VaccinationSchedule.objects.bulk_create([
+        VaccinationSchedule(
+            animal_id=animal_id,
+            vaccine=vaccine,
+            last_given_at=event.occurred_at,
+            next_due_at=event.next_due_at,
+            alert_pending=event.next_due_at is not None,
+        )
+        for (animal_id, vaccine), event in latest.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0008_animal_history'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VaccinationSchedule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('vaccine', models.CharField(max_length=100)),
+                ('last_given_at', models.DateTimeField()),
+                ('next_due_at', models.DateTimeField(blank=True, null=True)),
+                ('alert_pending', models.BooleanField(default=False)),
+                ('alerted_at', models.DateTimeField(blank=True, null=True)),
+                ('animal', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='vaccination_schedule', to='myapp.animal')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='vaccinationschedule',
+            index=models.Index(fields=['next_due_at'], name='vaccination_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vaccinationschedule',
+            index=models.Index(condition=models.Q(('alert_pending', True)), fields=['next_due_at'], name='vaccination_alert_pending_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='vaccinationschedule',
+            constraint=models.UniqueConstraint(fields=('animal', 'vaccine'), name='unique_animal_vaccine'),
+        ),
+        migrations.RunPython(backfill_schedule, migrations.RunPython.noop),
+    ]
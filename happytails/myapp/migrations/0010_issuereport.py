@@ -0,0 +1,45 @@
+# Generated by Django 4.0.3 on 2026-10-19 05:29
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.db.models.expressions
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('myapp', '0009_vaccinationschedule'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IssueReport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(choices=[('HL', 'Health'), ('BH', 'Behaviour'), ('IN', 'Incident'), ('OT', 'Other')], max_length=2)),
+                ('severity', models.PositiveSmallIntegerField(choices=[(1, 'Low'), (2, 'Medium'), (3, 'High'), (4, 'Urgent')], default=2)),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('notified_at', models.DateTimeField(blank=True, null=True)),
+                ('resolved_at', models.DateTimeField(blank=True, null=True)),
+                ('resolution_notes', models.TextField(blank=True)),
+                ('animal', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='issue_reports', to='myapp.animal')),
+                ('reporter', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='issue_reports', to=settings.AUTH_USER_MODEL)),
+                ('resolved_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='resolved_issue_reports', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='issuereport',
+            index=models.Index(django.db.models.expressions.OrderBy(django.db.models.expressions.F('severity'), descending=True), django.db.models.expressions.F('created_at'), condition=models.Q(('resolved_at__isnull', True)), name='issuereport_triage_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issuereport',
+            index=models.Index(fields=['reporter', '-created_at'], name='issuereport_reporter_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.0.3 on 2026-10-19 05:31
+
+from django.db import migrations, models
+import myapp.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0010_issuereport'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='animal',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=myapp.storage.animal_image_storage, upload_to='animals/'),
+        ),
+    ]
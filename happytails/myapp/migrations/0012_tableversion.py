@@ -0,0 +1,59 @@
+# Generated by Django 4.0.3 on 2026-10-19 05:35
+
+from django.db import migrations, models
+
+
+TRACKED_TABLES = [
+    'myapp_animal',
+    'myapp_animal_favorites',
+    'myapp_animalevent',
+    'myapp_adoption',
+    'myapp_visit',
+    'myapp_activity',
+    'myapp_activity_notified_volunteers',
+]
+
+BUMP_FUNCTION = """
+CREATE OR REPLACE FUNCTION myapp_bump_table_version() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO myapp_tableversion (name, version, changed_at)
+    VALUES (TG_TABLE_NAME, 1, clock_timestamp())
+    ON CONFLICT (name) DO UPDATE
+    SET version = myapp_tableversion.version + 1, changed_at = EXCLUDED.changed_at;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+CREATE_TRIGGERS = [
+    f"CREATE TRIGGER {table}_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table} "
+    f"FOR EACH STATEMENT EXECUTE FUNCTION myapp_bump_table_version();"
+    for table in TRACKED_TABLES
+]
+DROP_TRIGGERS = [f"DROP TRIGGER IF EXISTS {table}_version ON {table};" for table in TRACKED_TABLES]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0011_animal_image_storage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TableVersion',
+            fields=[
+                ('name', models.CharField(max_length=63, primary_key=True, serialize=False)),
+                ('version', models.BigIntegerField(default=0)),
+                ('changed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.RunSQL(
+            [BUMP_FUNCTION] + CREATE_TRIGGERS + [
+                "INSERT INTO myapp_tableversion (name, version, changed_at) VALUES %s;" % ", ".join(
+                    f"('{table}', 1, now())" for table in TRACKED_TABLES
+                ),
+            ],
+            DROP_TRIGGERS + ["DROP FUNCTION IF EXISTS myapp_bump_table_version();"],
+        ),
+    ]
@@ -0,0 +1,118 @@
+# Generated by Django 4.0.3 on 2026-10-19 05:38
+
+from django.db import migrations, models
+
+
+SYNCED_TABLES = ['myapp_animal', 'myapp_adoption', 'myapp_visit', 'myapp_activity']
+
+# change_seq is the id of the writing transaction: it only grows, and a sync
+# cursor taken from the snapshot xmin never skips a late-committing writer
+STAMP_FUNCTION = """
+CREATE OR REPLACE FUNCTION myapp_stamp_change() RETURNS trigger AS $$
+BEGIN
+    NEW.change_seq := txid_current();
+    IF TG_OP = 'UPDATE' AND NEW.updated_at IS NOT DISTINCT FROM OLD.updated_at THEN
+        -- bulk .update() calls do not go through auto_now
+        NEW.updated_at := now();
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+TOMBSTONE_FUNCTION = """
+CREATE OR REPLACE FUNCTION myapp_write_tombstone() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO myapp_tombstone (table_name, object_id, change_seq, deleted_at)
+    VALUES (TG_TABLE_NAME, OLD.id, txid_current(), now());
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+CREATE_TRIGGERS = []
+DROP_TRIGGERS = []
+for table in SYNCED_TABLES:
+    CREATE_TRIGGERS += [
+        f"CREATE TRIGGER {table}_stamp BEFORE INSERT OR UPDATE ON {table} "
+        f"FOR EACH ROW EXECUTE FUNCTION myapp_stamp_change();",
+        f"CREATE TRIGGER {table}_tombstone AFTER DELETE ON {table} "
+        f"FOR EACH ROW EXECUTE FUNCTION myapp_write_tombstone();",
+        # existing rows get a sequence through the trigger
+        f"UPDATE {table} SET change_seq = 0;",
+    ]
+    DROP_TRIGGERS += [
+        f"DROP TRIGGER IF EXISTS {table}_stamp ON {table};",
+        f"DROP TRIGGER IF EXISTS {table}_tombstone ON {table};",
+    ]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0012_tableversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('table_name', models.CharField(max_length=63)),
+                ('object_id', models.BigIntegerField()),
+                ('change_seq', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='activity',
+            name='change_seq',
+            field=models.BigIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='adoption',
+            name='change_seq',
+            field=models.BigIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='adoption',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AddField(
+            model_name='animal',
+            name='change_seq',
+            field=models.BigIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='animal',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AddField(
+            model_name='visit',
+            name='change_seq',
+            field=models.BigIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='visit',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='activity',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['table_name', 'change_seq'], name='tombstone_sync_idx'),
+        ),
+        migrations.RunSQL(
+            [STAMP_FUNCTION, TOMBSTONE_FUNCTION] + CREATE_TRIGGERS,
+            DROP_TRIGGERS + [
+                "DROP FUNCTION IF EXISTS myapp_stamp_change();",
+                "DROP FUNCTION IF EXISTS myapp_write_tombstone();",
+            ],
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.0.3 on 2026-10-19 05:51
+
+from django.db import migrations, models
+
+
+def cancel_duplicate_pending(apps, schema_editor):
+    """keep the oldest pending application per (user, animal), cancel the double submits"""
+    Adoption = apps.get_model('myapp', 'Adoption')
+
+    seen = set()
+    duplicates = []
+    for adoption_id, user_id, animal_id in (
+        Adoption.objects.filter(status='PD').order_by('application_date', 'id')
+        .values_list('id', 'user_id', 'animal_id')
+    ):
+        if (user_id, animal_id) in seen:
+            duplicates.append(adoption_id)
+        seen.add((user_id, animal_id))
+    Adoption.objects.filter(pk__in=duplicates).update(status='CN')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0013_change_tracking'),
+    ]
+
+    operations = [
+        migrations.RunPython(cancel_duplicate_pending, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='adoption',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'PD')), fields=('user', 'animal'), name='unique_pending_adoption'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.0.3 on 2026-10-19 05:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0014_unique_pending_adoption'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='visit',
+            name='scheduled_date',
+            field=models.DateTimeField(db_index=True),
+        ),
+    ]
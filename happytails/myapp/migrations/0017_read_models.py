@@ -0,0 +1,81 @@
+# Generated by Django 4.0.3 on 2026-10-19 06:00
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, Min, Q
+from django.db.models.functions import TruncDate
+
+
+READ_MODEL_TABLES = ['myapp_activitydaycount', 'myapp_animaltasksummary']
+
+# conditional GETs of the dashboard depend on the read models too
+# (myapp_bump_table_version comes from 0012_tableversion)
+CREATE_TRIGGERS = [
+    f"CREATE TRIGGER {table}_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table} "
+    f"FOR EACH STATEMENT EXECUTE FUNCTION myapp_bump_table_version();"
+    for table in READ_MODEL_TABLES
+]
+DROP_TRIGGERS = [f"DROP TRIGGER IF EXISTS {table}_version ON {table};" for table in READ_MODEL_TABLES]
+
+
+def populate(apps, schema_editor):
+    """same aggregates as myapp.services.read_models.rebuild()"""
+    Activity = apps.get_model('myapp', 'Activity')
+    ActivityDayCount = apps.get_model('myapp', 'ActivityDayCount')
+    AnimalTaskSummary = apps.get_model('myapp', 'AnimalTaskSummary')
+
+    ActivityDayCount.objects.bulk_create([
+        ActivityDayCount(**row)
+        for row in Activity.objects.annotate(day=TruncDate('scheduled_time'))
+        .values('day', 'assigned_to_id', 'activity_type', 'status')
+        .annotate(count=Count('id')).order_by()
+    ])
+    AnimalTaskSummary.objects.bulk_create([
+        AnimalTaskSummary(**row)
+        for row in Activity.objects.filter(status__in=['PD', 'AS', 'IP']).values('animal_id').annotate(
+            open_tasks=Count('id'),
+            unassigned_tasks=Count('id', filter=Q(assigned_to__isnull=True)),
+            urgent_tasks=Count('id', filter=Q(priority__in=['HG', 'UR'])),
+            next_deadline=Min('deadline'),
+        ).order_by()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('myapp', '0016_job_queue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnimalTaskSummary',
+            fields=[
+                ('animal', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='task_summary', serialize=False, to='myapp.animal')),
+                ('open_tasks', models.PositiveIntegerField(default=0)),
+                ('unassigned_tasks', models.PositiveIntegerField(default=0)),
+                ('urgent_tasks', models.PositiveIntegerField(default=0)),
+                ('next_deadline', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ActivityDayCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('activity_type', models.CharField(choices=[('WLK', 'Walk'), ('FED', 'Feed'), ('CLN', 'Cleaning'), ('BTH', 'Bath'), ('MED', 'Medication'), ('PLY', 'Play time'), ('TRN', 'Training'), ('OTH', 'Other')], max_length=3)),
+                ('status', models.CharField(choices=[('PD', 'Pending'), ('AS', 'Assigned'), ('IP', 'In Progress'), ('CM', 'Completed'), ('CN', 'Cancelled'), ('OV', 'Overdue')], max_length=2)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('assigned_to', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='activitydaycount',
+            index=models.Index(fields=['day', 'assigned_to'], name='activity_day_count_idx'),
+        ),
+        migrations.RunSQL(CREATE_TRIGGERS, DROP_TRIGGERS),
+        migrations.RunPython(populate, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,169 @@
+# Generated by Django 4.0.3 on 2026-10-19 06:05
+
+from django.db import migrations, models
+
+
+# myapp_activity becomes range partitioned by month on scheduled_time:
+# the rows are copied into a partitioned table created with the same columns,
+# then the primary key, foreign keys, indexes and triggers are rebuilt with
+# the names Django generated for them (they are deterministic).
+#
+# PostgreSQL requires the partition key in the primary key, so it becomes
+# (id, scheduled_time); ids stay unique through the sequence. A foreign key
+# needs a unique target, so the one from the notified volunteers through table
+# is dropped, Django deletes those rows itself when an activity is deleted.
+
+PARTITIONS_AHEAD = 3
+
+INDEXES = {
+    'myapp_activity_animal_id_77373850': 'animal_id',
+    'myapp_activity_assigned_to_id_9ff70ae7': 'assigned_to_id',
+    'myapp_activity_completed_by_id_6f815fcb': 'completed_by_id',
+    'myapp_activity_created_by_id_48db43ef': 'created_by_id',
+    'myapp_activity_updated_at_bdf2d548': 'updated_at',
+    'myapp_activity_change_seq_8ba900e1': 'change_seq',
+}
+FOREIGN_KEYS = {
+    'myapp_activity_animal_id_77373850_fk_myapp_animal_id': ('animal_id', 'myapp_animal'),
+    'myapp_activity_assigned_to_id_9ff70ae7_fk_auth_user_id': ('assigned_to_id', 'auth_user'),
+    'myapp_activity_completed_by_id_6f815fcb_fk_auth_user_id': ('completed_by_id', 'auth_user'),
+    'myapp_activity_created_by_id_48db43ef_fk_auth_user_id': ('created_by_id', 'auth_user'),
+}
+THROUGH_FOREIGN_KEY = 'myapp_activity_notif_activity_id_af01a6cb_fk_myapp_act'
+
+DROP_THROUGH_FOREIGN_KEY = """
+DO $$
+DECLARE
+    fk text;
+BEGIN
+    SELECT conname INTO fk FROM pg_constraint
+    WHERE conrelid = 'myapp_activity_notified_volunteers'::regclass AND confrelid = 'myapp_activity'::regclass;
+    IF fk IS NOT NULL THEN
+        EXECUTE format('ALTER TABLE myapp_activity_notified_volunteers DROP CONSTRAINT %I', fk);
+    END IF;
+END $$;
+"""
+
+# one partition per month (UTC) from the oldest activity to PARTITIONS_AHEAD
+# months from now, and a default partition for anything scheduled further
+CREATE_PARTITIONS = [f"""
+DO $$
+DECLARE
+    month timestamp := date_trunc('month', COALESCE(
+        (SELECT min(scheduled_time) FROM myapp_activity_old), now()) AT TIME ZONE 'UTC');
+    last_month timestamp := date_trunc('month', now() AT TIME ZONE 'UTC') + interval '{PARTITIONS_AHEAD} months';
+BEGIN
+    WHILE month <= last_month LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF myapp_activity FOR VALUES FROM (%L) TO (%L)',
+            'myapp_activity_p' || to_char(month, 'YYYY_MM'),
+            month AT TIME ZONE 'UTC',
+            (month + interval '1 month') AT TIME ZONE 'UTC'
+        );
+        month := month + interval '1 month';
+    END LOOP;
+END $$;
+""", "CREATE TABLE myapp_activity_default PARTITION OF myapp_activity DEFAULT;"]
+
+# as in 0013, plus: on a partitioned table the trigger runs on the partition
+# and gets the parent's name as argument; a row an UPDATE of scheduled_time
+# moved to another partition was not deleted; moves between partitions done
+# by `manage.py activity_partitions` set myapp.moving_rows
+TOMBSTONE_FUNCTION = """
+CREATE OR REPLACE FUNCTION myapp_write_tombstone() RETURNS trigger AS $$
+DECLARE
+    target text := TG_TABLE_NAME;
+    moved boolean;
+BEGIN
+    IF current_setting('myapp.moving_rows', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+    IF TG_NARGS > 0 THEN
+        target := TG_ARGV[0];
+        EXECUTE format('SELECT EXISTS (SELECT 1 FROM %I WHERE id = $1)', target) INTO moved USING OLD.id;
+        IF moved THEN
+            RETURN NULL;
+        END IF;
+    END IF;
+    INSERT INTO myapp_tombstone (table_name, object_id, change_seq, deleted_at)
+    VALUES (target, OLD.id, txid_current(), now());
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+ORIGINAL_TOMBSTONE_FUNCTION = """
+CREATE OR REPLACE FUNCTION myapp_write_tombstone() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO myapp_tombstone (table_name, object_id, change_seq, deleted_at)
+    VALUES (TG_TABLE_NAME, OLD.id, txid_current(), now());
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def rebuild_table(partitioned):
+    """statements that copy myapp_activity into a new (partitioned or plain) table"""
+    statements = [
+        "ALTER TABLE myapp_activity RENAME TO myapp_activity_old;",
+        "CREATE TABLE myapp_activity (LIKE myapp_activity_old INCLUDING DEFAULTS)%s;" % (
+            " PARTITION BY RANGE (scheduled_time)" if partitioned else ""
+        ),
+        "ALTER SEQUENCE myapp_activity_id_seq OWNED BY myapp_activity.id;",
+    ]
+    if partitioned:
+        statements += CREATE_PARTITIONS
+    statements += [
+        "INSERT INTO myapp_activity SELECT * FROM myapp_activity_old;",
+        "DROP TABLE myapp_activity_old;",
+        "ALTER TABLE myapp_activity ADD CONSTRAINT myapp_activity_pkey PRIMARY KEY (%s);" % (
+            "id, scheduled_time" if partitioned else "id"
+        ),
+    ]
+    statements += [
+        f"ALTER TABLE myapp_activity ADD CONSTRAINT {name} FOREIGN KEY ({column}) "
+        f"REFERENCES {target} (id) DEFERRABLE INITIALLY DEFERRED;"
+        for name, (column, target) in FOREIGN_KEYS.items()
+    ]
+    statements += [f"CREATE INDEX {name} ON myapp_activity ({column});" for name, column in INDEXES.items()]
+    statements += [
+        "CREATE TRIGGER myapp_activity_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON myapp_activity "
+        "FOR EACH STATEMENT EXECUTE FUNCTION myapp_bump_table_version();",
+        "CREATE TRIGGER myapp_activity_stamp BEFORE INSERT OR UPDATE ON myapp_activity "
+        "FOR EACH ROW EXECUTE FUNCTION myapp_stamp_change();",
+        "CREATE TRIGGER myapp_activity_tombstone AFTER DELETE ON myapp_activity "
+        "FOR EACH ROW EXECUTE FUNCTION myapp_write_tombstone(%s);" % ("'myapp_activity'" if partitioned else ""),
+    ]
+    return statements
+
+
+PARTITION = [DROP_THROUGH_FOREIGN_KEY, TOMBSTONE_FUNCTION] + rebuild_table(partitioned=True)
+UNPARTITION = rebuild_table(partitioned=False) + [
+    ORIGINAL_TOMBSTONE_FUNCTION,
+    f"ALTER TABLE myapp_activity_notified_volunteers ADD CONSTRAINT {THROUGH_FOREIGN_KEY} "
+    f"FOREIGN KEY (activity_id) REFERENCES myapp_activity (id) DEFERRABLE INITIALLY DEFERRED;",
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0017_read_models'),
+    ]
+
+    operations = [
+        migrations.RunSQL(PARTITION, UNPARTITION),
+        migrations.AlterModelOptions(
+            name='activity',
+            options={'verbose_name_plural': 'Activities'},
+        ),
+        migrations.AddIndex(
+            model_name='activity',
+            index=models.Index(fields=['scheduled_time'], name='activity_scheduled_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='activity',
+            index=models.Index(condition=models.Q(('status__in', ['PD', 'AS', 'IP'])), fields=['deadline'], name='activity_open_idx'),
+        ),
+    ]
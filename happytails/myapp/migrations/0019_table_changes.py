@@ -0,0 +1,69 @@
+# Generated by Django 4.0.3 on 2026-10-19 06:20
+
+from django.db import migrations, models
+
+
+# the statement triggers of 0012, 0017 and 0018 keep calling
+# myapp_bump_table_version(); it now logs the writing transaction instead of
+# incrementing a shared row, which held a row lock until commit and queued
+# every concurrent writer of the table behind it
+LOG_FUNCTION = """
+CREATE OR REPLACE FUNCTION myapp_bump_table_version() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO myapp_tablechange (table_name, change_seq)
+    VALUES (TG_TABLE_NAME, txid_current())
+    ON CONFLICT DO NOTHING;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+COUNTER_FUNCTION = """
+CREATE OR REPLACE FUNCTION myapp_bump_table_version() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO myapp_tableversion (name, version, changed_at)
+    VALUES (TG_TABLE_NAME, 1, clock_timestamp())
+    ON CONFLICT (name) DO UPDATE
+    SET version = myapp_tableversion.version + 1, changed_at = EXCLUDED.changed_at;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0018_partition_activity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TableChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('table_name', models.CharField(max_length=63)),
+                ('change_seq', models.BigIntegerField()),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='tablechange',
+            constraint=models.UniqueConstraint(fields=('table_name', 'change_seq'), name='table_change_unique'),
+        ),
+        migrations.RunSQL(
+            [
+                LOG_FUNCTION,
+                # every ETag handed out so far changes once
+                "INSERT INTO myapp_tablechange (table_name, change_seq) "
+                "SELECT name, txid_current() FROM myapp_tableversion;",
+            ],
+            [
+                COUNTER_FUNCTION,
+                "INSERT INTO myapp_tableversion (name, version, changed_at) "
+                "SELECT DISTINCT table_name, 1, now() FROM myapp_tablechange;",
+            ],
+        ),
+        migrations.DeleteModel(
+            name='TableVersion',
+        ),
+    ]
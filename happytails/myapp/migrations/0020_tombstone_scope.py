@@ -0,0 +1,75 @@
+# Generated by Django 4.0.3 on 2026-10-19 06:27
+
+from django.db import migrations, models
+
+
+# an UPDATE can take a row out of a caller's view without deleting it; these
+# triggers leave a scoped tombstone for exactly those updates, so a sync
+# does not have to look at every row changed by anyone
+#
+# TG_ARGV: the table (partitions report the parent), then the scope: either
+# fixed ('role:volunteer', NULL for everyone) or 'user' followed by the column
+# holding the user who lost the row
+HIDE_FUNCTION = """
+CREATE OR REPLACE FUNCTION myapp_write_scoped_tombstone() RETURNS trigger AS $$
+DECLARE
+    scope text := NULLIF(TG_ARGV[1], '');
+BEGIN
+    IF scope = 'user' THEN
+        scope := 'user:' || (to_jsonb(OLD) ->> TG_ARGV[2]);
+    END IF;
+    INSERT INTO myapp_tombstone (table_name, object_id, change_seq, deleted_at, scope)
+    VALUES (TG_ARGV[0], OLD.id, txid_current(), now(), scope);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+# (trigger, table, condition, arguments)
+TRIGGERS = [
+    # reassigned: the previous assignee
+    ('myapp_activity_left_assignee', 'myapp_activity',
+     "OLD.assigned_to_id IS NOT NULL AND OLD.assigned_to_id IS DISTINCT FROM NEW.assigned_to_id",
+     "'myapp_activity', 'user', 'assigned_to_id'"),
+    # taken: no longer on the pending list of the other volunteers
+    ('myapp_activity_left_pending', 'myapp_activity',
+     "OLD.status = 'PD' AND NEW.status <> 'PD'",
+     "'myapp_activity', 'role:volunteer'"),
+    ('myapp_visit_left_volunteer', 'myapp_visit',
+     "OLD.volunteer_id IS NOT NULL AND OLD.volunteer_id IS DISTINCT FROM NEW.volunteer_id",
+     "'myapp_visit', 'user', 'volunteer_id'"),
+    # adopted or back from adoption: the lists filter on status
+    ('myapp_animal_left_status', 'myapp_animal',
+     "OLD.status IS DISTINCT FROM NEW.status",
+     "'myapp_animal', ''"),
+]
+
+CREATE_TRIGGERS = [
+    f"CREATE TRIGGER {name} AFTER UPDATE ON {table} FOR EACH ROW WHEN ({condition}) "
+    f"EXECUTE FUNCTION myapp_write_scoped_tombstone({arguments});"
+    for name, table, condition, arguments in TRIGGERS
+]
+DROP_TRIGGERS = [f"DROP TRIGGER IF EXISTS {name} ON {table};" for name, table, _, _ in TRIGGERS]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0019_table_changes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tombstone',
+            name='scope',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.RunSQL(
+            [HIDE_FUNCTION] + CREATE_TRIGGERS,
+            DROP_TRIGGERS + [
+                "DROP FUNCTION IF EXISTS myapp_write_scoped_tombstone();",
+                # scoped tombstones would read as deletions without their scope
+                "DELETE FROM myapp_tombstone WHERE scope IS NOT NULL;",
+            ],
+        ),
+    ]
@@ -1,5 +1,11 @@
+from datetime import datetime, time, timedelta
 from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
 from django.contrib.auth.models import User 
+from django.contrib.postgres.fields import DateTimeRangeField
+from django.contrib.postgres.indexes import GistIndex
+from myapp.storage import animal_image_storage
 
 # Model existent
 class Animal(models.Model):
@@ -20,7 +26,7 @@ class Animal(models.Model):
     age = models.CharField(max_length=100)
     size = models.CharField(max_length=1, choices=ANIMAL_SIZES)
     story = models.CharField(max_length=500)
-    image = models.ImageField(upload_to='animals/', blank=True, null=True)
+    image = models.ImageField(upload_to='animals/', storage=animal_image_storage, blank=True, null=True)
     status = models.CharField(
         max_length=2,
         choices=ADOPTION_STATUSES,
@@ -28,6 +34,17 @@ class Animal(models.Model):
     )
     favorites = models.ManyToManyField(User, related_name='favorite_animals', blank=True)
 
+    # history snapshot, maintained when AnimalEvent rows are recorded
+    arrived_at = models.DateTimeField(null=True, blank=True)
+    provenance = models.CharField(max_length=200, blank=True)
+    last_vaccination_at = models.DateTimeField(null=True, blank=True)
+    last_vaccine = models.CharField(max_length=100, blank=True)
+    next_vaccination_due = models.DateTimeField(null=True, blank=True)
+
+    # change tracking for incremental sync, stamped by a database trigger
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    change_seq = models.BigIntegerField(default=0, db_index=True, editable=False)
+
 
 class Adoption(models.Model):
     STATUS_CHOICES = (
@@ -65,8 +82,20 @@ class Adoption(models.Model):
     # finalize
     finalized_at = models.DateTimeField(null=True, blank=True)
     
+    # change tracking for incremental sync, stamped by a database trigger
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    change_seq = models.BigIntegerField(default=0, db_index=True, editable=False)
+    
     class Meta:
         ordering = ['-application_date']
+        constraints = [
+            # one open application per client and animal, enforced on insert
+            models.UniqueConstraint(
+                fields=['user', 'animal'],
+                condition=models.Q(status='PD'),
+                name='unique_pending_adoption'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.animal.name} ({self.get_status_display()})"
@@ -85,7 +114,7 @@ class Visit(models.Model):
     volunteer = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='volunteer_visits')
     
     # schedule
-    scheduled_date = models.DateTimeField()
+    scheduled_date = models.DateTimeField(db_index=True)
     scheduled_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='scheduled_visits')
     created_at = models.DateTimeField(auto_now_add=True)
     
@@ -111,6 +140,10 @@ class Visit(models.Model):
     # notes
     notes = models.TextField(blank=True)
     
+    # change tracking for incremental sync, stamped by a database trigger
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    change_seq = models.BigIntegerField(default=0, db_index=True, editable=False)
+    
     class Meta:
         ordering = ['-scheduled_date']
     
@@ -118,6 +151,19 @@ class Visit(models.Model):
         return f"Visit {self.id} - {self.adoption.animal.name} ({self.get_status_display()})"
     
 
+class ActivityQuerySet(models.QuerySet):
+    """filters on scheduled_time are written as ranges: myapp_activity is
+    partitioned by month on it and PostgreSQL then only scans the partitions
+    the range overlaps"""
+
+    def scheduled_on(self, day):
+        day_start = timezone.make_aware(datetime.combine(day, time.min))
+        return self.filter(scheduled_time__gte=day_start, scheduled_time__lt=day_start + timedelta(days=1))
+
+    def open(self):
+        return self.filter(status__in=Activity.OPEN_STATUSES)
+
+
 class Activity(models.Model):
     ACTIVITY_TYPES = (
         ('WLK', 'Walk'),
@@ -146,6 +192,8 @@ class Activity(models.Model):
         ('UR', 'Urgent'),
     )
     
+    OPEN_STATUSES = ['PD', 'AS', 'IP']
+    
     # info 
     animal = models.ForeignKey(Animal, on_delete=models.CASCADE, related_name='activities')
     activity_type = models.CharField(max_length=3, choices=ACTIVITY_TYPES)
@@ -190,7 +238,8 @@ class Activity(models.Model):
         related_name='created_activities'
     )
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    change_seq = models.BigIntegerField(default=0, db_index=True, editable=False)
     
     # inspired by "be my eyes"
     notification_round = models.IntegerField(default=0, help_text="Notifications round (0=none, 1-3=rounds)")
@@ -213,13 +262,341 @@ class Activity(models.Model):
         )
     )
     
+    objects = ActivityQuerySet.as_manager()
+    
+    # the table is range partitioned by month on scheduled_time (migration
+    # 0018, `manage.py activity_partitions`); its primary key is
+    # (id, scheduled_time) in the database, ids stay unique through the sequence
     class Meta:
-        ordering = ['deadline', '-priority']
         verbose_name_plural = 'Activities'
+        indexes = [
+            models.Index(fields=['scheduled_time'], name='activity_scheduled_idx'),
+            # open tasks are a small, shrinking part of each partition
+            models.Index(fields=['deadline'], condition=models.Q(status__in=['PD', 'AS', 'IP']), name='activity_open_idx'),
+        ]
     
     def __str__(self):
         return f"{self.get_activity_type_display()} - {self.animal.name} ({self.get_status_display()})"
     
-    def is_overdue(self):
-        from django.utils import timezone
-        return self.status in ['PD', 'AS', 'IP'] and self.deadline < timezone.now()
\ No newline at end of file
+    def is_overdue(self, now=None):
+        return self.status in self.OPEN_STATUSES and self.deadline < (now or timezone.now())
+
+
+class VolunteerAvailability(models.Model):
+    AVAILABILITY_TYPES = (
+        ('SH', 'Shift'),
+        ('OF', 'Day off'),
+        ('VC', 'Vacation'),
+    )
+
+    volunteer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='availabilities')
+    kind = models.CharField(max_length=2, choices=AVAILABILITY_TYPES, default='SH')
+
+    # [start, end) interval - the GiST index answers "who is on shift at T"
+    # without walking the whole shift history
+    period = DateTimeRangeField(help_text="Intervalul [început, sfârșit)")
+    notes = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name_plural = 'Volunteer availabilities'
+        indexes = [
+            GistIndex(fields=['period'], name='availability_period_gist'),
+        ]
+
+    def __str__(self):
+        return f"{self.volunteer.username} - {self.get_kind_display()} ({self.period.lower:%Y-%m-%d %H:%M})"
+
+
+
+class CalendarToken(models.Model):
+    """secret token in the personal iCalendar feed URL (calendar apps can't log in)"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='calendar_token')
+    token = models.CharField(max_length=64, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.user.username} - calendar feed"
+
+    @classmethod
+    def issue(cls, user, rotate=False):
+        import secrets
+        calendar_token, created = cls.objects.get_or_create(
+            user=user,
+            defaults={'token': secrets.token_urlsafe(32)}
+        )
+        if rotate and not created:
+            calendar_token.token = secrets.token_urlsafe(32)
+            calendar_token.save(update_fields=['token'])
+        return calendar_token
+
+
+
+class AnimalEventQuerySet(models.QuerySet):
+    # deleting the animal (or the recorder) still cascades: the collector
+    # deletes and nulls related rows with SQL of its own, not through here
+    def update(self, **kwargs):
+        raise TypeError("Animal events are append-only")
+
+    def delete(self):
+        raise TypeError("Animal events are append-only")
+
+
+class AnimalEvent(models.Model):
+    """append-only entry in an animal's history (arrival, vaccinations, medical, behavior)"""
+    EVENT_TYPES = (
+        ('ARR', 'Arrival'),
+        ('VAC', 'Vaccination'),
+        ('MED', 'Medical'),
+        ('BHV', 'Behavioral'),
+        ('OTH', 'Other'),
+    )
+
+    animal = models.ForeignKey(Animal, on_delete=models.CASCADE, related_name='events')
+    event_type = models.CharField(max_length=3, choices=EVENT_TYPES)
+    occurred_at = models.DateTimeField()
+    title = models.CharField(max_length=200)
+    details = models.TextField(blank=True)
+
+    # arrival
+    provenance = models.CharField(max_length=200, blank=True, help_text="De unde provine animalul")
+
+    # vaccination
+    vaccine = models.CharField(max_length=100, blank=True)
+    next_due_at = models.DateTimeField(null=True, blank=True, help_text="Următorul rapel")
+
+    recorded_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='recorded_animal_events'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = AnimalEventQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['animal', 'occurred_at'], name='animalevent_timeline_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.animal.name} - {self.get_event_type_display()} ({self.occurred_at:%Y-%m-%d})"
+
+    def save(self, *args, **kwargs):
+        if self.pk is not None:
+            raise TypeError("Animal events are append-only")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise TypeError("Animal events are append-only")
+
+
+
+class VaccinationSchedule(models.Model):
+    """next due date per animal and vaccine, kept current as vaccinations are recorded"""
+    animal = models.ForeignKey(Animal, on_delete=models.CASCADE, related_name='vaccination_schedule')
+    vaccine = models.CharField(max_length=100)
+    last_given_at = models.DateTimeField()
+    next_due_at = models.DateTimeField(null=True, blank=True)
+
+    # set when next_due_at changes, cleared once the alert went out
+    alert_pending = models.BooleanField(default=False)
+    alerted_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['animal', 'vaccine'], name='unique_animal_vaccine'),
+        ]
+        indexes = [
+            models.Index(fields=['next_due_at'], name='vaccination_due_idx'),
+            models.Index(
+                fields=['next_due_at'],
+                name='vaccination_alert_pending_idx',
+                condition=models.Q(alert_pending=True)
+            ),
+        ]
+
+    def __str__(self):
+        due = f"{self.next_due_at:%Y-%m-%d}" if self.next_due_at else "-"
+        return f"{self.animal.name} - {self.vaccine} (due {due})"
+
+
+class IssueReport(models.Model):
+    CATEGORIES = (
+        ('HL', 'Health'),
+        ('BH', 'Behaviour'),
+        ('IN', 'Incident'),
+        ('OT', 'Other'),
+    )
+
+    # integers so the triage queue can order on the column directly
+    SEVERITY_LOW = 1
+    SEVERITY_MEDIUM = 2
+    SEVERITY_HIGH = 3
+    SEVERITY_URGENT = 4
+    SEVERITY_CHOICES = (
+        (SEVERITY_LOW, 'Low'),
+        (SEVERITY_MEDIUM, 'Medium'),
+        (SEVERITY_HIGH, 'High'),
+        (SEVERITY_URGENT, 'Urgent'),
+    )
+
+    reporter = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='issue_reports')
+    animal = models.ForeignKey(
+        Animal,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='issue_reports'
+    )
+    category = models.CharField(max_length=2, choices=CATEGORIES)
+    severity = models.PositiveSmallIntegerField(choices=SEVERITY_CHOICES, default=SEVERITY_MEDIUM)
+    title = models.CharField(max_length=200)
+    description = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    # admins are notified right away for urgent reports, in the periodic digest otherwise
+    notified_at = models.DateTimeField(null=True, blank=True)
+
+    # resolution
+    resolved_at = models.DateTimeField(null=True, blank=True)
+    resolved_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='resolved_issue_reports'
+    )
+    resolution_notes = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # triage queue: only the open reports, most severe and oldest first
+            models.Index(
+                models.F('severity').desc(), 'created_at',
+                name='issuereport_triage_idx',
+                condition=models.Q(resolved_at__isnull=True)
+            ),
+            models.Index(fields=['reporter', '-created_at'], name='issuereport_reporter_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_severity_display()} - {self.title}"
+
+    @property
+    def is_urgent(self):
+        return self.severity == self.SEVERITY_URGENT
+
+
+class TableChange(models.Model):
+    """the transactions that wrote to a tracked table, logged by a database
+    trigger on every write statement (bulk .update() included); conditional
+    GETs compare against the latest one per table"""
+    table_name = models.CharField(max_length=63)
+    change_seq = models.BigIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['table_name', 'change_seq'], name='table_change_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.table_name} @{self.change_seq}"
+
+
+class Tombstone(models.Model):
+    """deleted rows of the synced tables, written by a database trigger so
+    `?since=` clients can drop them; with a scope, the row only left the
+    view of those callers (`user:<id>`, `role:<role>`)"""
+    table_name = models.CharField(max_length=63)
+    object_id = models.BigIntegerField()
+    change_seq = models.BigIntegerField()
+    scope = models.CharField(max_length=100, null=True, blank=True)
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['table_name', 'change_seq'], name='tombstone_sync_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.table_name} #{self.object_id}"
+
+
+class Job(models.Model):
+    """background work, claimed by `manage.py run_jobs` workers (see myapp.jobs)"""
+    STATUS_CHOICES = (
+        ('QD', 'Queued'),
+        ('RN', 'Running'),
+        ('DN', 'Done'),
+        ('FL', 'Failed'),
+    )
+
+    queue = models.CharField(max_length=50, default='default')
+    task = models.CharField(max_length=200)
+    kwargs = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    priority = models.SmallIntegerField(default=0, help_text="Lower runs first")
+    status = models.CharField(max_length=2, choices=STATUS_CHOICES, default='QD')
+    run_at = models.DateTimeField(default=timezone.now)
+
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    last_error = models.TextField(blank=True)
+
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # what a worker scans when claiming: only the queued rows, in claim order
+            models.Index(
+                fields=['queue', 'priority', 'run_at'],
+                condition=models.Q(status='QD'),
+                name='job_claim_idx'
+            ),
+            models.Index(
+                fields=['queue', 'locked_at'],
+                condition=models.Q(status='RN'),
+                name='job_running_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.task} [{self.queue}] ({self.get_status_display()})"
+
+
+class ActivityDayCount(models.Model):
+    """read model: activities per scheduled day, assignee, type and status,
+    kept current by the domain event handlers (see myapp.services.read_models)"""
+    day = models.DateField()
+    assigned_to = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    activity_type = models.CharField(max_length=3, choices=Activity.ACTIVITY_TYPES)
+    status = models.CharField(max_length=2, choices=Activity.STATUS_CHOICES)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['day', 'assigned_to'], name='activity_day_count_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.assigned_to_id or '-'} {self.activity_type}/{self.status}: {self.count}"
+
+
+class AnimalTaskSummary(models.Model):
+    """read model: open (pending, assigned, in progress) activities of an animal;
+    animals without open activities have no row"""
+    animal = models.OneToOneField(Animal, on_delete=models.CASCADE, primary_key=True, related_name='task_summary')
+    open_tasks = models.PositiveIntegerField(default=0)
+    unassigned_tasks = models.PositiveIntegerField(default=0)
+    urgent_tasks = models.PositiveIntegerField(default=0)
+    next_deadline = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.animal_id}: {self.open_tasks} open"
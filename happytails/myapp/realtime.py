@@ -0,0 +1,207 @@
+"""
+Live updates for dashboards: small events published on channels
+(`user:<id>`, `role:<role>`) that the SSE endpoint (myapp.sse) streams to
+the subscribed clients. Activity, visit and adoption transitions reach this
+module as domain events (see myapp.handlers).
+
+The broker is pluggable through settings.REALTIME_BROKER. The default
+PostgresBroker carries every event over PostgreSQL NOTIFY, so events
+published by a job worker or another ASGI process reach the clients of every
+web process. InProcessBroker only reaches clients connected to the process
+that published, which is enough for a single `runserver`.
+"""
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+from django.utils.module_loading import import_string
+from rest_framework.utils.encoders import JSONEncoder
+
+
+logger = logging.getLogger(__name__)
+
+
+class InProcessBroker:
+    """fan-out to asyncio queues living in this process"""
+
+    queue_size = 100
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def subscribe(self, channels):
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        subscription = (loop, queue)
+        with self._lock:
+            for channel in channels:
+                self._subscribers.setdefault(channel, set()).add(subscription)
+        return queue
+
+    def unsubscribe(self, channels, queue):
+        with self._lock:
+            for channel in channels:
+                subscribers = self._subscribers.get(channel, set())
+                subscribers.difference_update({s for s in subscribers if s[1] is queue})
+                if not subscribers:
+                    self._subscribers.pop(channel, None)
+
+    def publish(self, channels, message):
+        with self._lock:
+            targets = set()
+            for channel in channels:
+                targets.update(self._subscribers.get(channel, ()))
+
+        # publishers are sync views running in worker threads
+        for loop, queue in targets:
+            loop.call_soon_threadsafe(_deliver, queue, message)
+        return len(targets)
+
+
+class PostgresBroker(InProcessBroker):
+    """InProcessBroker fed by LISTEN on a channel every process publishes to with NOTIFY
+
+    A process starts listening with its first subscriber, on a dedicated
+    connection in a background thread.
+    """
+
+    notify_channel = 'myapp_realtime'
+    reconnect_seconds = 5
+
+    def __init__(self):
+        super().__init__()
+        self._listener = None
+
+    def subscribe(self, channels):
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(target=self._listen, name='realtime-listener', daemon=True)
+                self._listener.start()
+        return super().subscribe(channels)
+
+    def publish(self, channels, message):
+        payload = json.dumps({'channels': channels, 'message': message})
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_notify(%s, %s)", [self.notify_channel, payload])
+        except Exception:
+            # live updates are best effort, see the module docstring
+            logger.exception("could not publish a realtime event")
+        return None
+
+    def _listen(self):
+        while True:
+            listener = connections.create_connection(DEFAULT_DB_ALIAS)
+            try:
+                listener.ensure_connection()
+                listener.set_autocommit(True)
+                raw = listener.connection
+                with listener.cursor() as cursor:
+                    cursor.execute(f"LISTEN {self.notify_channel}")
+                while True:
+                    if select.select([raw], [], [], 60) == ([], [], []):
+                        continue
+                    raw.poll()
+                    while raw.notifies:
+                        notify = raw.notifies.pop(0)
+                        event = json.loads(notify.payload)
+                        super().publish(event['channels'], event['message'])
+            except Exception:
+                logger.exception("realtime listener lost its connection, reconnecting")
+            finally:
+                listener.close()
+            time.sleep(self.reconnect_seconds)
+
+
+def _deliver(queue, message):
+    try:
+        queue.put_nowait(message)
+    except asyncio.QueueFull:
+        # slow client: drop the event, the next dashboard refresh catches up
+        pass
+
+
+_broker = None
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        broker_path = getattr(settings, 'REALTIME_BROKER', 'myapp.realtime.PostgresBroker')
+        _broker = import_string(broker_path)()
+    return _broker
+
+
+def publish(channels, event, data):
+    """send `event` to the given channels once the current transaction commits"""
+    message = f"event: {event}\ndata: {json.dumps(data, cls=JSONEncoder)}\n\n"
+    transaction.on_commit(lambda: get_broker().publish(list(channels), message))
+
+
+def activity_event(activity, event):
+    """activity.created / accepted / started / completed -> the assignee, the volunteers and the admins"""
+    channels = {'role:admin'}
+    if activity.assigned_to_id:
+        channels.add(f'user:{activity.assigned_to_id}')
+    if event in ('activity.created', 'activity.accepted') or activity.notification_round:
+        # offers appear / disappear on every volunteer dashboard
+        channels.add('role:volunteer')
+
+    publish(channels, event, {
+        'id': activity.id,
+        'title': activity.title,
+        'animal_id': activity.animal_id,
+        'status': activity.status,
+        'priority': activity.priority,
+        'assigned_to': activity.assigned_to_id,
+        'deadline': activity.deadline,
+    })
+
+
+def visit_event(visit, event):
+    """visit.confirmed ... -> the volunteer, the client and the admins"""
+    channels = {'role:admin', f'user:{visit.adoption.user_id}'}
+    if visit.volunteer_id:
+        channels.add(f'user:{visit.volunteer_id}')
+
+    publish(channels, event, {
+        'id': visit.id,
+        'adoption': visit.adoption_id,
+        'status': visit.status,
+        'volunteer': visit.volunteer_id,
+        'scheduled_date': visit.scheduled_date,
+    })
+
+
+def adoption_event(adoption, event):
+    """adoption.approved / rejected / finalized -> the applicant and the admins"""
+    publish({'role:admin', f'user:{adoption.user_id}'}, event, {
+        'id': adoption.id,
+        'animal_id': adoption.animal_id,
+        'status': adoption.status,
+        'reviewed_at': adoption.reviewed_at,
+        'finalized_at': adoption.finalized_at,
+    })
+
+
+def report_event(report, event):
+    """report.urgent / report.resolved -> the admins (urgent ones also reach the volunteers) and the reporter"""
+    channels = {'role:admin'}
+    if report.reporter_id:
+        channels.add(f'user:{report.reporter_id}')
+    if event == 'report.urgent':
+        channels.add('role:volunteer')
+
+    publish(channels, event, {
+        'id': report.id,
+        'title': report.title,
+        'animal_id': report.animal_id,
+        'category': report.category,
+        'severity': report.severity,
+        'resolved_at': report.resolved_at,
+    })
@@ -0,0 +1,41 @@
+"""
+Fast JSON rendering for the API.
+
+FastJSONRenderer encodes with orjson when it is installed and produces the
+same bytes as DRF's compact JSONRenderer (datetimes as ISO 8601 with `Z`
+for UTC, U+2028/U+2029 escaped). Anything orjson cannot encode natively
+goes through DRF's encoder, and without orjson the renderer is the plain
+JSONRenderer.
+"""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+_fallback_encoder = JSONEncoder()
+
+ORJSON_OPTIONS = (orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+
+class FastJSONRenderer(JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or not self.compact or self.ensure_ascii:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # ?indent / "application/json; indent=4" -> human readable, stdlib path
+        if self.get_indent(accepted_media_type or '', renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=_fallback_encoder.default, option=ORJSON_OPTIONS)
+        except (orjson.JSONEncodeError, TypeError):
+            # ints over 64 bits, exotic keys...
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # same escaping as JSONRenderer: these are valid JSON but not valid javascript
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
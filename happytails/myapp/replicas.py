@@ -0,0 +1,141 @@
+"""
+Read replicas.
+
+settings.DATABASE_REPLICAS names database aliases that are streaming
+replicas of `default`. Reads go to one of them only when a request asks for
+it: the GET actions a viewset lists in `replica_actions` (lists, details,
+dashboards and stats). Everything else stays on the primary, and so do:
+
+- writes, and every read made inside a transaction on the primary;
+- sessions, which decide the routing and must never lag;
+- sessions that wrote less than settings.REPLICA_STICKY_SECONDS ago, so a
+  client reads its own writes while the replicas catch up.
+
+The routing state of a request lives in a context variable set by
+ReplicaRoutingMiddleware, so code outside requests (jobs, commands) always
+uses the primary. routing_stats() counts the router's decisions per process;
+`manage.py bench_replicas` measures the statements moved off the primary.
+"""
+import random
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+PIN_SESSION_KEY = '_db_primary_until'
+DEFAULT_STICKY_SECONDS = 10
+# models read from the primary even in a replica request
+PRIMARY_APPS = ('sessions',)
+
+_route = ContextVar('db_route', default=None)
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+class _Route:
+    __slots__ = ('replica', 'wrote')
+
+    def __init__(self):
+        self.replica = None
+        self.wrote = False
+
+
+def replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+def sticky_seconds():
+    return getattr(settings, 'REPLICA_STICKY_SECONDS', DEFAULT_STICKY_SECONDS)
+
+
+def _count(key):
+    with _stats_lock:
+        _stats[key] += 1
+
+
+def routing_stats():
+    """{'read:<alias>': n, 'write': n, 'requests:replica': n, 'requests:pinned': n} since the process started"""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def use_replica(request):
+    """route the rest of this request's reads to a replica, unless the session wrote recently"""
+    route = _route.get()
+    if route is None or not replicas():
+        return None
+    if request.session.get(PIN_SESSION_KEY, 0) > time.time():
+        _count('requests:pinned')
+        return None
+    # one replica for the whole request, so its reads see a single point in time
+    route.replica = random.choice(replicas())
+    _count('requests:replica')
+    return route.replica
+
+
+def read_alias():
+    """database the current request reads from; raw SQL that pairs with ORM reads goes here too"""
+    route = _route.get()
+    if route is None or route.replica is None:
+        return DEFAULT_DB_ALIAS
+    if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        # read-your-writes within a transaction
+        return DEFAULT_DB_ALIAS
+    return route.replica
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        alias = DEFAULT_DB_ALIAS if model._meta.app_label in PRIMARY_APPS else read_alias()
+        _count(f'read:{alias}')
+        return alias
+
+    def db_for_write(self, model, **hints):
+        route = _route.get()
+        if route is not None:
+            route.wrote = True
+        _count('write')
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # the replicas hold the same rows as the primary
+        return True
+
+
+class ReplicaRoutingMiddleware:
+    """per-request routing state; a request that wrote pins its session to the primary
+
+    Goes after SessionMiddleware, so the pin is saved with the session.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        route = _Route()
+        token = _route.set(route)
+        try:
+            response = self.get_response(request)
+        finally:
+            _route.reset(token)
+
+        session = getattr(request, 'session', None)
+        if route.wrote and session is not None and session.session_key:
+            session[PIN_SESSION_KEY] = time.time() + sticky_seconds()
+        return response
+
+
+class ReplicaReadMixin:
+    """GET actions listed in replica_actions read from a replica (see use_replica)"""
+    replica_actions = ('list', 'retrieve')
+
+    def initial(self, request, *args, **kwargs):
+        # before authentication and the conditional GET validators, which read
+        # too (myapp.conditional takes its table versions from read_alias())
+        if request.method in ('GET', 'HEAD') and self.action in self.replica_actions:
+            use_replica(request)
+        super().initial(request, *args, **kwargs)
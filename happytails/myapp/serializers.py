@@ -1,6 +1,12 @@
-from datetime import timezone
+import os
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from psycopg2.extras import DateTimeTZRange
 from rest_framework import serializers
-from .models import Animal, Adoption, Visit, Activity
+from .storage import sniff_image_extension
+from .services.images import schedule_image_processing
+from .services.catalog import favorite_animal_ids
+from .models import Animal, AnimalEvent, VaccinationSchedule, Adoption, Visit, Activity, VolunteerAvailability, IssueReport
 from django.contrib.auth.models import User
 
 
@@ -10,13 +16,21 @@ class AnimalSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Animal
-        fields = ['id', 'name', 'breed', 'age', 'size', 'story', 'image', 'image_url', 'status', 'is_favorite']
-        read_only_fields = ['id']
+        fields = [
+            'id', 'name', 'breed', 'age', 'size', 'story', 'image', 'image_url', 'status', 'is_favorite',
+            'arrived_at', 'provenance', 'last_vaccination_at', 'last_vaccine', 'next_vaccination_due'
+        ]
+        read_only_fields = [
+            'id', 'arrived_at', 'provenance', 'last_vaccination_at', 'last_vaccine', 'next_vaccination_due'
+        ]
     
     def get_is_favorite(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            return obj.favorites.filter(id=request.user.id).exists()
+            # loaded once and shared by every row of the response
+            if 'favorite_ids' not in self.context:
+                self.context['favorite_ids'] = favorite_animal_ids(request.user)
+            return obj.pk in self.context['favorite_ids']
         return False
     
     def get_image_url(self, obj):
@@ -42,7 +56,59 @@ class UserSerializer(serializers.ModelSerializer):
         return []
 
 
+class AnimalEventSerializer(serializers.ModelSerializer):
+    """animal history entry serializer"""
+    event_type_display = serializers.CharField(source='get_event_type_display', read_only=True)
+    recorded_by_name = serializers.CharField(source='recorded_by.username', read_only=True, allow_null=True)
+
+    class Meta:
+        model = AnimalEvent
+        fields = [
+            'id', 'event_type', 'event_type_display', 'occurred_at', 'title', 'details',
+            'provenance', 'vaccine', 'next_due_at', 'recorded_by', 'recorded_by_name', 'created_at'
+        ]
+        read_only_fields = ['id', 'recorded_by', 'created_at']
+
+    def validate(self, data):
+        if data['event_type'] == 'VAC' and not data.get('vaccine'):
+            raise serializers.ValidationError("Pentru vaccinări trebuie specificat vaccinul.")
+
+        if data.get('next_due_at') and data['next_due_at'] <= data['occurred_at']:
+            raise serializers.ValidationError("Rapelul trebuie să fie după data vaccinării.")
+
+        return data
+
+
+class VaccinationScheduleSerializer(serializers.ModelSerializer):
+    """next due vaccination per animal and vaccine"""
+    animal_name = serializers.CharField(source='animal.name', read_only=True)
+
+    class Meta:
+        model = VaccinationSchedule
+        fields = ['id', 'animal', 'animal_name', 'vaccine', 'last_given_at', 'next_due_at', 'alerted_at']
+        read_only_fields = fields
+
+
+class ImageUploadField(serializers.FileField):
+    """accepts JPEG, PNG, GIF and WebP by signature; decoding is left to services.images"""
+    default_error_messages = {
+        'invalid_image': 'Upload a valid image (JPEG, PNG, GIF or WebP).',
+    }
+
+    def to_internal_value(self, data):
+        upload = super().to_internal_value(data)
+        extension = sniff_image_extension(upload.read(16))
+        upload.seek(0)
+        if extension is None:
+            self.fail('invalid_image')
+
+        upload.name = os.path.splitext(upload.name)[0] + extension
+        return upload
+
+
 class AnimalCreateUpdateSerializer(serializers.ModelSerializer):
+    image = ImageUploadField(required=False, allow_null=True)
+
     class Meta:
         model = Animal
         fields = ['name', 'breed', 'age', 'size', 'story', 'image', 'status']
@@ -59,6 +125,12 @@ class AnimalCreateUpdateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(f"Size must be one of: {', '.join(valid_sizes)}")
         return value
 
+    def save(self, **kwargs):
+        animal = super().save(**kwargs)
+        if self.validated_data.get('image'):
+            schedule_image_processing(animal.image.name)
+        return animal
+
 
 class AdoptionListSerializer(serializers.ModelSerializer):
     """adoption list serializer"""
@@ -118,22 +190,21 @@ class AdoptionCreateSerializer(serializers.ModelSerializer):
     def validate_animal(self, value):
         if value.status != 'AV':
             raise serializers.ValidationError("This animal is not available for adoption.")
-        
-        user = self.context['request'].user
-        existing = Adoption.objects.filter(
-            user=user,
-            animal=value,
-            status='PD'
-        ).exists()
-        
-        if existing:
-            raise serializers.ValidationError("You already have a pending application for this animal.")
-        
         return value
     
     def create(self, validated_data):
         validated_data['user'] = self.context['request'].user
-        return super().create(validated_data)
+        # duplicates are caught by the unique_pending_adoption constraint,
+        # which also holds for two submits racing each other
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError as exc:
+            if getattr(getattr(exc.__cause__, 'diag', None), 'constraint_name', None) != 'unique_pending_adoption':
+                raise
+            raise serializers.ValidationError({
+                'animal': ["You already have a pending application for this animal."]
+            })
 
 
 class AdoptionScheduleVisitSerializer(serializers.Serializer):
@@ -147,6 +218,78 @@ class AdoptionReviewSerializer(serializers.Serializer):
     rejection_reason = serializers.CharField(required=False, allow_blank=True)
 
 
+class AdoptionQueueVisitSerializer(serializers.ModelSerializer):
+    """completed visit, as shown next to an application in the review queue"""
+    volunteer_name = serializers.CharField(source='volunteer.username', read_only=True, allow_null=True)
+    recommendation_display = serializers.CharField(source='get_recommendation_display', read_only=True)
+
+    class Meta:
+        model = Visit
+        fields = [
+            'id', 'scheduled_date', 'completed_at', 'volunteer_name',
+            'recommendation', 'recommendation_display', 'animal_behavior', 'client_interaction'
+        ]
+
+
+class AdoptionQueueSerializer(serializers.ModelSerializer):
+    """pending application with everything an admin needs to decide on it
+
+    Expects the queryset built by AdoptionViewSet.review_queue: animal and
+    user joined, completed visits prefetched into `completed_visits` and
+    `competing_applications` annotated.
+    """
+    animal_details = serializers.SerializerMethodField()
+    user_details = serializers.SerializerMethodField()
+    visits = AdoptionQueueVisitSerializer(source='completed_visits', many=True, read_only=True)
+    competing_applications = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Adoption
+        fields = [
+            'id', 'application_date', 'phone', 'address', 'reason', 'experience',
+            'living_situation', 'animal_details', 'user_details', 'visits', 'competing_applications'
+        ]
+
+    def get_animal_details(self, obj):
+        request = self.context.get('request')
+        image = obj.animal.image
+        return {
+            'id': obj.animal.id,
+            'name': obj.animal.name,
+            'breed': obj.animal.breed,
+            'age': obj.animal.age,
+            'status': obj.animal.status,
+            'image_url': request.build_absolute_uri(image.url) if image and request else None,
+        }
+
+    def get_user_details(self, obj):
+        return {
+            'id': obj.user.id,
+            'username': obj.user.username,
+            'email': obj.user.email,
+            'first_name': obj.user.first_name,
+            'last_name': obj.user.last_name,
+        }
+
+
+class AdoptionDecisionSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    decision = serializers.ChoiceField(choices=[('AP', 'Approve'), ('RJ', 'Reject')])
+    rejection_reason = serializers.CharField(required=False, allow_blank=True)
+
+
+class AdoptionBulkDecisionSerializer(serializers.Serializer):
+    """admin bulk review: {"decisions": [{"id": 1, "decision": "AP"}, ...]}"""
+    decisions = AdoptionDecisionSerializer(many=True, allow_empty=False)
+
+    def validate_decisions(self, value):
+        if len(value) > 200:
+            raise serializers.ValidationError("At most 200 decisions per request.")
+        ids = [item['id'] for item in value]
+        if len(ids) != len(set(ids)):
+            raise serializers.ValidationError("Each application can appear only once.")
+        return value
+
 
 class VisitListSerializer(serializers.ModelSerializer):
     """visits list serializer"""
@@ -180,7 +323,8 @@ class VisitDetailSerializer(serializers.ModelSerializer):
     class Meta:
         model = Visit
         fields = '__all__'
-        read_only_fields = ['id', 'created_at', 'confirmed_at', 'completed_at', 'scheduled_by']
+        # the slot is taken through services.visit_slots.book_visit, never edited in place
+        read_only_fields = ['id', 'adoption', 'scheduled_date', 'created_at', 'confirmed_at', 'completed_at', 'scheduled_by']
     
     def get_animal_details(self, obj):
         from myapp.serializers import AnimalSerializer
@@ -206,6 +350,13 @@ class VisitDetailSerializer(serializers.ModelSerializer):
         }
 
 
+class VisitCreateSerializer(serializers.Serializer):
+    """admin booking of a visit for an approved application"""
+    adoption = serializers.PrimaryKeyRelatedField(queryset=Adoption.objects.all())
+    scheduled_date = serializers.DateTimeField()
+    notes = serializers.CharField(required=False, allow_blank=True)
+
+
 class VisitConfirmSerializer(serializers.Serializer):
     notes = serializers.CharField(required=False, allow_blank=True)
 
@@ -220,6 +371,38 @@ class VisitReportSerializer(serializers.Serializer):
     )
     notes = serializers.CharField(required=False, allow_blank=True)
 
+
+class VisitSlotSerializer(serializers.Serializer):
+    """a visit slot with its remaining places"""
+    start = serializers.DateTimeField()
+    end = serializers.DateTimeField()
+    capacity = serializers.IntegerField()
+    booked = serializers.IntegerField()
+    available = serializers.IntegerField()
+
+
+def serializer_now(serializer):
+    """the clock reading shared by every row of a response: context['now'],
+    set by the view, or taken on first use"""
+    context = serializer.context
+    if 'now' not in context:
+        context['now'] = timezone.now()
+    return context['now']
+
+
+def time_until_deadline(deadline, now):
+    if deadline > now:
+        seconds = (deadline - now).total_seconds()
+        hours = seconds / 3600
+        if hours < 1:
+            return f"{int(seconds / 60)} minute"
+        elif hours < 24:
+            return f"{int(hours)} ore"
+        else:
+            return f"{int(hours / 24)} zile"
+    return "Expired"
+
+
 class ActivityListSerializer(serializers.ModelSerializer):
     """serializer for activity list"""
     animal_name = serializers.CharField(source='animal.name', read_only=True)
@@ -242,21 +425,11 @@ class ActivityListSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
     
     def get_is_overdue(self, obj):
-        return obj.is_overdue()
+        return obj.is_overdue(serializer_now(self))
     
     def get_time_until_deadline(self, obj):
         """returns the time until the deadline in a hr format"""
-        from django.utils import timezone
-        if obj.deadline > timezone.now():
-            delta = obj.deadline - timezone.now()
-            hours = delta.total_seconds() / 3600
-            if hours < 1:
-                return f"{int(delta.total_seconds() / 60)} minute"
-            elif hours < 24:
-                return f"{int(hours)} ore"
-            else:
-                return f"{int(hours / 24)} zile"
-        return "Expired"
+        return time_until_deadline(obj.deadline, serializer_now(self))
 
 
 class ActivityDetailSerializer(serializers.ModelSerializer):
@@ -287,7 +460,7 @@ class ActivityDetailSerializer(serializers.ModelSerializer):
         }
     
     def get_is_overdue(self, obj):
-        return obj.is_overdue()
+        return obj.is_overdue(serializer_now(self))
 
 
 class ActivityCreateSerializer(serializers.ModelSerializer):
@@ -328,4 +501,201 @@ class ActivityCompleteSerializer(serializers.Serializer):
 
 
 class ActivityAcceptSerializer(serializers.Serializer):
-    notes = serializers.CharField(required=False, allow_blank=True)
\ No newline at end of file
+    notes = serializers.CharField(required=False, allow_blank=True)
+
+
+class VolunteerAvailabilitySerializer(serializers.ModelSerializer):
+    """shift / day off / vacation serializer"""
+    volunteer_name = serializers.CharField(source='volunteer.username', read_only=True)
+    kind_display = serializers.CharField(source='get_kind_display', read_only=True)
+    start = serializers.DateTimeField(source='period.lower')
+    end = serializers.DateTimeField(source='period.upper')
+
+    class Meta:
+        model = VolunteerAvailability
+        fields = [
+            'id', 'volunteer', 'volunteer_name', 'kind', 'kind_display',
+            'start', 'end', 'notes', 'created_at'
+        ]
+        read_only_fields = ['id', 'volunteer', 'created_at']
+
+    def validate(self, data):
+        bounds = data.pop('period', {})
+        start = bounds.get('lower', self.instance.period.lower if self.instance else None)
+        end = bounds.get('upper', self.instance.period.upper if self.instance else None)
+
+        if end <= start:
+            raise serializers.ValidationError("Sfârșitul intervalului trebuie să fie după început.")
+
+        data['period'] = DateTimeTZRange(start, end, '[)')
+        return data
+
+
+class AvailabilityVolunteerSerializer(serializers.Serializer):
+    """the volunteer an admin plans availability for"""
+    volunteer = serializers.PrimaryKeyRelatedField(queryset=User.objects.all(), required=False, allow_null=True)
+
+
+class IssueReportSerializer(serializers.ModelSerializer):
+    """volunteer issue report serializer"""
+    category_display = serializers.CharField(source='get_category_display', read_only=True)
+    severity_display = serializers.CharField(source='get_severity_display', read_only=True)
+    animal_name = serializers.CharField(source='animal.name', read_only=True, allow_null=True)
+    reporter_name = serializers.CharField(source='reporter.username', read_only=True, allow_null=True)
+    resolved_by_name = serializers.CharField(source='resolved_by.username', read_only=True, allow_null=True)
+
+    class Meta:
+        model = IssueReport
+        fields = [
+            'id', 'animal', 'animal_name', 'category', 'category_display',
+            'severity', 'severity_display', 'title', 'description',
+            'reporter', 'reporter_name', 'created_at', 'notified_at',
+            'resolved_at', 'resolved_by', 'resolved_by_name', 'resolution_notes'
+        ]
+        read_only_fields = [
+            'id', 'reporter', 'created_at', 'notified_at',
+            'resolved_at', 'resolved_by', 'resolution_notes'
+        ]
+
+    def create(self, validated_data):
+        validated_data['reporter'] = self.context['request'].user
+        return super().create(validated_data)
+
+
+class IssueReportResolveSerializer(serializers.Serializer):
+    resolution_notes = serializers.CharField(required=False, allow_blank=True)
+
+
+# read-only list serializers over queryset.values()
+#
+# The list endpoints return thousands of rows. These skip model instances,
+# select_related and DRF's per-field machinery: one projected query, choice
+# labels from precomputed maps, and the same JSON as the ModelSerializers
+# above (kept for detail views and writes).
+
+_datetime_field = serializers.DateTimeField()
+
+
+def _datetime(value):
+    return _datetime_field.to_representation(value) if value else None
+
+
+class ValuesListSerializer:
+    """serializes a queryset (many=True only) from the `values` it projects;
+    subclasses list them and turn each row into the output dict in to_representation()"""
+    values = ()
+
+    def __init__(self, instance=None, many=True, context=None, **kwargs):
+        self.instance = instance
+        self.many = many
+        self.context = context or {}
+
+    @property
+    def data(self):
+        return [self.to_representation(row) for row in self.instance.values(*self.values)]
+
+
+class AdoptionListValuesSerializer(ValuesListSerializer):
+    """same output as AdoptionListSerializer"""
+    values = (
+        'id', 'animal_id', 'animal__name', 'animal__breed', 'animal__image',
+        'user__username', 'status', 'application_date', 'visit_scheduled', 'visit_date'
+    )
+    status_labels = dict(Adoption.STATUS_CHOICES)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.request = self.context.get('request')
+        self.image_storage = Animal._meta.get_field('image').storage
+
+    def to_representation(self, row):
+        image = row['animal__image']
+        status = row['status']
+        return {
+            'id': row['id'],
+            'animal': row['animal_id'],
+            'animal_name': row['animal__name'],
+            'animal_breed': row['animal__breed'],
+            'animal_image_url': (
+                self.request.build_absolute_uri(self.image_storage.url(image))
+                if image and self.request else None
+            ),
+            'user_name': row['user__username'],
+            'status': status,
+            'status_display': self.status_labels.get(status, status),
+            'application_date': _datetime(row['application_date']),
+            'visit_scheduled': row['visit_scheduled'],
+            'visit_date': _datetime(row['visit_date']),
+        }
+
+
+class VisitListValuesSerializer(ValuesListSerializer):
+    """same output as VisitListSerializer"""
+    values = (
+        'id', 'adoption_id', 'adoption__animal__name', 'adoption__animal__breed',
+        'adoption__user__username', 'adoption__user__email', 'volunteer_id',
+        'volunteer__username', 'scheduled_date', 'status', 'created_at'
+    )
+    status_labels = dict(Visit.STATUS_CHOICES)
+
+    def to_representation(self, row):
+        status = row['status']
+        data = {
+            'id': row['id'],
+            'adoption': row['adoption_id'],
+            'animal_name': row['adoption__animal__name'],
+            'animal_breed': row['adoption__animal__breed'],
+            'client_name': row['adoption__user__username'],
+            'client_email': row['adoption__user__email'],
+            'volunteer': row['volunteer_id'],
+            'volunteer_name': row['volunteer__username'],
+            'scheduled_date': _datetime(row['scheduled_date']),
+            'status': status,
+            'status_display': self.status_labels.get(status, status),
+            'created_at': _datetime(row['created_at']),
+        }
+        if data['volunteer_name'] is None:
+            # VisitListSerializer skips the field for unassigned visits
+            del data['volunteer_name']
+        return data
+
+
+class ActivityListValuesSerializer(ValuesListSerializer):
+    """same output as ActivityListSerializer"""
+    values = (
+        'id', 'animal_id', 'animal__name', 'activity_type', 'title', 'scheduled_time',
+        'deadline', 'duration_minutes', 'status', 'priority', 'assigned_to_id',
+        'assigned_to__username'
+    )
+    type_labels = dict(Activity.ACTIVITY_TYPES)
+    status_labels = dict(Activity.STATUS_CHOICES)
+    priority_labels = dict(Activity.PRIORITY_CHOICES)
+    open_statuses = frozenset(['PD', 'AS', 'IP'])
+
+    def to_representation(self, row):
+        activity_type, status, priority = row['activity_type'], row['status'], row['priority']
+        deadline = row['deadline']
+        return {
+            'id': row['id'],
+            'animal_id': row['animal_id'],
+            'animal_name': row['animal__name'],
+            'activity_type': activity_type,
+            'activity_type_display': self.type_labels.get(activity_type, activity_type),
+            'title': row['title'],
+            'scheduled_time': _datetime(row['scheduled_time']),
+            'deadline': _datetime(deadline),
+            'duration_minutes': row['duration_minutes'],
+            'status': status,
+            'status_display': self.status_labels.get(status, status),
+            'priority': priority,
+            'priority_display': self.priority_labels.get(priority, priority),
+            'assigned_to': row['assigned_to_id'],
+            'assigned_to_name': row['assigned_to__username'],
+            'is_overdue': status in self.open_statuses and deadline < self.now,
+            'time_until_deadline': time_until_deadline(deadline, self.now),
+        }
+
+    @property
+    def data(self):
+        self.now = serializer_now(self)
+        return super().data
@@ -0,0 +1,202 @@
+"""
+Adoption application state machine.
+
+    PD (pending) --approve--> AP (approved) --finalize--> FN (finalized)
+    PD --reject--> RJ
+
+Every transition runs in one transaction that locks the animal first,
+then its open applications in id order, so two admins acting on
+applications for the same animal are serialized and cannot deadlock. Finalizing closes the
+competing applications for the animal in a single UPDATE and mails their
+applicants in one batch after commit. decide_many() applies a whole batch
+of approvals and rejections in one transaction, with one UPDATE for all the
+approvals and one for all the rejections. Each transition emits an
+`adoption.*` domain event, delivered only if the transaction commits.
+"""
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Case, Q, Value, When
+from django.utils import timezone
+from myapp.events import emit
+from myapp.models import Adoption, Animal, Visit
+from myapp.services.notifications import send_to_users
+
+
+COMPETING_REJECTION_REASON = "The animal has been adopted by another family."
+OPEN_STATUSES = ['PD', 'AP']
+
+
+class TransitionError(Exception):
+    """the application is not in a state that allows the transition"""
+
+
+def _lock(adoption_id):
+    # the animal row first: every transition on its applications queues here
+    animal_id = (
+        Adoption.objects.select_for_update(of=('animal',)).select_related('animal')
+        .get(pk=adoption_id).animal_id
+    )
+    # then the applications finalize() may close, and this one, in id order
+    list(
+        Adoption.objects.select_for_update().filter(animal_id=animal_id)
+        .filter(Q(status__in=OPEN_STATUSES) | Q(pk=adoption_id))
+        .order_by('pk').values_list('pk', flat=True)
+    )
+    return Adoption.objects.select_related('animal', 'user', 'reviewed_by').get(pk=adoption_id)
+
+
+def _require_status(adoption, status):
+    if adoption.status != status:
+        raise TransitionError(f'The application is already {adoption.get_status_display()}')
+
+
+@transaction.atomic
+def approve(adoption_id, reviewed_by):
+    adoption = _lock(adoption_id)
+    _require_status(adoption, 'PD')
+    if adoption.animal.status == 'AD':
+        raise TransitionError(f'{adoption.animal.name} has already been adopted')
+
+    adoption.status = 'AP'
+    adoption.reviewed_by = reviewed_by
+    adoption.reviewed_at = timezone.now()
+    adoption.save(update_fields=['status', 'reviewed_by', 'reviewed_at', 'updated_at'])
+
+    adoption.animal.status = 'PD'
+    adoption.animal.save(update_fields=['status', 'updated_at'])
+    emit('adoption.approved', adoption=adoption)
+    return adoption
+
+
+@transaction.atomic
+def reject(adoption_id, reviewed_by, reason=''):
+    adoption = _lock(adoption_id)
+    _require_status(adoption, 'PD')
+
+    adoption.status = 'RJ'
+    adoption.reviewed_by = reviewed_by
+    adoption.reviewed_at = timezone.now()
+    adoption.rejection_reason = reason
+    adoption.save(update_fields=['status', 'reviewed_by', 'reviewed_at', 'rejection_reason', 'updated_at'])
+    emit('adoption.rejected', adoption=adoption)
+    return adoption
+
+
+@transaction.atomic
+def finalize(adoption_id, finalized_by):
+    adoption = _lock(adoption_id)
+    if adoption.status != 'AP':
+        raise TransitionError('Only approved applications can be finalized')
+
+    now = timezone.now()
+    adoption.status = 'FN'
+    adoption.finalized_at = now
+    adoption.save(update_fields=['status', 'finalized_at', 'updated_at'])
+
+    adoption.animal.status = 'AD'
+    adoption.animal.save(update_fields=['status', 'updated_at'])
+
+    adoption.closed_competing = close_competing_applications(adoption, finalized_by, now)
+    emit('adoption.finalized', adoption=adoption)
+    return adoption
+
+
+@transaction.atomic
+def decide_many(decisions, reviewed_by):
+    """approvals and rejections from the bulk review, all applied or none
+
+    decisions: [{'id', 'decision' ('AP' / 'RJ'), 'rejection_reason'}]
+    Returns (results, errors); when errors is not empty nothing was changed.
+    """
+    ids = [item['id'] for item in decisions]
+    # the lock order of _lock, for all the animals at once: the animals by
+    # id, then their open applications by id
+    animal_ids = sorted({
+        adoption.animal_id for adoption in
+        Adoption.objects.select_for_update(of=('animal',)).select_related('animal')
+        .filter(pk__in=ids).order_by('animal_id')
+    })
+    list(
+        Adoption.objects.select_for_update().filter(animal_id__in=animal_ids)
+        .filter(Q(status__in=OPEN_STATUSES) | Q(pk__in=ids))
+        .order_by('pk').values_list('pk', flat=True)
+    )
+    adoptions = Adoption.objects.select_related('animal').in_bulk(ids)
+
+    approved, rejected, errors = [], [], []
+    for item in decisions:
+        adoption = adoptions.get(item['id'])
+        if adoption is None:
+            errors.append({'id': item['id'], 'error': 'Application not found'})
+        elif adoption.status != 'PD':
+            errors.append({'id': item['id'], 'error': f'The application is already {adoption.get_status_display()}'})
+        elif item['decision'] == 'AP' and adoption.animal.status == 'AD':
+            errors.append({'id': item['id'], 'error': f'{adoption.animal.name} has already been adopted'})
+        elif item['decision'] == 'AP':
+            approved.append(adoption)
+        else:
+            adoption.rejection_reason = item.get('rejection_reason', '')
+            rejected.append(adoption)
+    if errors:
+        return [], errors
+
+    now = timezone.now()
+    if approved:
+        Adoption.objects.filter(pk__in=[adoption.pk for adoption in approved]).update(
+            status='AP', reviewed_by=reviewed_by, reviewed_at=now, updated_at=now
+        )
+        Animal.objects.filter(pk__in={adoption.animal_id for adoption in approved}).update(
+            status='PD', updated_at=now
+        )
+    if rejected:
+        Adoption.objects.filter(pk__in=[adoption.pk for adoption in rejected]).update(
+            status='RJ', reviewed_by=reviewed_by, reviewed_at=now, updated_at=now,
+            rejection_reason=Case(
+                *[When(pk=adoption.pk, then=Value(adoption.rejection_reason)) for adoption in rejected],
+                default=Value('')
+            ),
+        )
+
+    results = []
+    for item in decisions:
+        adoption = adoptions[item['id']]
+        adoption.status = item['decision']
+        if adoption.status == 'AP':
+            adoption.animal.status = 'PD'
+        adoption.reviewed_by = reviewed_by
+        adoption.reviewed_at = now
+        emit('adoption.approved' if adoption.status == 'AP' else 'adoption.rejected', adoption=adoption)
+        results.append({'id': adoption.pk, 'animal': adoption.animal_id, 'status': adoption.status})
+    return results, errors
+
+
+def close_competing_applications(adoption, closed_by, now):
+    """pending applications for the animal are rejected, approved ones cancelled, in one UPDATE
+
+    The caller holds the locks taken by _lock(adoption.pk).
+    """
+    competing = Adoption.objects.filter(
+        animal_id=adoption.animal_id,
+        status__in=OPEN_STATUSES
+    ).exclude(pk=adoption.pk)
+    competing_ids = list(competing.values_list('pk', flat=True))
+    if not competing_ids:
+        return 0
+
+    Adoption.objects.filter(pk__in=competing_ids).update(
+        status=Case(When(status='AP', then=Value('CN')), default=Value('RJ')),
+        reviewed_by=closed_by,
+        reviewed_at=now,
+        rejection_reason=COMPETING_REJECTION_REASON,
+    )
+    Visit.objects.filter(adoption_id__in=competing_ids, status__in=['SC', 'CF']).update(status='CN')
+
+    applicants = User.objects.filter(adoptions__pk__in=competing_ids).distinct()
+    send_to_users(
+        applicants,
+        f"[HappyTails] Your application for {adoption.animal.name}",
+        f"Thank you for your interest in {adoption.animal.name}. "
+        f"{COMPETING_REJECTION_REASON}\n\n"
+        f"Other animals are still waiting for a home, you are welcome to apply again."
+    )
+    return len(competing_ids)
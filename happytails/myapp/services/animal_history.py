@@ -0,0 +1,52 @@
+from django.db import transaction
+from django.db.models import Min, Q
+from myapp.models import Animal, AnimalEvent, VaccinationSchedule
+
+
+@transaction.atomic
+def record_event(animal, recorded_by=None, **data):
+    """append an event to the timeline and refresh the snapshot columns on Animal
+
+    The snapshot is what catalog and detail views read, so the timeline is
+    never aggregated at read time. Back-dated events only move the snapshot
+    when they are newer than what it already holds.
+    """
+    event = AnimalEvent.objects.create(animal=animal, recorded_by=recorded_by, **data)
+
+    if event.event_type == 'ARR':
+        # the first arrival wins, later ones are returns to the shelter
+        Animal.objects.filter(
+            Q(arrived_at__isnull=True) | Q(arrived_at__gt=event.occurred_at),
+            pk=animal.pk
+        ).update(arrived_at=event.occurred_at, provenance=event.provenance)
+
+    elif event.event_type == 'VAC':
+        _update_vaccination_schedule(animal, event)
+
+    return event
+
+
+def _update_vaccination_schedule(animal, event):
+    schedule, created = VaccinationSchedule.objects.select_for_update().get_or_create(
+        animal=animal,
+        vaccine=event.vaccine,
+        defaults={
+            'last_given_at': event.occurred_at,
+            'next_due_at': event.next_due_at,
+            'alert_pending': event.next_due_at is not None,
+        }
+    )
+    if not created and schedule.last_given_at <= event.occurred_at:
+        schedule.last_given_at = event.occurred_at
+        schedule.next_due_at = event.next_due_at
+        schedule.alert_pending = event.next_due_at is not None
+        schedule.save(update_fields=['last_given_at', 'next_due_at', 'alert_pending'])
+
+    # earliest due date over the animal's vaccines (a handful of rows)
+    next_due = VaccinationSchedule.objects.filter(animal=animal).aggregate(due=Min('next_due_at'))['due']
+
+    Animal.objects.filter(
+        Q(last_vaccination_at__isnull=True) | Q(last_vaccination_at__lte=event.occurred_at),
+        pk=animal.pk
+    ).update(last_vaccination_at=event.occurred_at, last_vaccine=event.vaccine)
+    Animal.objects.filter(pk=animal.pk).update(next_vaccination_due=next_due)
@@ -0,0 +1,330 @@
+from bisect import bisect_right, insort
+from collections import namedtuple
+from datetime import datetime, time, timedelta
+from django.db import transaction
+from django.db.models import Case, DateTimeField, Value, When
+from django.utils import timezone
+from myapp.events import emit
+from myapp.models import Activity, VolunteerAvailability
+from myapp.services.shifts import AWAY_KINDS
+
+
+# times are POSIX timestamps (seconds), durations are seconds
+Task = namedtuple('Task', 'id start deadline duration priority')
+
+PRIORITY_RANK = {'UR': 0, 'HG': 1, 'MD': 2, 'LW': 3}
+
+
+class _Schedule:
+    """busy time of one volunteer as sorted, merged blocks (adjacent tasks are
+    fused so a fully booked stretch costs one step to skip)"""
+
+    def __init__(self, windows, held=()):
+        self.windows = sorted(windows)
+        self.first = min((start for start, _ in self.windows), default=0)
+        self.last = max((end for _, end in self.windows), default=0)
+        self.starts = []
+        self.ends = []
+        self.load = 0
+        self.max_gap = max((end - start for start, end in self.windows), default=0)
+
+        # tasks the volunteer already holds, which may overlap each other
+        for start, duration in sorted(held):
+            end = start + duration
+            if self.ends and start <= self.ends[-1]:
+                self.ends[-1] = max(self.ends[-1], end)
+            else:
+                self.starts.append(start)
+                self.ends.append(end)
+            self.load += duration
+        if held:
+            self._refresh_gap()
+
+    def _refresh_gap(self):
+        """longest free stretch inside the shift windows, a cheap rejection test"""
+        longest = 0
+        for window_start, window_end in self.windows:
+            t = window_start
+            i = bisect_right(self.ends, t)
+            while i < len(self.starts) and self.starts[i] < window_end:
+                longest = max(longest, self.starts[i] - t)
+                t = max(t, self.ends[i])
+                i += 1
+            longest = max(longest, window_end - t)
+        self.max_gap = longest
+
+    def earliest_slot(self, task):
+        """first start >= task.start that fits a shift window, the deadline and the free time"""
+        for window_start, window_end in self.windows:
+            if window_end <= task.start:
+                continue
+            if window_start >= task.deadline:
+                break
+
+            t = max(window_start, task.start)
+            latest = min(window_end, task.deadline) - task.duration
+
+            # blocks never overlap, so ends are sorted as well
+            i = bisect_right(self.ends, t)
+            while t <= latest:
+                if i == len(self.starts) or self.starts[i] >= t + task.duration:
+                    return t
+                t = max(t, self.ends[i])
+                i += 1
+        return None
+
+    def add(self, start, duration):
+        end = start + duration
+        i = bisect_right(self.starts, start)
+        merge_left = i > 0 and self.ends[i - 1] == start
+        merge_right = i < len(self.starts) and self.starts[i] == end
+
+        if merge_left and merge_right:
+            self.ends[i - 1] = self.ends[i]
+            del self.starts[i]
+            del self.ends[i]
+        elif merge_left:
+            self.ends[i - 1] = end
+        elif merge_right:
+            self.starts[i] = start
+        else:
+            self.starts.insert(i, start)
+            self.ends.insert(i, end)
+        self.load += duration
+        self._refresh_gap()
+
+    def remove(self, start, duration):
+        end = start + duration
+        i = bisect_right(self.starts, start) - 1
+        block_start, block_end = self.starts[i], self.ends[i]
+
+        pieces = []
+        if block_start < start:
+            pieces.append((block_start, start))
+        if end < block_end:
+            pieces.append((end, block_end))
+        self.starts[i:i + 1] = [piece[0] for piece in pieces]
+        self.ends[i:i + 1] = [piece[1] for piece in pieces]
+        self.load -= duration
+        self._refresh_gap()
+
+
+def plan_assignments(tasks, shifts, held=None, max_moves=None):
+    """load-balanced assignment of tasks to volunteers
+
+    tasks: iterable of Task; shifts: {volunteer_id: [(start, end), ...]};
+    held: {volunteer_id: [(start, duration), ...]} of the tasks they already
+    have, which keep their time busy and count in their load.
+    Greedy pass in priority/deadline order giving each task to the least loaded
+    volunteer that can fit it, then a local search that moves tasks from the
+    most loaded volunteer to lighter ones while that narrows the load gap.
+
+    Returns ({task_id: (volunteer_id, start)}, [unassigned task ids]).
+    """
+    held = held or {}
+    schedules = {
+        volunteer: _Schedule(windows, held.get(volunteer, ()))
+        for volunteer, windows in shifts.items()
+    }
+    plan = {}
+    unassigned = []
+    by_id = {}
+
+    # (load, volunteer) kept sorted so candidates are walked lightest first
+    # without re-sorting all volunteers for every task
+    by_load = sorted((schedule.load, volunteer) for volunteer, schedule in schedules.items())
+
+    def add(volunteer, start, duration):
+        schedule = schedules[volunteer]
+        by_load.remove((schedule.load, volunteer))
+        schedule.add(start, duration)
+        insort(by_load, (schedule.load, volunteer))
+
+    def remove(volunteer, start, duration):
+        schedule = schedules[volunteer]
+        by_load.remove((schedule.load, volunteer))
+        schedule.remove(start, duration)
+        insort(by_load, (schedule.load, volunteer))
+
+    ordered = sorted(tasks, key=lambda task: (task.priority, task.deadline, task.start))
+    for task in ordered:
+        by_id[task.id] = task
+        for _, volunteer in by_load:
+            schedule = schedules[volunteer]
+            if (schedule.max_gap < task.duration
+                    or schedule.last <= task.start or schedule.first >= task.deadline):
+                continue
+            start = schedule.earliest_slot(task)
+            if start is not None:
+                add(volunteer, start, task.duration)
+                plan[task.id] = (volunteer, start)
+                break
+        else:
+            unassigned.append(task.id)
+
+    if len(schedules) < 2:
+        return plan, unassigned
+
+    tasks_of = {volunteer: [] for volunteer in schedules}
+    for task_id, (volunteer, _) in plan.items():
+        tasks_of[volunteer].append(task_id)
+
+    moves = 0
+    max_moves = len(plan) if max_moves is None else max_moves
+    stuck = set()
+    while moves < max_moves:
+        heaviest = next((v for _, v in reversed(by_load) if v not in stuck), None)
+        if heaviest is None:
+            break
+        heavy_load = schedules[heaviest].load
+
+        moved = False
+        for task_id in sorted(tasks_of[heaviest], key=lambda t: -by_id[t].duration):
+            task = by_id[task_id]
+            for load, volunteer in by_load:
+                if load + task.duration >= heavy_load:
+                    break
+                if schedules[volunteer].max_gap < task.duration:
+                    continue
+                start = schedules[volunteer].earliest_slot(task)
+                if start is None:
+                    continue
+
+                remove(heaviest, plan[task_id][1], task.duration)
+                add(volunteer, start, task.duration)
+                plan[task_id] = (volunteer, start)
+                tasks_of[heaviest].remove(task_id)
+                tasks_of[volunteer].append(task_id)
+                moved = True
+                break
+            if moved:
+                break
+
+        # a volunteer with no improving move only gets fewer options as the
+        # lighter ones fill up, so it is not retried
+        if moved:
+            moves += 1
+        else:
+            stuck.add(heaviest)
+
+    return plan, unassigned
+
+
+def _subtract(windows, gaps):
+    """remove the `gaps` intervals from the `windows` intervals"""
+    result = []
+    for start, end in windows:
+        pieces = [(start, end)]
+        for gap_start, gap_end in gaps:
+            next_pieces = []
+            for piece_start, piece_end in pieces:
+                if gap_end <= piece_start or gap_start >= piece_end:
+                    next_pieces.append((piece_start, piece_end))
+                    continue
+                if piece_start < gap_start:
+                    next_pieces.append((piece_start, gap_start))
+                if gap_end < piece_end:
+                    next_pieces.append((gap_end, piece_end))
+            pieces = next_pieces
+        result.extend(pieces)
+    return result
+
+
+def shift_windows(day_start, day_end):
+    """{volunteer_id: [(start, end), ...]} of shift time between day_start and day_end, absences removed"""
+    rows = VolunteerAvailability.objects.filter(
+        period__overlap=(day_start, day_end),
+        volunteer__is_active=True
+    ).values_list('volunteer_id', 'kind', 'period')
+
+    windows = {}
+    away = {}
+    for volunteer_id, kind, period in rows:
+        start = max(period.lower, day_start).timestamp()
+        end = min(period.upper or day_end, day_end).timestamp()
+        target = away if kind in AWAY_KINDS else windows
+        target.setdefault(volunteer_id, []).append((start, end))
+
+    return {
+        volunteer_id: _subtract(intervals, away.get(volunteer_id, []))
+        for volunteer_id, intervals in windows.items()
+    }
+
+
+def auto_assign_day(day, dry_run=False):
+    """assign the day's unassigned pending activities to the volunteers on shift"""
+    day_start = timezone.make_aware(datetime.combine(day, time.min))
+    day_end = day_start + timedelta(days=1)
+
+    rows = list(Activity.objects.filter(
+        status='PD',
+        assigned_to__isnull=True,
+        scheduled_time__gte=day_start,
+        scheduled_time__lt=day_end
+    ).values_list('id', 'scheduled_time', 'deadline', 'duration_minutes', 'priority', 'animal_id'))
+
+    tasks = [
+        Task(pk, scheduled.timestamp(), deadline.timestamp(), minutes * 60, PRIORITY_RANK.get(priority, 2))
+        for pk, scheduled, deadline, minutes, priority, _ in rows
+    ]
+    animals = {pk: animal_id for pk, *_, animal_id in rows}
+    shifts = shift_windows(day_start, day_end)
+
+    # what the volunteers on shift already accepted or started that day
+    held = {}
+    for volunteer_id, scheduled, minutes in Activity.objects.filter(
+        assigned_to_id__in=shifts,
+        status__in=['AS', 'IP'],
+        scheduled_time__gte=day_start,
+        scheduled_time__lt=day_end
+    ).values_list('assigned_to_id', 'scheduled_time', 'duration_minutes'):
+        held.setdefault(volunteer_id, []).append((scheduled.timestamp(), minutes * 60))
+
+    plan, unassigned = plan_assignments(tasks, shifts, held)
+
+    by_volunteer = {}
+    starts = {}
+    for task_id, (volunteer_id, start) in plan.items():
+        by_volunteer.setdefault(volunteer_id, []).append(task_id)
+        starts[task_id] = datetime.fromtimestamp(start, tz=day_start.tzinfo)
+
+    assigned = 0
+    if not dry_run:
+        now = timezone.now()
+        with transaction.atomic():
+            # one UPDATE per volunteer; rows accepted meanwhile are left alone.
+            # The planned start becomes the scheduled time: the plan only
+            # holds if the volunteer does the tasks when it says
+            for volunteer_id, task_ids in by_volunteer.items():
+                assigned += Activity.objects.filter(
+                    pk__in=task_ids,
+                    status='PD',
+                    assigned_to__isnull=True
+                ).update(
+                    assigned_to_id=volunteer_id, status='AS', assigned_at=now, updated_at=now,
+                    scheduled_time=Case(
+                        *[When(pk=task_id, then=Value(starts[task_id])) for task_id in task_ids],
+                        output_field=DateTimeField()
+                    )
+                )
+            if assigned:
+                emit('activities.assigned', day=day, plan=by_volunteer,
+                     animals={animals[task_id] for task_id in plan})
+
+    loads = {volunteer_id: 0 for volunteer_id in shifts}
+    durations = {task.id: task.duration for task in tasks}
+    for task_id, (volunteer_id, _) in plan.items():
+        loads[volunteer_id] += durations[task_id] // 60
+
+    return {
+        'tasks': len(tasks),
+        'volunteers': len(shifts),
+        'planned': len(plan),
+        'assigned': assigned,
+        'unassigned': unassigned,
+        'load_minutes': loads,
+        'held_minutes': {volunteer_id: sum(duration for _, duration in blocks) // 60
+                         for volunteer_id, blocks in held.items()},
+        'plan': by_volunteer,
+        'starts': starts,
+    }
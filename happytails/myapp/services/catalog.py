@@ -0,0 +1,14 @@
+from myapp.models import Animal
+
+
+CATALOG_PAGE_SIZE = 24
+# card fragments are keyed on the animal's change_seq, so this only bounds
+# how long a signed photo URL is reused (it stays valid for a week or more)
+CARD_CACHE_SECONDS = 24 * 3600
+
+
+def favorite_animal_ids(user):
+    """ids of the user's favorite animals, one query for a whole page or list"""
+    if not user.is_authenticated:
+        return set()
+    return set(Animal.favorites.through.objects.filter(user_id=user.pk).values_list('animal_id', flat=True))
@@ -0,0 +1,70 @@
+"""
+Off-request processing of uploaded animal photos.
+
+The request only checks the file signature and streams the bytes into the
+content-addressed storage. Decoding, verification and EXIF stripping
+(GPS coordinates from phone cameras) happen here, in an `images` queue job
+(myapp.jobs) created with the transaction that saved the upload.
+
+Blobs are shared by every row with the same bytes, so the originals a job
+replaces are left in place; the `gc_media` command removes them once nothing
+points at them.
+"""
+import io
+import logging
+import os
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+from myapp.jobs import enqueue
+from myapp.models import Animal
+
+
+logger = logging.getLogger(__name__)
+
+
+def schedule_image_processing(name):
+    """verify and clean `name` in a background job once the current transaction commits"""
+    if name:
+        enqueue('images.process', name=name)
+
+
+def process_image(name):
+    """decode the stored image; drop it if broken, re-store it without metadata if it has any"""
+    field = Animal._meta.get_field('image')
+    storage = field.storage
+    if not storage.exists(name):
+        return name
+
+    with storage.open(name, 'rb') as stored:
+        data = stored.read()
+
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image.verify()
+        image = Image.open(io.BytesIO(data))
+        image.load()
+    except Exception:
+        logger.warning("%s is not a valid image, removing it", name)
+        Animal.objects.filter(image=name).update(image='')
+        return None
+
+    if 'exif' not in image.info and not image.getexif():
+        return name
+
+    # bake the orientation in, then write the pixels back without the metadata
+    cleaned = ImageOps.exif_transpose(image)
+    output = io.BytesIO()
+    save_options = {'format': image.format}
+    if image.format == 'JPEG':
+        save_options.update(quality=90, optimize=True)
+    if image.info.get('icc_profile'):
+        save_options['icc_profile'] = image.info['icc_profile']
+    cleaned.save(output, **save_options)
+
+    new_name = storage.save(
+        os.path.join(field.upload_to, 'clean' + os.path.splitext(name)[1]),
+        ContentFile(output.getvalue())
+    )
+    if new_name != name:
+        Animal.objects.filter(image=name).update(image=new_name)
+    return new_name
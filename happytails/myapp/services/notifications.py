@@ -0,0 +1,66 @@
+from django.conf import settings
+from django.utils import timezone
+from myapp.jobs import enqueue
+from myapp.models import Activity, IssueReport
+from myapp.realtime import report_event
+from myapp.services.shifts import volunteers_on_shift
+
+
+# job priority of urgent incident mail: ahead of task offers and adoption
+# mail on the shared `mail` queue (lower runs first)
+URGENT_PRIORITY = -10
+
+
+def send_to_users(users, subject, message, priority=None):
+    """one email per user, each sent by its own background job once the current transaction commits"""
+    recipients = [user.email for user in users if user.email]
+    for email in recipients:
+        enqueue('mail.send', priority=priority, subject=subject, message=message,
+                from_email=settings.DEFAULT_FROM_EMAIL, recipient_list=[email])
+    return len(recipients)
+
+
+def notify_admins(subject, message, priority=None):
+    """shelter administrators (settings.ADMINS), by a background job once the current transaction commits"""
+    enqueue('mail.admins', priority=priority, subject=subject, message=message)
+
+
+def notify_volunteers_on_shift(activity):
+    """round 1 of the "Be My Eyes" cascade: offer the task to the volunteers on shift"""
+    volunteers = list(volunteers_on_shift(max(activity.scheduled_time, activity.created_at)))
+    if not volunteers:
+        return 0
+
+    activity.notified_volunteers.add(*volunteers)
+    Activity.objects.filter(pk=activity.pk).update(notification_round=1)
+    activity.notification_round = 1
+
+    subject = f"[HappyTails] New task: {activity.title}"
+    message = (
+        f"{activity.get_activity_type_display()} for {activity.animal.name}\n"
+        f"Scheduled: {activity.scheduled_time:%d.%m.%Y %H:%M}\n"
+        f"Deadline: {activity.deadline:%d.%m.%Y %H:%M}\n\n"
+        f"The first volunteer to accept the task gets it."
+    )
+    send_to_users(volunteers, subject, message)
+    return len(volunteers)
+
+
+def notify_urgent_report(report):
+    """urgent incidents skip the digest: admins and the volunteers on shift hear about them right away"""
+    where = f" ({report.animal.name})" if report.animal_id else ""
+    subject = f"URGENT: {report.title}{where}"
+    message = (
+        f"{report.get_category_display()} reported by "
+        f"{report.reporter.username if report.reporter else '-'} "
+        f"at {timezone.localtime(report.created_at):%d.%m.%Y %H:%M}\n\n"
+        f"{report.description}"
+    )
+
+    notify_admins(subject, message, priority=URGENT_PRIORITY)
+    send_to_users(volunteers_on_shift(report.created_at), f"[HappyTails] {subject}", message,
+                  priority=URGENT_PRIORITY)
+    report_event(report, 'report.urgent')
+
+    IssueReport.objects.filter(pk=report.pk).update(notified_at=report.created_at)
+    report.notified_at = report.created_at
@@ -0,0 +1,175 @@
+"""
+Monthly partitions of myapp_activity, range partitioned on scheduled_time
+(UTC months, migration 0018).
+
+ensure_partitions() creates the partitions of the coming months ahead of
+time. Activities scheduled beyond the last partition land in the default
+partition; when their month gets its own partition they are moved into it
+before it is attached.
+
+archive_partitions() detaches the months older than the retention period:
+the rows leave myapp_activity (tombstones are written for the `?since=`
+clients) and stay in a myapp_activity_archive_<yyyy>_<mm> table, or are
+dropped. A month that still has open activities is kept.
+
+`manage.py activity_partitions` runs both, from cron once a month or more.
+"""
+import re
+from datetime import date, datetime, timezone as dt_timezone
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from myapp.models import Activity
+
+
+PARENT = 'myapp_activity'
+DEFAULT_PARTITION = 'myapp_activity_default'
+ARCHIVE_PREFIX = 'myapp_activity_archive_'
+# first key of the advisory lock that serializes partition maintenance
+PARTITION_LOCK_NAMESPACE = 0x5041
+DEFAULT_PARTITIONS_AHEAD = 3
+
+_partition_name = re.compile(r'^myapp_activity_p(\d{4})_(\d{2})$')
+
+
+class PartitionError(Exception):
+    """the partition cannot be archived"""
+
+
+def add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def current_month():
+    today = timezone.now().astimezone(dt_timezone.utc).date()
+    return today.replace(day=1)
+
+
+def partition_name(month):
+    return f'{PARENT}_p{month:%Y_%m}'
+
+
+def month_bounds(month):
+    lower = datetime(month.year, month.month, 1, tzinfo=dt_timezone.utc)
+    upper = datetime.combine(add_months(month, 1), datetime.min.time(), tzinfo=dt_timezone.utc)
+    return lower, upper
+
+
+def partitions():
+    """months that have a partition, oldest first"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = %s::regclass",
+            [PARENT]
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    months = []
+    for name in names:
+        match = _partition_name.match(name)
+        if match:
+            months.append(date(int(match[1]), int(match[2]), 1))
+    return sorted(months)
+
+
+def _lock(cursor):
+    cursor.execute("SELECT pg_advisory_xact_lock(%s, 0)", [PARTITION_LOCK_NAMESPACE])
+
+
+@transaction.atomic
+def create_partition(month):
+    """partition for `month` (first day of a month); returns the rows moved from the default partition"""
+    name = partition_name(month)
+    lower, upper = month_bounds(month)
+    quote = connection.ops.quote_name
+
+    with connection.cursor() as cursor:
+        _lock(cursor)
+        cursor.execute(f"CREATE TABLE {quote(name)} (LIKE {PARENT} INCLUDING DEFAULTS)")
+        # matches the partition bounds, so ATTACH does not scan the table
+        cursor.execute(
+            f"ALTER TABLE {quote(name)} ADD CONSTRAINT {quote(name + '_bounds')} "
+            f"CHECK (scheduled_time >= %s AND scheduled_time < %s)",
+            [lower, upper]
+        )
+        # a move, not a deletion: no tombstones
+        cursor.execute("SET LOCAL myapp.moving_rows = 'on'")
+        cursor.execute(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+            f"WHERE scheduled_time >= %s AND scheduled_time < %s RETURNING *) "
+            f"INSERT INTO {quote(name)} SELECT * FROM moved",
+            [lower, upper]
+        )
+        moved = cursor.rowcount
+        cursor.execute("SET LOCAL myapp.moving_rows = 'off'")
+        cursor.execute(
+            f"ALTER TABLE {PARENT} ATTACH PARTITION {quote(name)} FOR VALUES FROM (%s) TO (%s)",
+            [lower, upper]
+        )
+        cursor.execute(f"ALTER TABLE {quote(name)} DROP CONSTRAINT {quote(name + '_bounds')}")
+    return moved
+
+
+def ensure_partitions(ahead=None):
+    """partitions from the current month to `ahead` months from now; returns {month: rows moved} of the new ones"""
+    if ahead is None:
+        ahead = getattr(settings, 'ACTIVITY_PARTITIONS_AHEAD', DEFAULT_PARTITIONS_AHEAD)
+    existing = set(partitions())
+    start = current_month()
+    created = {}
+    for offset in range(ahead + 1):
+        month = add_months(start, offset)
+        if month not in existing:
+            created[month] = create_partition(month)
+    return created
+
+
+@transaction.atomic
+def archive_partition(month, drop=False):
+    """detach the partition of `month`; returns the number of activities archived"""
+    name = partition_name(month)
+    lower, upper = month_bounds(month)
+    quote = connection.ops.quote_name
+
+    with connection.cursor() as cursor:
+        _lock(cursor)
+        still_open = Activity.objects.open().filter(scheduled_time__gte=lower, scheduled_time__lt=upper).count()
+        if still_open:
+            raise PartitionError(f'{name} still has {still_open} open activities')
+
+        cursor.execute(f"ALTER TABLE {PARENT} DETACH PARTITION {quote(name)}")
+        # the rows left the table without a DELETE: tell the sync clients and the validators
+        cursor.execute(
+            f"INSERT INTO myapp_tombstone (table_name, object_id, change_seq, deleted_at) "
+            f"SELECT %s, id, txid_current(), now() FROM {quote(name)}",
+            [PARENT]
+        )
+        archived = cursor.rowcount
+        cursor.execute(
+            "INSERT INTO myapp_tablechange (table_name, change_seq) VALUES (%s, txid_current()) "
+            "ON CONFLICT DO NOTHING",
+            [PARENT]
+        )
+        if drop:
+            cursor.execute(
+                f"DELETE FROM myapp_activity_notified_volunteers WHERE activity_id IN (SELECT id FROM {quote(name)})"
+            )
+            cursor.execute(f"DROP TABLE {quote(name)}")
+        else:
+            cursor.execute(f"ALTER TABLE {quote(name)} RENAME TO {quote(ARCHIVE_PREFIX + f'{month:%Y_%m}')}")
+    return archived
+
+
+def archive_partitions(retain_months, drop=False):
+    """archive the months before the last `retain_months`; returns ({month: rows}, {month: reason kept})"""
+    cutoff = add_months(current_month(), -retain_months)
+    archived, kept = {}, {}
+    for month in partitions():
+        if month >= cutoff:
+            break
+        try:
+            archived[month] = archive_partition(month, drop=drop)
+        except PartitionError as exc:
+            kept[month] = str(exc)
+    return archived, kept
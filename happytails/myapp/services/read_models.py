@@ -0,0 +1,108 @@
+"""
+Read models for the dashboards.
+
+The activity dashboard used to aggregate myapp_activity on every request.
+ActivityDayCount and AnimalTaskSummary hold those aggregates instead and are
+kept current by the domain event handlers (myapp.handlers). An event names
+the slices it touched, a (day, assignee) pair or an animal, and each slice is
+recomputed from the base table under an advisory lock: handlers are
+idempotent, and a repeated or late event cannot leave a wrong count behind.
+Activities deleted or unassigned by a cascade (an animal or a user deleted)
+are reported by myapp.signals.
+
+Writes that bypass the events (admin site, shell, raw SQL) are repaired by
+`manage.py rebuild_read_models`, which recomputes everything.
+"""
+from django.db import connection, transaction
+from django.db.models import Count, Min, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from myapp.models import Activity, ActivityDayCount, AnimalTaskSummary
+
+
+# first key of the two-key advisory locks; the rebuild takes (namespace, 0)
+# exclusively, slice refreshes take it shared
+READ_MODEL_LOCK_NAMESPACE = 0x524D
+URGENT_PRIORITIES = ['HG', 'UR']
+
+
+def activity_day(scheduled_time):
+    return timezone.localtime(scheduled_time).date()
+
+
+def activity_state(activity):
+    """what the read models key an activity by; taken before a change and passed as `previous`"""
+    return {
+        'day': activity_day(activity.scheduled_time),
+        'assigned_to': activity.assigned_to_id,
+        'animal': activity.animal_id,
+    }
+
+
+def _lock_slice(key):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock_shared(%s, 0)", [READ_MODEL_LOCK_NAMESPACE])
+        cursor.execute("SELECT pg_advisory_xact_lock(%s, hashtext(%s))", [READ_MODEL_LOCK_NAMESPACE, key])
+
+
+@transaction.atomic
+def refresh_day(day, assigned_to_id):
+    """recompute the counts of `day` for one assignee (None: unassigned activities)"""
+    _lock_slice(f'day:{day}:{assigned_to_id}')
+    ActivityDayCount.objects.filter(day=day, assigned_to_id=assigned_to_id).delete()
+    ActivityDayCount.objects.bulk_create([
+        ActivityDayCount(day=day, assigned_to_id=assigned_to_id, **row)
+        for row in Activity.objects.scheduled_on(day).filter(assigned_to_id=assigned_to_id)
+        .values('activity_type', 'status').annotate(count=Count('id')).order_by()
+    ])
+
+
+def _animal_totals():
+    return dict(
+        open_tasks=Count('id'),
+        unassigned_tasks=Count('id', filter=Q(assigned_to__isnull=True)),
+        urgent_tasks=Count('id', filter=Q(priority__in=URGENT_PRIORITIES)),
+        next_deadline=Min('deadline'),
+    )
+
+
+@transaction.atomic
+def refresh_animal(animal_id):
+    _lock_slice(f'animal:{animal_id}')
+    totals = Activity.objects.open().filter(animal_id=animal_id).aggregate(**_animal_totals())
+    if totals['open_tasks']:
+        AnimalTaskSummary.objects.update_or_create(animal_id=animal_id, defaults=totals)
+    else:
+        AnimalTaskSummary.objects.filter(animal_id=animal_id).delete()
+
+
+def refresh_activities(states):
+    """refresh every slice the given activity_state() dicts fall in"""
+    for day, assigned_to in sorted({(state['day'], state['assigned_to']) for state in states},
+                                   key=lambda key: (key[0], key[1] or 0)):
+        refresh_day(day, assigned_to)
+    for animal_id in sorted({state['animal'] for state in states}):
+        refresh_animal(animal_id)
+
+
+@transaction.atomic
+def rebuild():
+    """recompute both read models from myapp_activity; returns the number of rows written"""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(%s, 0)", [READ_MODEL_LOCK_NAMESPACE])
+
+    ActivityDayCount.objects.all().delete()
+    day_counts = ActivityDayCount.objects.bulk_create([
+        ActivityDayCount(**row)
+        for row in Activity.objects.annotate(day=TruncDate('scheduled_time'))
+        .values('day', 'assigned_to_id', 'activity_type', 'status')
+        .annotate(count=Count('id')).order_by()
+    ])
+
+    AnimalTaskSummary.objects.all().delete()
+    summaries = AnimalTaskSummary.objects.bulk_create([
+        AnimalTaskSummary(**row)
+        for row in Activity.objects.open()
+        .values('animal_id').annotate(**_animal_totals()).order_by()
+    ])
+    return len(day_counts) + len(summaries)
@@ -0,0 +1,26 @@
+from django.contrib.auth.models import User
+from django.utils import timezone
+from myapp.models import VolunteerAvailability
+
+
+AWAY_KINDS = ['OF', 'VC']
+
+
+def volunteers_on_shift(at=None):
+    """volunteers with a shift covering `at` and no day off / vacation at that moment
+
+    Single query: the shift and the absence checks are both range containment
+    lookups served by the GiST index on `period`.
+    """
+    at = at or timezone.now()
+
+    away = VolunteerAvailability.objects.filter(
+        kind__in=AWAY_KINDS,
+        period__contains=at
+    ).values('volunteer_id')
+
+    return User.objects.filter(
+        is_active=True,
+        availabilities__kind='SH',
+        availabilities__period__contains=at
+    ).exclude(id__in=away).distinct()
@@ -0,0 +1,191 @@
+from datetime import datetime, time, timedelta
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.utils import timezone
+from myapp.events import emit
+from myapp.jobs import enqueue
+from myapp.models import Activity, Visit
+from myapp.services.assignment import shift_windows
+from myapp.services.visit_slots import OPEN_STATUSES, slot_length
+
+
+# first key of the advisory lock taken per day while matching
+MATCH_LOCK_NAMESPACE = 0x564D
+# days ahead a new shift re-matches, and `match_upcoming_visits` covers by default
+MATCH_HORIZON_DAYS = 14
+
+
+def _day_bounds(day):
+    day_start = timezone.make_aware(datetime.combine(day, time.min))
+    return day_start, day_start + timedelta(days=1)
+
+
+def _covered(windows, start, end):
+    return any(window_start <= start and end <= window_end for window_start, window_end in windows)
+
+
+def plan_visits(visits, shifts, loads, busy, familiar, duration):
+    """greedy matching of visits to volunteers
+
+    visits: [(visit_id, start, animal_id)] with POSIX timestamps, in start order
+    shifts: {volunteer_id: [(start, end), ...]} (see assignment.shift_windows)
+    loads: {volunteer_id: minutes already planned that day}
+    busy: {volunteer_id: set of visit start timestamps they already host}
+    familiar: {(animal_id, volunteer_id)} pairs from completed visits
+
+    Each visit goes to a volunteer whose shift covers it and who has no other
+    visit at that time, preferring volunteers who already know the animal,
+    then the least loaded. Returns ({visit_id: volunteer_id}, [unmatched ids]).
+    """
+    loads = dict(loads)
+    busy = {volunteer: set(starts) for volunteer, starts in busy.items()}
+    plan = {}
+    unmatched = []
+
+    for visit_id, start, animal_id in visits:
+        candidates = [
+            (0 if (animal_id, volunteer) in familiar else 1, loads.get(volunteer, 0), volunteer)
+            for volunteer, windows in shifts.items()
+            if start not in busy.get(volunteer, ()) and _covered(windows, start, start + duration)
+        ]
+        if not candidates:
+            unmatched.append(visit_id)
+            continue
+
+        _, _, volunteer = min(candidates)
+        plan[visit_id] = volunteer
+        loads[volunteer] = loads.get(volunteer, 0) + duration // 60
+        busy.setdefault(volunteer, set()).add(start)
+
+    return plan, unmatched
+
+
+@transaction.atomic
+def match_visits(day, visit_ids=None, dry_run=False):
+    """assign a volunteer to the day's unassigned scheduled visits (or only to `visit_ids`)"""
+    # matches of the same day plan against the same loads and busy slots:
+    # one at a time, from the reads to the UPDATE
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(%s, %s)", [MATCH_LOCK_NAMESPACE, day.toordinal()])
+
+    day_start, day_end = _day_bounds(day)
+    duration = int(slot_length().total_seconds())
+
+    pending = Visit.objects.filter(
+        status='SC',
+        volunteer__isnull=True,
+        scheduled_date__gte=day_start,
+        scheduled_date__lt=day_end
+    )
+    if visit_ids is not None:
+        pending = pending.filter(pk__in=visit_ids)
+    visits = [
+        (pk, scheduled.timestamp(), animal_id)
+        for pk, scheduled, animal_id in pending.order_by('scheduled_date', 'pk')
+        .values_list('id', 'scheduled_date', 'adoption__animal_id')
+    ]
+    shifts = shift_windows(day_start, day_end)
+    if not visits or not shifts:
+        return {'visits': len(visits), 'volunteers': len(shifts), 'matched': 0,
+                'assigned': 0, 'unmatched': [pk for pk, _, _ in visits], 'plan': {}}
+
+    # current load: the day's activities and visits of the volunteers on shift
+    loads = {volunteer_id: 0 for volunteer_id in shifts}
+    for volunteer_id, minutes in (
+        Activity.objects.filter(
+            assigned_to_id__in=shifts,
+            status__in=['AS', 'IP'],
+            scheduled_time__gte=day_start,
+            scheduled_time__lt=day_end
+        ).values_list('assigned_to_id').annotate(minutes=Sum('duration_minutes')).order_by()
+    ):
+        loads[volunteer_id] += minutes
+
+    busy = {}
+    for volunteer_id, scheduled in Visit.objects.filter(
+        volunteer_id__in=shifts,
+        status__in=OPEN_STATUSES,
+        scheduled_date__gte=day_start,
+        scheduled_date__lt=day_end
+    ).values_list('volunteer_id', 'scheduled_date'):
+        busy.setdefault(volunteer_id, set()).add(scheduled.timestamp())
+        loads[volunteer_id] += duration // 60
+
+    familiar = set(
+        Visit.objects.filter(
+            status='CM',
+            volunteer_id__in=shifts,
+            adoption__animal_id__in={animal_id for _, _, animal_id in visits}
+        ).values_list('adoption__animal_id', 'volunteer_id').distinct()
+    )
+
+    plan, unmatched = plan_visits(visits, shifts, loads, busy, familiar, duration)
+
+    by_volunteer = {}
+    for visit_id, volunteer_id in plan.items():
+        by_volunteer.setdefault(volunteer_id, []).append(visit_id)
+
+    assigned = 0
+    if not dry_run:
+        # one UPDATE per volunteer; visits confirmed meanwhile are left alone
+        for volunteer_id, ids in by_volunteer.items():
+            assigned += Visit.objects.filter(
+                pk__in=ids,
+                status='SC',
+                volunteer__isnull=True
+            ).update(volunteer_id=volunteer_id)
+        for visit in Visit.objects.filter(pk__in=plan).select_related('adoption'):
+            if visit.volunteer_id == plan[visit.pk]:
+                emit('visit.assigned', visit=visit)
+
+    return {
+        'visits': len(visits),
+        'volunteers': len(shifts),
+        'matched': len(plan),
+        'assigned': assigned,
+        'unmatched': unmatched,
+        'plan': by_volunteer,
+    }
+
+
+def match_new_visit(visit):
+    """match a visit right after it is booked, in a background job"""
+    day = timezone.localtime(visit.scheduled_date).date()
+    enqueue('visits.match', day=day.isoformat(), visit_ids=[visit.pk])
+
+
+def match_shift_days(availability):
+    """re-match the upcoming days a new or changed shift covers, in background jobs
+
+    Visits booked before anyone was on shift that day stay unassigned until
+    a match runs again; this is that run.
+    """
+    if availability.kind != 'SH':
+        return 0
+    now = timezone.now()
+    start = max(availability.period.lower, now)
+    end = min(availability.period.upper or now + timedelta(days=MATCH_HORIZON_DAYS),
+              now + timedelta(days=MATCH_HORIZON_DAYS))
+    if end <= start:
+        return 0
+
+    day, last_day = timezone.localtime(start).date(), timezone.localtime(end - timedelta(microseconds=1)).date()
+    days = 0
+    while day <= last_day:
+        enqueue('visits.match', day=day.isoformat())
+        day += timedelta(days=1)
+        days += 1
+    return days
+
+
+def match_upcoming_visits(days=MATCH_HORIZON_DAYS):
+    """match the unassigned visits of today and the next `days` days; returns the upcoming ones left unmatched"""
+    today = timezone.localdate()
+    unmatched = []
+    for offset in range(days + 1):
+        unmatched += match_visits(today + timedelta(days=offset))['unmatched']
+    return list(
+        Visit.objects.filter(pk__in=unmatched, scheduled_date__gte=timezone.now())
+        .select_related('adoption__animal', 'adoption__user')
+        .order_by('scheduled_date')
+    )
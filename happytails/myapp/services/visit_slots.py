@@ -0,0 +1,142 @@
+"""
+Adoption visit slots.
+
+The shelter receives families during opening hours (settings.VISIT_HOURS,
+in settings.VISIT_TIME_ZONE), in slots of VISIT_SLOT_MINUTES, at most
+VISIT_SLOT_CAPACITY visits per slot. Availability for a date range is one
+grouped query over the indexed Visit.scheduled_date. A booking takes a
+transaction-scoped advisory lock on its slot before counting, so two
+families cannot both get the last place.
+"""
+from datetime import datetime, time, timedelta
+from zoneinfo import ZoneInfo
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+from myapp.events import emit
+from myapp.models import Visit
+
+
+# first key of the two-key advisory lock, keeps slot locks apart from others
+SLOT_LOCK_NAMESPACE = 0x5649
+OPEN_STATUSES = ['SC', 'CF']
+
+
+class SlotError(Exception):
+    """the requested time is not a bookable slot"""
+
+
+def slot_length():
+    return timedelta(minutes=getattr(settings, 'VISIT_SLOT_MINUTES', 60))
+
+
+def slot_capacity():
+    return getattr(settings, 'VISIT_SLOT_CAPACITY', 2)
+
+
+def _shelter_tz():
+    return ZoneInfo(getattr(settings, 'VISIT_TIME_ZONE', settings.TIME_ZONE))
+
+
+def shelter_today():
+    return datetime.now(_shelter_tz()).date()
+
+
+def slot_starts(day):
+    """start of every slot on `day` (a date), aware datetimes"""
+    hours = getattr(settings, 'VISIT_HOURS', {}).get(day.weekday())
+    if not hours:
+        return []
+    tz = _shelter_tz()
+    start = datetime.combine(day, time(hours[0]), tzinfo=tz)
+    end = datetime.combine(day, time(hours[1]), tzinfo=tz)
+    step = slot_length()
+    starts = []
+    while start + step <= end:
+        starts.append(start)
+        start += step
+    return starts
+
+
+def is_slot_start(when):
+    return when in slot_starts(when.astimezone(_shelter_tz()).date())
+
+
+def available_slots(first_day, last_day, now=None):
+    """slots from first_day to last_day (dates, inclusive) that start after `now`"""
+    starts = []
+    day = first_day
+    while day <= last_day:
+        starts += [start for start in slot_starts(day) if now is None or start > now]
+        day += timedelta(days=1)
+    if not starts:
+        return []
+
+    step = slot_length()
+    booked_at = (
+        Visit.objects.filter(
+            scheduled_date__gte=starts[0],
+            scheduled_date__lt=starts[-1] + step,
+            status__in=OPEN_STATUSES
+        )
+        .values('scheduled_date')
+        .annotate(booked=Count('id'))
+        .order_by()
+    )
+    booked = {}
+    for row in booked_at:
+        when = row['scheduled_date']
+        # visits booked before slots existed count for the slot they fall in
+        slot = next((start for start in starts if start <= when < start + step), None)
+        if slot is not None:
+            booked[slot] = booked.get(slot, 0) + row['booked']
+
+    capacity = slot_capacity()
+    return [
+        {
+            'start': start,
+            'end': start + step,
+            'capacity': capacity,
+            'booked': booked.get(start, 0),
+            'available': max(capacity - booked.get(start, 0), 0),
+        }
+        for start in starts
+    ]
+
+
+@transaction.atomic
+def book_visit(adoption, when, scheduled_by, notes=''):
+    """Visit for `adoption` in the slot starting at `when`, SlotError when it is not bookable"""
+    if not is_slot_start(when):
+        raise SlotError('Visits start at the beginning of a slot during opening hours.')
+    if when <= timezone.now():
+        raise SlotError('This visit slot has already started.')
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT pg_advisory_xact_lock(%s, %s)",
+            [SLOT_LOCK_NAMESPACE, int(when.timestamp()) // 60]
+        )
+    booked = Visit.objects.filter(
+        scheduled_date__gte=when,
+        scheduled_date__lt=when + slot_length(),
+        status__in=OPEN_STATUSES
+    ).count()
+    if booked >= slot_capacity():
+        raise SlotError('This visit slot is fully booked, please choose another one.')
+
+    adoption.visit_scheduled = True
+    adoption.visit_date = when
+    adoption.visit_notes = notes
+    adoption.save(update_fields=['visit_scheduled', 'visit_date', 'visit_notes', 'updated_at'])
+
+    visit = Visit.objects.create(
+        adoption=adoption,
+        scheduled_date=when,
+        scheduled_by=scheduled_by,
+        notes=notes,
+        status='SC'
+    )
+    emit('visit.scheduled', visit=visit)
+    return visit
@@ -0,0 +1,33 @@
+"""
+Deletes that cascade past the domain events.
+
+Deleting an animal deletes its activities and deleting a user unassigns
+theirs, in SQL run by Django's deletion collector, so no `activity.*` event
+is emitted for those rows. These receivers collect the read model slices the
+rows were in before they go and emit `activities.cascaded` for them.
+"""
+from django.contrib.auth.models import User
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
+from myapp.events import emit
+from myapp.models import Activity, Animal
+from myapp.services.read_models import activity_state
+
+
+def _states(activities):
+    return [activity_state(activity) for activity in activities.only('scheduled_time', 'assigned_to', 'animal')]
+
+
+@receiver(pre_delete, sender=Animal, dispatch_uid='myapp.animal_activities_cascaded')
+def animal_deleted(sender, instance, **kwargs):
+    states = _states(Activity.objects.filter(animal=instance))
+    if states:
+        emit('activities.cascaded', states=states)
+
+
+@receiver(pre_delete, sender=User, dispatch_uid='myapp.user_activities_cascaded')
+def user_deleted(sender, instance, **kwargs):
+    # assigned_to is SET_NULL: the activities move to the unassigned slice
+    states = _states(Activity.objects.filter(assigned_to=instance))
+    if states:
+        emit('activities.cascaded', states=states + [dict(state, assigned_to=None) for state in states])
@@ -0,0 +1,98 @@
+"""
+ASGI server-sent events endpoint (mounted in happytails/asgi.py).
+
+Each connection is one coroutine waiting on an asyncio queue, so idle
+clients cost a few KB and no thread. Requires an ASGI server, e.g.
+`uvicorn happytails.asgi:application`.
+"""
+import asyncio
+from importlib import import_module
+from types import SimpleNamespace
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.http.cookie import parse_cookie
+from myapp.realtime import get_broker
+
+
+HEARTBEAT_SECONDS = 15
+
+
+def _load_subscriber(session_key):
+    """(user, roles) for a session cookie, or (None, []) when not logged in"""
+    if not session_key:
+        return None, []
+
+    session = import_module(settings.SESSION_ENGINE).SessionStore(session_key)
+    user = get_user(SimpleNamespace(session=session))
+    if not user.is_authenticated:
+        return None, []
+
+    from myapp.decorators import get_user_roles
+    return user, get_user_roles(SimpleNamespace(session=session))
+
+
+async def _reject(send, status, message):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'text/plain; charset=utf-8')],
+    })
+    await send({'type': 'http.response.body', 'body': message.encode()})
+
+
+async def sse_app(scope, receive, send):
+    """GET /api/events/ - activity and visit updates for the logged in user"""
+    if scope['method'] != 'GET':
+        await _reject(send, 405, 'Method not allowed')
+        return
+
+    headers = dict(scope.get('headers', []))
+    cookies = parse_cookie(headers.get(b'cookie', b'').decode('latin-1'))
+    user, roles = await sync_to_async(_load_subscriber)(cookies.get(settings.SESSION_COOKIE_NAME))
+    if user is None:
+        await _reject(send, 403, 'Authentication required')
+        return
+
+    channels = [f'user:{user.pk}'] + [f'role:{role}' for role in roles]
+    broker = get_broker()
+    queue = broker.subscribe(channels)
+
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [
+            (b'content-type', b'text/event-stream'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),
+        ],
+    })
+    await send({'type': 'http.response.body', 'body': b'retry: 5000\n\n', 'more_body': True})
+
+    disconnected = asyncio.ensure_future(_wait_disconnect(receive))
+    try:
+        while not disconnected.done():
+            next_message = asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait(
+                {next_message, disconnected},
+                timeout=HEARTBEAT_SECONDS,
+                return_when=asyncio.FIRST_COMPLETED
+            )
+            if next_message in done:
+                body = next_message.result().encode()
+            else:
+                next_message.cancel()
+                if disconnected in done:
+                    break
+                body = b': ping\n\n'
+            await send({'type': 'http.response.body', 'body': body, 'more_body': True})
+    finally:
+        disconnected.cancel()
+        broker.unsubscribe(channels, queue)
+
+
+async def _wait_disconnect(receive):
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return
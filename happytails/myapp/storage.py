@@ -0,0 +1,262 @@
+"""
+Content-addressed storage for uploaded media.
+
+Files are stored under their sha256 (`animals/ab/abcdef....jpg`), computed
+while the upload is streamed chunk by chunk. Uploading the same bytes twice
+resolves to the blob that is already there, so duplicates cost no space and
+names never get Django's random `_8bMHlW0` suffix. Blobs can be shared by
+several rows, so they are never deleted on their own; the `gc_media`
+command removes the ones no row points at (`dedupe_media` moves files from
+before content addressing).
+
+Blobs never change, so their URLs are long-lived and cacheable:
+
+- ContentAddressedStorage (local disk) hands out HMAC-signed /media/ URLs.
+  The media_file view checks the signature and, with
+  MEDIA_ACCEL_REDIRECT_PREFIX set, lets nginx send the bytes
+  (X-Accel-Redirect); without it Django streams the file (development).
+- S3ContentAddressedStorage keeps the blobs in an S3-compatible bucket
+  (AWS, MinIO via MEDIA_S3_ENDPOINT_URL) and hands out presigned URLs.
+  Needs boto3.
+
+settings.MEDIA_STORAGE picks the backend (`local` or `s3`).
+"""
+import hashlib
+import mimetypes
+import os
+import tempfile
+import time
+from urllib.parse import urlencode
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import File
+from django.core.files.storage import FileSystemStorage, Storage
+from django.utils.crypto import constant_time_compare, salted_hmac
+from django.utils.deconstruct import deconstructible
+from django.utils.encoding import filepath_to_uri
+
+
+# magic numbers of the formats accepted for animal photos; the full decode
+# happens off the request in myapp.services.images
+IMAGE_SIGNATURES = (
+    (b'\xff\xd8\xff', '.jpg'),
+    (b'\x89PNG\r\n\x1a\n', '.png'),
+    (b'GIF87a', '.gif'),
+    (b'GIF89a', '.gif'),
+    (b'RIFF', '.webp'),
+)
+
+
+def sniff_image_extension(head):
+    """extension for the first bytes of a file, None when it is not a supported image"""
+    for signature, extension in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            if extension == '.webp' and head[8:12] != b'WEBP':
+                return None
+            return extension
+    return None
+
+
+def file_digest(content):
+    digest = hashlib.sha256()
+    for chunk in content.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _copy_hashing(content, out):
+    """stream `content` into `out` chunk by chunk, returning the sha256 of the bytes"""
+    digest = hashlib.sha256()
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    for chunk in content.chunks():
+        digest.update(chunk)
+        out.write(chunk)
+    return digest.hexdigest()
+
+
+# signed URLs: the expiry is rounded up to a whole period so every request in
+# that period gets the same URL and browsers / proxies can keep the bytes
+URL_PERIOD = 7 * 24 * 3600
+
+
+def _url_signature(name, expires):
+    return salted_hmac('myapp.storage.media_url', f'{name}:{expires}', algorithm='sha256').hexdigest()[:32]
+
+
+def signed_media_url(name):
+    period = getattr(settings, 'MEDIA_URL_PERIOD', URL_PERIOD)
+    expires = (int(time.time()) // period + 2) * period
+    query = urlencode({'e': expires, 's': _url_signature(name, expires)})
+    return f"{settings.MEDIA_URL}{filepath_to_uri(name)}?{query}"
+
+
+def media_url_lifetime():
+    """seconds a media URL handed out now stays valid for, at least"""
+    if getattr(settings, 'MEDIA_STORAGE', 'local') == 's3':
+        # S3ContentAddressedStorage.url() reuses a URL for 80% of its expiry
+        expiry = getattr(settings, 'MEDIA_S3_URL_EXPIRY', URL_PERIOD)
+        return expiry - int(expiry * 0.8)
+    return getattr(settings, 'MEDIA_URL_PERIOD', URL_PERIOD)
+
+
+def check_media_signature(name, expires, signature):
+    try:
+        expires = int(expires)
+    except (TypeError, ValueError):
+        return False
+    return expires >= time.time() and constant_time_compare(_url_signature(name, expires), signature or '')
+
+
+def content_name(directory, digest, extension):
+    return os.path.join(directory, digest[:2], digest + extension).replace('\\', '/')
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+
+    def get_available_name(self, name, max_length=None):
+        # the final name only depends on the content, collisions are duplicates
+        return name
+
+    def _save(self, name, content):
+        directory, original = os.path.split(name)
+        extension = os.path.splitext(original)[1].lower()
+        os.makedirs(self.path(directory or '.'), exist_ok=True)
+
+        fd, temp_path = tempfile.mkstemp(dir=self.path(directory or '.'), prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                digest = _copy_hashing(content, out)
+
+            final_name = content_name(directory, digest, extension)
+            final_path = self.path(final_name)
+            if os.path.exists(final_path):
+                os.unlink(temp_path)
+                # a fresh reference: keep gc_media's grace period from now
+                os.utime(final_path)
+            else:
+                os.makedirs(os.path.dirname(final_path), exist_ok=True)
+                if self.file_permissions_mode is not None:
+                    os.chmod(temp_path, self.file_permissions_mode)
+                os.replace(temp_path, final_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+        return final_name
+
+    def url(self, name):
+        return signed_media_url(name)
+
+
+@deconstructible
+class S3ContentAddressedStorage(Storage):
+    """blobs in an S3-compatible bucket, same naming as ContentAddressedStorage"""
+
+    def __init__(self, bucket=None, endpoint_url=None, region=None, url_expiry=None):
+        try:
+            import boto3
+        except ImportError:
+            raise ImproperlyConfigured("MEDIA_STORAGE = 's3' requires boto3 (pip install boto3)")
+
+        self.bucket = bucket or settings.MEDIA_S3_BUCKET
+        self.url_expiry = url_expiry or getattr(settings, 'MEDIA_S3_URL_EXPIRY', URL_PERIOD)
+        self.client = boto3.client(
+            's3',
+            endpoint_url=endpoint_url or getattr(settings, 'MEDIA_S3_ENDPOINT_URL', None),
+            region_name=region or getattr(settings, 'MEDIA_S3_REGION', None),
+        )
+
+    def _open(self, name, mode='rb'):
+        spooled = tempfile.SpooledTemporaryFile(max_size=2 * 1024 * 1024)
+        self.client.download_fileobj(self.bucket, name, spooled)
+        spooled.seek(0)
+        return File(spooled, name)
+
+    def _save(self, name, content):
+        directory, original = os.path.split(name)
+        extension = os.path.splitext(original)[1].lower()
+
+        with tempfile.SpooledTemporaryFile(max_size=2 * 1024 * 1024) as spooled:
+            digest = _copy_hashing(content, spooled)
+            final_name = content_name(directory, digest, extension)
+            if self.exists(final_name):
+                # a fresh reference: copying the object onto itself resets
+                # LastModified, which gc_media's grace period counts from
+                self.client.copy_object(
+                    Bucket=self.bucket, Key=final_name, CopySource={'Bucket': self.bucket, 'Key': final_name},
+                    MetadataDirective='REPLACE', **self._object_args(final_name)
+                )
+            else:
+                spooled.seek(0)
+                self.client.upload_fileobj(spooled, self.bucket, final_name,
+                                           ExtraArgs=self._object_args(final_name))
+        return final_name
+
+    def _object_args(self, name):
+        return {'ContentType': _guess_type(name), 'CacheControl': 'public, max-age=31536000, immutable'}
+
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def exists(self, name):
+        from botocore.exceptions import ClientError
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=name)
+        except ClientError as error:
+            if error.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
+        return True
+
+    def delete(self, name):
+        self.client.delete_object(Bucket=self.bucket, Key=name)
+
+    def size(self, name):
+        return self.client.head_object(Bucket=self.bucket, Key=name)['ContentLength']
+
+    def get_modified_time(self, name):
+        return self.client.head_object(Bucket=self.bucket, Key=name)['LastModified']
+
+    def listdir(self, path):
+        prefix = path.rstrip('/') + '/' if path else ''
+        directories, files = [], []
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix, Delimiter='/'):
+            directories += [entry['Prefix'][len(prefix):].rstrip('/') for entry in page.get('CommonPrefixes', [])]
+            files += [entry['Key'][len(prefix):] for entry in page.get('Contents', [])]
+        return directories, files
+
+    def url(self, name):
+        # a presigned URL differs on every call; reuse one for most of its
+        # lifetime so clients can cache the image
+        cache_key = f'media-url:{self.bucket}:{name}'
+        url = cache.get(cache_key)
+        if url is None:
+            url = self.client.generate_presigned_url(
+                'get_object',
+                Params={'Bucket': self.bucket, 'Key': name},
+                ExpiresIn=self.url_expiry
+            )
+            cache.set(cache_key, url, timeout=int(self.url_expiry * 0.8))
+        return url
+
+
+def _guess_type(name):
+    return mimetypes.guess_type(name)[0] or 'application/octet-stream'
+
+
+STORAGE_BACKENDS = {
+    'local': ContentAddressedStorage,
+    's3': S3ContentAddressedStorage,
+}
+
+def animal_image_storage():
+    """storage for Animal.image, picked by settings.MEDIA_STORAGE"""
+    backend = getattr(settings, 'MEDIA_STORAGE', 'local')
+    if backend not in STORAGE_BACKENDS:
+        raise ImproperlyConfigured(f"MEDIA_STORAGE must be one of {', '.join(STORAGE_BACKENDS)}")
+    return STORAGE_BACKENDS[backend]()
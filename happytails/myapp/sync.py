@@ -0,0 +1,71 @@
+"""
+Incremental sync: `GET /api/<resource>/changes/?since=<cursor>`.
+
+Synced rows carry `change_seq`, the id of the transaction that last wrote
+them (set by a database trigger, bulk updates included), and deletes leave
+a Tombstone. So do the updates that take a row out of someone's view
+(reassigned, taken from the pending list, adopted), with a scope naming who
+lost it. A client stores the `next` cursor of each response and sends
+it back as `since`; the response only holds what changed in between, so
+sync traffic follows the size of the change, not the size of the table.
+
+The cursor is the oldest transaction still running when the changes were
+read, so a writer that commits late is picked up on the next call. Rows
+may occasionally be sent twice; clients upsert by id.
+"""
+from django.db import connection
+from django.db.models import Q
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from myapp.decorators import get_user_roles
+from myapp.models import Tombstone
+
+
+def current_sync_cursor():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT txid_snapshot_xmin(txid_current_snapshot())")
+        return cursor.fetchone()[0]
+
+
+class IncrementalSyncMixin:
+    """adds the `changes` action; sync_serializer_class serializes the changed rows"""
+    sync_serializer_class = None
+
+    @action(detail=False, methods=['get'], url_path='changes')
+    def changes(self, request):
+        """GET /<resource>/changes/?since=<cursor> - rows changed and ids deleted since the cursor"""
+        try:
+            since = int(request.query_params.get('since', 0))
+        except ValueError:
+            return Response({
+                'success': False,
+                'error': 'since must be a cursor returned by a previous sync'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        # taken before reading, everything committed after it shows up next time
+        next_cursor = current_sync_cursor()
+
+        model = self.get_queryset().model
+        changed = self.get_queryset().filter(change_seq__gte=since).order_by('change_seq', 'pk')
+        serializer = self.sync_serializer_class(changed, many=True, context=self.get_serializer_context())
+        data = serializer.data
+
+        scopes = [f'user:{request.user.pk}'] + [f'role:{role}' for role in get_user_roles(request)]
+        deleted = set(
+            Tombstone.objects.filter(table_name=model._meta.db_table, change_seq__gte=since)
+            .filter(Q(scope__isnull=True) | Q(scope__in=scopes))
+            .values_list('object_id', flat=True)
+        )
+        # a row that left the view and came back changed since, so it is in `changed`
+        deleted -= {row['id'] for row in data}
+
+        return Response({
+            'success': True,
+            'data': {
+                'changed': data,
+                'deleted': sorted(set(deleted)),
+            },
+            'count': len(data),
+            'next': next_cursor
+        })
@@ -0,0 +1,27 @@
+"""background tasks, run by `manage.py run_jobs` (see myapp.jobs)"""
+from datetime import date
+from django.core.mail import mail_admins, send_mail
+from myapp.jobs import task
+
+
+@task('mail.send', queue='mail')
+def send_mail_task(subject, message, from_email, recipient_list):
+    """one message per job, so a retry never mails the same recipient twice"""
+    send_mail(subject, message, from_email, recipient_list)
+
+
+@task('mail.admins', queue='mail')
+def mail_admins_task(subject, message):
+    mail_admins(subject, message)
+
+
+@task('images.process', queue='images', max_attempts=3)
+def process_image_task(name):
+    from myapp.services.images import process_image
+    process_image(name)
+
+
+@task('visits.match', priority=-1)
+def match_visits_task(day, visit_ids=None):
+    from myapp.services.visit_matching import match_visits
+    match_visits(date.fromisoformat(day), visit_ids=visit_ids)
@@ -1,3 +1,88 @@
-from django.test import TestCase
+import threading
+from datetime import datetime, time, timedelta
+from zoneinfo import ZoneInfo
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client, TransactionTestCase, override_settings
+from myapp.models import Adoption, Animal, Visit
+from myapp.services.visit_slots import SlotError, book_visit, shelter_today
 
-# Create your tests here.
+
+SHELTER_TZ = 'Europe/Bucharest'
+
+
+@override_settings(
+    VISIT_TIME_ZONE=SHELTER_TZ,
+    VISIT_HOURS={weekday: (10, 18) for weekday in range(7)},
+    VISIT_SLOT_MINUTES=60,
+    VISIT_SLOT_CAPACITY=1,
+)
+class VisitBookingTests(TransactionTestCase):
+    """bookings go through book_visit, whose slot lock keeps them under VISIT_SLOT_CAPACITY"""
+
+    def setUp(self):
+        self.admin = User.objects.create_user('admin')
+        self.animal = Animal.objects.create(name='Rex', breed='Metis', age='2', size='M', story='-')
+        self.slot = datetime.combine(shelter_today() + timedelta(days=2), time(11), tzinfo=ZoneInfo(SHELTER_TZ))
+
+    def _adoption(self, username):
+        return Adoption.objects.create(
+            user=User.objects.create_user(username), animal=self.animal, status='AP',
+            phone='0700000000', address='-', reason='-', experience='-', living_situation='-'
+        )
+
+    def _admin_client(self):
+        client = Client()
+        client.force_login(self.admin)
+        session = client.session
+        session['user_roles'] = ['admin']
+        session.save()
+        return client
+
+    def test_concurrent_bookings_fill_the_slot_once(self):
+        adoptions = [self._adoption(f'client{i}') for i in range(4)]
+        barrier = threading.Barrier(len(adoptions))
+        outcomes = []
+
+        def book(adoption):
+            try:
+                barrier.wait()
+                book_visit(adoption, self.slot, self.admin)
+                outcomes.append('booked')
+            except SlotError:
+                outcomes.append('full')
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=book, args=(adoption,)) for adoption in adoptions]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(outcomes), ['booked', 'full', 'full', 'full'])
+        self.assertEqual(Visit.objects.filter(scheduled_date=self.slot).count(), 1)
+
+    def test_create_endpoint_respects_capacity(self):
+        client = self._admin_client()
+        first, second = self._adoption('client1'), self._adoption('client2')
+
+        response = client.post('/api/visits/', {'adoption': first.pk, 'scheduled_date': self.slot.isoformat()},
+                               content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+
+        response = client.post('/api/visits/', {'adoption': second.pk, 'scheduled_date': self.slot.isoformat()},
+                               content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Visit.objects.filter(scheduled_date=self.slot).count(), 1)
+
+    def test_update_does_not_move_the_visit(self):
+        client = self._admin_client()
+        visit = book_visit(self._adoption('client1'), self.slot, self.admin)
+
+        response = client.patch(f'/api/visits/{visit.pk}/',
+                                {'scheduled_date': (self.slot + timedelta(hours=1)).isoformat()},
+                                content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        visit.refresh_from_db()
+        self.assertEqual(visit.scheduled_date, self.slot)
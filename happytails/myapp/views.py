@@ -3,6 +3,7 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import logout as django_logout
 from django.contrib.auth.decorators import login_required
 from django.conf import settings
+from django.core.paginator import Paginator
 from django.urls import reverse
 from .models import Animal
 from mozilla_django_oidc.views import OIDCAuthenticationRequestView
@@ -12,6 +13,7 @@ import json
 from django.contrib.auth import logout
 from urllib.parse import urlencode
 from .forms import AnimalForm
+from .services.catalog import CATALOG_PAGE_SIZE, CARD_CACHE_SECONDS, favorite_animal_ids
 from django.contrib import messages
 
 def home(request):
@@ -29,9 +31,16 @@ def home(request):
 
 @login_required
 def animals(request):
-    items = Animal.objects.all()
+    paginator = Paginator(Animal.objects.order_by('pk'), CATALOG_PAGE_SIZE)
+    page = paginator.get_page(request.GET.get('page'))
     user_roles = get_user_roles(request)
-    return render(request, "animals.html", {"animals": items, 'user_roles': user_roles})
+    return render(request, "animals.html", {
+        "animals": page.object_list,
+        "page": page,
+        "favorite_ids": favorite_animal_ids(request.user) if 'client' in user_roles else set(),
+        "card_cache_seconds": CARD_CACHE_SECONDS,
+        'user_roles': user_roles
+    })
 
 
 @login_required
@@ -115,6 +124,7 @@ def animal_info(request, animal_id):
     
     return render(request, 'animal_info.html', {
         'animal': animal,
+        'is_favorite': animal.favorites.filter(id=request.user.id).exists(),
         'user_roles': user_roles
     })
 
@@ -5,17 +5,45 @@ from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from django.db.models import Q
-from myapp.models import Activity, Animal
+from myapp.models import Activity, ActivityDayCount, Animal, AnimalTaskSummary, CalendarToken
 from myapp.serializers import (
     ActivityListSerializer, ActivityDetailSerializer,
     ActivityCreateSerializer, ActivityCompleteSerializer,
-    ActivityAcceptSerializer
+    ActivityAcceptSerializer, ActivityListValuesSerializer
 )
 from myapp.decorators import get_user_roles
+from myapp.services.notifications import notify_volunteers_on_shift
+from myapp.services.assignment import auto_assign_day
+from myapp.events import emit
+from myapp.services.read_models import activity_state
+from myapp.conditional import ConditionalResponseMixin
+from myapp.sync import IncrementalSyncMixin
+from myapp.middleware import breach_sensitive
+from myapp.replicas import ReplicaReadMixin
 
 
-class ActivityViewSet(viewsets.ModelViewSet):
+# animals listed on the admin dashboard
+DASHBOARD_ANIMALS = 10
+
+
+class ActivityViewSet(ReplicaReadMixin, ConditionalResponseMixin, IncrementalSyncMixin, viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
+    conditional_models = (Activity, Animal, ActivityDayCount, AnimalTaskSummary)
+    conditional_actions = ('list', 'retrieve', 'dashboard', 'pending')
+    replica_actions = ('list', 'retrieve', 'dashboard', 'pending')
+    # overdue flags and "time until deadline" move with the clock
+    conditional_time_bucket = 60
+    sync_serializer_class = ActivityListValuesSerializer
+    
+    def initial(self, request, *args, **kwargs):
+        # one clock reading per request, the filters and every row of the response agree on it
+        self.now = timezone.now()
+        super().initial(request, *args, **kwargs)
+    
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['now'] = self.now
+        return context
     
     def get_queryset(self):
         user = self.request.user
@@ -64,22 +92,24 @@ class ActivityViewSet(viewsets.ModelViewSet):
         today = request.query_params.get('today', None)
         if today == 'true':
             from datetime import date
-            queryset = queryset.filter(scheduled_time__date=date.today())
+            queryset = queryset.scheduled_on(date.today())
         
         # only upcoming activities
         upcoming = request.query_params.get('upcoming', None)
         if upcoming == 'true':
-            queryset = queryset.filter(scheduled_time__gte=timezone.now())
+            queryset = queryset.filter(scheduled_time__gte=self.now)
         
         # only overdue activities
         overdue = request.query_params.get('overdue', None)
         if overdue == 'true':
             queryset = queryset.filter(
                 status__in=['PD', 'AS', 'IP'],
-                deadline__lt=timezone.now()
+                deadline__lt=self.now
             )
         
-        serializer = self.get_serializer(queryset, many=True)
+        serializer = ActivityListValuesSerializer(
+            queryset.order_by('deadline', '-priority'), context=self.get_serializer_context()
+        )
         
         return Response({
             'success': True,
@@ -114,6 +144,11 @@ class ActivityViewSet(viewsets.ModelViewSet):
         if serializer.is_valid():
             activity = serializer.save()
             
+            # unassigned task -> offer it to the volunteers on shift (round 1)
+            if activity.assigned_to is None:
+                notify_volunteers_on_shift(activity)
+            emit('activity.created', activity=activity)
+            
             return Response({
                 'success': True,
                 'message': 'Activity created successfully',
@@ -139,6 +174,11 @@ class ActivityViewSet(viewsets.ModelViewSet):
         
         return super().update(request, *args, **kwargs)
     
+    def perform_update(self, serializer):
+        previous = activity_state(serializer.instance)
+        activity = serializer.save()
+        emit('activity.updated', activity=activity, previous=previous)
+    
     def destroy(self, request, *args, **kwargs):
         """DELETE /api/activities/{id}/ - delete activity (admin)"""
         roles = get_user_roles(request)
@@ -153,7 +193,9 @@ class ActivityViewSet(viewsets.ModelViewSet):
         
         instance = self.get_object()
         activity_title = instance.title
+        previous = activity_state(instance)
         instance.delete()
+        emit('activity.deleted', activity=instance, previous=previous)
         
         return Response({
             'success': True,
@@ -176,56 +218,67 @@ class ActivityViewSet(viewsets.ModelViewSet):
         from datetime import date, timedelta
         today = date.today()
         
+        # a range on scheduled_time: only today's partition is scanned
         if 'volunteer' in roles:
-            today_activities = Activity.objects.filter(
-                Q(assigned_to=request.user) | Q(status='PD'),
-                scheduled_time__date=today
+            today_activities = Activity.objects.scheduled_on(today).filter(
+                Q(assigned_to=request.user) | Q(status='PD')
             ).select_related('animal')
         else:
-            today_activities = Activity.objects.filter(
-                scheduled_time__date=today
-            ).select_related('animal', 'assigned_to')
-        
-        # stats
-        pending = today_activities.filter(status='PD').count()
-        in_progress = today_activities.filter(status='IP').count()
-        completed = today_activities.filter(status='CM').count()
-        overdue = today_activities.filter(
-            status__in=['PD', 'AS', 'IP'],
-            deadline__lt=timezone.now()
-        ).count()
-        
-        # group by type
+            today_activities = Activity.objects.scheduled_on(today).select_related('animal', 'assigned_to')
+        
+        # stats: precomputed per day, assignee, type and status (see services.read_models)
+        counts = ActivityDayCount.objects.filter(day=today)
+        if 'volunteer' in roles:
+            counts = counts.filter(Q(assigned_to=request.user) | Q(status='PD'))
+        
+        type_labels = dict(Activity.ACTIVITY_TYPES)
+        totals = {}
         by_type = {}
-        for activity in today_activities:
-            type_display = activity.get_activity_type_display()
+        for activity_type, activity_status, count in counts.values_list('activity_type', 'status', 'count'):
+            totals[activity_status] = totals.get(activity_status, 0) + count
+            type_display = type_labels.get(activity_type, activity_type)
             if type_display not in by_type:
                 by_type[type_display] = {
                     'total': 0,
                     'completed': 0,
                     'pending': 0
                 }
-            by_type[type_display]['total'] += 1
-            if activity.status == 'CM':
-                by_type[type_display]['completed'] += 1
-            elif activity.status in ['PD', 'AS']:
-                by_type[type_display]['pending'] += 1
+            by_type[type_display]['total'] += count
+            if activity_status == 'CM':
+                by_type[type_display]['completed'] += count
+            elif activity_status in ['PD', 'AS']:
+                by_type[type_display]['pending'] += count
         
-        serializer = ActivityListSerializer(today_activities, many=True, context={'request': request})
+        # overdue moves with the clock, it cannot be precomputed
+        overdue = today_activities.open().filter(deadline__lt=self.now).count()
         
-        return Response({
+        serializer = ActivityListValuesSerializer(
+            today_activities.order_by('deadline', '-priority'), context=self.get_serializer_context()
+        )
+        
+        data = {
             'success': True,
             'date': today.isoformat(),
             'summary': {
-                'total': today_activities.count(),
-                'pending': pending,
-                'in_progress': in_progress,
-                'completed': completed,
+                'total': sum(totals.values()),
+                'pending': totals.get('PD', 0),
+                'in_progress': totals.get('IP', 0),
+                'completed': totals.get('CM', 0),
                 'overdue': overdue,
                 'by_type': by_type
             },
             'activities': serializer.data
-        })
+        }
+        
+        if 'admin' in roles:
+            # animals that wait longest for care first
+            data['animals'] = list(
+                AnimalTaskSummary.objects.order_by('next_deadline').values(
+                    'animal_id', 'animal__name', 'open_tasks', 'unassigned_tasks', 'urgent_tasks', 'next_deadline'
+                )[:DASHBOARD_ANIMALS]
+            )
+        
+        return Response(data)
     
     @action(detail=False, methods=['get'], url_path='pending')
     def pending(self, request):
@@ -240,11 +293,10 @@ class ActivityViewSet(viewsets.ModelViewSet):
                 'user_roles': roles
             }, status=status.HTTP_403_FORBIDDEN)
         
-        pending_activities = Activity.objects.filter(
-            status__in=['PD', 'AS', 'IP']
-        ).select_related('animal', 'assigned_to').order_by('deadline')
+        # every partition is visited, through the small partial index on open tasks
+        pending_activities = Activity.objects.open().select_related('animal', 'assigned_to').order_by('deadline')
         
-        serializer = ActivityListSerializer(pending_activities, many=True, context={'request': request})
+        serializer = ActivityListValuesSerializer(pending_activities, context=self.get_serializer_context())
         
         return Response({
             'success': True,
@@ -252,6 +304,69 @@ class ActivityViewSet(viewsets.ModelViewSet):
             'count': pending_activities.count()
         })
     
+    @action(detail=False, methods=['post'], url_path='auto-assign')
+    def auto_assign(self, request):
+        """POST /api/activities/auto-assign/ - distribute the day's unassigned tasks among volunteers on shift (admin)"""
+        roles = get_user_roles(request)
+        
+        if 'admin' not in roles:
+            return Response({
+                'success': False,
+                'error': 'Only administrators can auto-assign activities',
+                'required_role': 'admin',
+                'user_roles': roles
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        from datetime import date
+        day = date.today()
+        if request.data.get('date'):
+            try:
+                day = date.fromisoformat(request.data['date'])
+            except (TypeError, ValueError):
+                return Response({
+                    'success': False,
+                    'errors': {'date': ['Use the YYYY-MM-DD format.']}
+                }, status=status.HTTP_400_BAD_REQUEST)
+        
+        dry_run = str(request.data.get('dry_run', 'false')).lower() == 'true'
+        result = auto_assign_day(day, dry_run=dry_run)
+        
+        return Response({
+            'success': True,
+            'message': f"{result['planned']} of {result['tasks']} activities planned for {result['volunteers']} volunteers",
+            'date': day.isoformat(),
+            'dry_run': dry_run,
+            'data': result
+        })
+    
+    @action(detail=False, methods=['get', 'post'], url_path='calendar-token')
+    def calendar_token(self, request):
+        """GET /api/activities/calendar-token/ - personal iCalendar feed URL (POST rotates the token)"""
+        roles = get_user_roles(request)
+        
+        if 'volunteer' not in roles and 'admin' not in roles:
+            return Response({
+                'success': False,
+                'error': 'Only volunteers and admins have a calendar feed',
+                'required_roles': ['volunteer', 'admin'],
+                'user_roles': roles
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        calendar_token = CalendarToken.issue(request.user, rotate=request.method == 'POST')
+        from django.urls import reverse
+        feed_url = request.build_absolute_uri(
+            reverse('calendar_feed', kwargs={'token': calendar_token.token})
+        )
+        
+        # the feed URL is a credential
+        return breach_sensitive(Response({
+            'success': True,
+            'data': {
+                'feed_url': feed_url,
+                'created_at': calendar_token.created_at
+            }
+        }))
+    
     @action(detail=True, methods=['post'], url_path='accept')
     def accept(self, request, pk=None):
         """POST /api/activities/{id}/accept/ - accept task (Be My Eyes)"""
@@ -275,6 +390,7 @@ class ActivityViewSet(viewsets.ModelViewSet):
         
         serializer = ActivityAcceptSerializer(data=request.data)
         if serializer.is_valid():
+            previous = activity_state(activity)
             activity.assigned_to = request.user
             activity.status = 'AS'
             activity.assigned_at = timezone.now()
@@ -283,6 +399,7 @@ class ActivityViewSet(viewsets.ModelViewSet):
                 activity.description += f"\n\nVolunteer note: {serializer.validated_data['notes']}"
             
             activity.save()
+            emit('activity.accepted', activity=activity, previous=previous)
             
             return Response({
                 'success': True,
@@ -323,6 +440,7 @@ class ActivityViewSet(viewsets.ModelViewSet):
         
         serializer = ActivityCompleteSerializer(data=request.data)
         if serializer.is_valid():
+            previous = activity_state(activity)
             activity.status = 'CM'
             activity.completed_by = request.user
             activity.completed_at = timezone.now()
@@ -333,6 +451,7 @@ class ActivityViewSet(viewsets.ModelViewSet):
                 activity.assigned_at = timezone.now()
             
             activity.save()
+            emit('activity.completed', activity=activity, previous=previous)
             
             return Response({
                 'success': True,
@@ -363,12 +482,14 @@ class ActivityViewSet(viewsets.ModelViewSet):
                 'error': f'Activity is already {activity.get_status_display()}'
             }, status=status.HTTP_400_BAD_REQUEST)
         
+        previous = activity_state(activity)
         activity.status = 'IP'
         if not activity.assigned_to:
             activity.assigned_to = request.user
             activity.assigned_at = timezone.now()
         
         activity.save()
+        emit('activity.started', activity=activity, previous=previous)
         
         return Response({
             'success': True,
@@ -1,20 +1,32 @@
-from rest_framework import viewsets, status
+from rest_framework import viewsets, status, serializers
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
-from django.utils import timezone
-from myapp.models import Adoption, Animal
+from django.db.models import Count, F, Prefetch, Window
+from myapp.models import Adoption, Animal, Visit
 from myapp.serializers import (
     AdoptionListSerializer, AdoptionDetailSerializer,
     AdoptionCreateSerializer, AdoptionScheduleVisitSerializer,
-    AdoptionReviewSerializer
+    AdoptionReviewSerializer, AdoptionListValuesSerializer,
+    AdoptionQueueSerializer, AdoptionBulkDecisionSerializer
 )
 from myapp.decorators import get_user_roles
+from myapp.services import adoptions as adoption_flow
+from myapp.services.visit_slots import SlotError, book_visit
+from myapp.services.visit_matching import match_new_visit
+from myapp.conditional import ConditionalResponseMixin
+from myapp.sync import IncrementalSyncMixin
+from myapp.replicas import ReplicaReadMixin
 
 
-class AdoptionViewSet(viewsets.ModelViewSet):
+class AdoptionViewSet(ReplicaReadMixin, ConditionalResponseMixin, IncrementalSyncMixin, viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
+    conditional_models = (Adoption, Animal, Animal.favorites.through, Visit)
+    conditional_media_urls = True
+    conditional_actions = ('list', 'retrieve', 'review_queue')
+    replica_actions = ('list', 'retrieve', 'review_queue')
+    sync_serializer_class = AdoptionListValuesSerializer
     
     def get_queryset(self):
         user = self.request.user
@@ -35,7 +47,7 @@ class AdoptionViewSet(viewsets.ModelViewSet):
     def list(self, request, *args, **kwargs):
         """GET /adoptions/ - applications (personal or all the applications for an admin)"""
         queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
+        serializer = AdoptionListValuesSerializer(queryset, context=self.get_serializer_context())
         
         roles = get_user_roles(request)
         
@@ -70,7 +82,13 @@ class AdoptionViewSet(viewsets.ModelViewSet):
         
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
-            adoption = serializer.save()
+            try:
+                adoption = serializer.save()
+            except serializers.ValidationError as exc:
+                return Response({
+                    'success': False,
+                    'errors': exc.detail
+                }, status=status.HTTP_400_BAD_REQUEST)
                         
             return Response({
                 'success': True,
@@ -103,19 +121,19 @@ class AdoptionViewSet(viewsets.ModelViewSet):
         
         serializer = AdoptionScheduleVisitSerializer(data=request.data)
         if serializer.is_valid():
-            adoption.visit_scheduled = True
-            adoption.visit_date = serializer.validated_data['visit_date']
-            adoption.visit_notes = serializer.validated_data.get('visit_notes', '')
-            adoption.save()
-            
-            from myapp.models import Visit
-            visit = Visit.objects.create(
-                adoption=adoption,
-                scheduled_date=adoption.visit_date,
-                scheduled_by=request.user,
-                notes=adoption.visit_notes,
-                status='SC'
-            )
+            try:
+                visit = book_visit(
+                    adoption,
+                    serializer.validated_data['visit_date'],
+                    request.user,
+                    serializer.validated_data.get('visit_notes', '')
+                )
+            except SlotError as exc:
+                return Response({
+                    'success': False,
+                    'error': str(exc)
+                }, status=status.HTTP_400_BAD_REQUEST)
+            match_new_visit(visit)
             
             return Response({
                 'success': True,
@@ -132,6 +150,71 @@ class AdoptionViewSet(viewsets.ModelViewSet):
             'errors': serializer.errors
         }, status=status.HTTP_400_BAD_REQUEST)
     
+    @action(detail=False, methods=['get'], url_path='review-queue')
+    def review_queue(self, request):
+        """GET /adoptions/review-queue/ - pending applications, oldest first, with animal, applicant and completed visits (admin)"""
+        roles = get_user_roles(request)
+        
+        if 'admin' not in roles:
+            return Response({
+                'success': False,
+                'error': 'Only administrators can review applications',
+                'required_role': 'admin',
+                'user_roles': roles
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        # two queries whatever the queue length: applications (joined) and their visits
+        queue = Adoption.objects.filter(status='PD').select_related('animal', 'user').prefetch_related(
+            Prefetch(
+                'visits',
+                queryset=Visit.objects.filter(status='CM').select_related('volunteer').order_by('-completed_at'),
+                to_attr='completed_visits'
+            )
+        ).annotate(
+            competing_applications=Window(Count('id'), partition_by=[F('animal_id')]) - 1
+        ).order_by('application_date', 'id')
+        
+        data = AdoptionQueueSerializer(queue, many=True, context=self.get_serializer_context()).data
+        return Response({
+            'success': True,
+            'data': data,
+            'count': len(data)
+        })
+    
+    @action(detail=False, methods=['post'], url_path='bulk-decision')
+    def bulk_decision(self, request):
+        """POST /adoptions/bulk-decision/ - approve and reject several applications at once, all or nothing (admin)"""
+        roles = get_user_roles(request)
+        
+        if 'admin' not in roles:
+            return Response({
+                'success': False,
+                'error': 'Only administrators can review applications',
+                'required_role': 'admin',
+                'user_roles': roles
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        serializer = AdoptionBulkDecisionSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response({
+                'success': False,
+                'errors': serializer.errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        results, errors = adoption_flow.decide_many(serializer.validated_data['decisions'], request.user)
+        if errors:
+            return Response({
+                'success': False,
+                'error': 'No decision was applied',
+                'errors': errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({
+            'success': True,
+            'data': results,
+            'count': len(results)
+        })
+    
     @action(detail=True, methods=['put'], url_path='approve')
     def approve(self, request, pk=None):
         """PUT /adoptions/{id}/approve/ - approve adoption (admin)"""
@@ -147,21 +230,14 @@ class AdoptionViewSet(viewsets.ModelViewSet):
         
         adoption = self.get_object()
         
-        if adoption.status != 'PD':
+        try:
+            adoption = adoption_flow.approve(adoption.pk, request.user)
+        except adoption_flow.TransitionError as exc:
             return Response({
                 'success': False,
-                'error': f'The application is already {adoption.get_status_display()}'
+                'error': str(exc)
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        adoption.status = 'AP'
-        adoption.reviewed_by = request.user
-        adoption.reviewed_at = timezone.now()
-        adoption.save()
-        
-        adoption.animal.status = 'PD'  
-        adoption.animal.save()
-        
-        
         return Response({
             'success': True,
             'message': f'The application for {adoption.animal.name} has been approved',
@@ -191,12 +267,15 @@ class AdoptionViewSet(viewsets.ModelViewSet):
         
         serializer = AdoptionReviewSerializer(data=request.data)
         if serializer.is_valid():
-            adoption.status = 'RJ'
-            adoption.reviewed_by = request.user
-            adoption.reviewed_at = timezone.now()
-            adoption.rejection_reason = serializer.validated_data.get('rejection_reason', '')
-            adoption.save()
-            
+            try:
+                adoption = adoption_flow.reject(
+                    adoption.pk, request.user, serializer.validated_data.get('rejection_reason', '')
+                )
+            except adoption_flow.TransitionError as exc:
+                return Response({
+                    'success': False,
+                    'error': str(exc)
+                }, status=status.HTTP_400_BAD_REQUEST)
             
             return Response({
                 'success': True,
@@ -224,22 +303,17 @@ class AdoptionViewSet(viewsets.ModelViewSet):
         
         adoption = self.get_object()
         
-        if adoption.status != 'AP':
+        try:
+            adoption = adoption_flow.finalize(adoption.pk, request.user)
+        except adoption_flow.TransitionError as exc:
             return Response({
                 'success': False,
-                'error': 'Only approved applications can be finalized'
+                'error': str(exc)
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        adoption.status = 'FN'
-        adoption.finalized_at = timezone.now()
-        adoption.save()
-        
-        adoption.animal.status = 'AD'
-        adoption.animal.save()
-        
-        
         return Response({
             'success': True,
             'message': f'{adoption.animal.name} has been successfully adopted by {adoption.user.username}!',
-            'data': AdoptionDetailSerializer(adoption, context={'request': request}).data
+            'data': AdoptionDetailSerializer(adoption, context={'request': request}).data,
+            'closed_competing_applications': adoption.closed_competing
         })
\ No newline at end of file
@@ -0,0 +1,156 @@
+import hashlib
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from django.db.models import Count, Max
+from django.http import Http404, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.views.decorators.http import require_GET
+from myapp.models import Activity, CalendarToken, Visit
+
+
+DEFAULT_PAST_DAYS = 7
+DEFAULT_FUTURE_DAYS = 30
+MAX_FUTURE_DAYS = 90
+
+
+def _ics_datetime(value):
+    return value.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def _ics_text(value):
+    return (
+        str(value).replace('\\', '\\\\').replace(';', '\\;')
+        .replace(',', '\\,').replace('\r\n', '\\n').replace('\n', '\\n')
+    )
+
+
+def _ics_line(line):
+    """RFC 5545 folding: content lines longer than 75 octets continue on lines starting with a space"""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line + '\r\n'
+
+    parts = []
+    limit = 75
+    while encoded:
+        cut = min(limit, len(encoded))
+        # never split a multi-byte character
+        while cut < len(encoded) and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode('utf-8'))
+        encoded = encoded[cut:]
+        limit = 74
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def _event(uid, start, end, summary, description, stamp, status='CONFIRMED'):
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:{uid}',
+        f'DTSTAMP:{_ics_datetime(stamp)}',
+        f'DTSTART:{_ics_datetime(start)}',
+        f'DTEND:{_ics_datetime(end)}',
+        f'SUMMARY:{_ics_text(summary)}',
+        f'DESCRIPTION:{_ics_text(description)}',
+        f'STATUS:{status}',
+        'END:VEVENT',
+    ]
+    return ''.join(_ics_line(line) for line in lines)
+
+
+def _stream_feed(activities, visits, generated_at):
+    yield _ics_line('BEGIN:VCALENDAR')
+    yield _ics_line('VERSION:2.0')
+    yield _ics_line('PRODID:-//HappyTails//Volunteer calendar//RO')
+    yield _ics_line('CALSCALE:GREGORIAN')
+    yield _ics_line('X-WR-CALNAME:HappyTails')
+
+    activity_types = dict(Activity.ACTIVITY_TYPES)
+    for row in activities.iterator(chunk_size=500):
+        yield _event(
+            uid=f"activity-{row['id']}@happytails",
+            start=row['scheduled_time'],
+            end=row['scheduled_time'] + timedelta(minutes=row['duration_minutes']),
+            summary=f"{activity_types.get(row['activity_type'], row['activity_type'])}: {row['animal__name']}",
+            description=f"{row['title']}\nDeadline: {timezone.localtime(row['deadline']):%d.%m.%Y %H:%M}\n{row['description']}",
+            stamp=row['updated_at'] or generated_at,
+        )
+
+    for row in visits.iterator(chunk_size=500):
+        yield _event(
+            uid=f"visit-{row['id']}@happytails",
+            start=row['scheduled_date'],
+            end=row['scheduled_date'] + timedelta(hours=1),
+            summary=f"Vizită adopție: {row['adoption__animal__name']}",
+            description=f"Client: {row['adoption__user__username']}\n{row['notes']}",
+            stamp=row['updated_at'] or generated_at,
+        )
+
+    yield _ics_line('END:VCALENDAR')
+
+
+@require_GET
+def calendar_feed(request, token):
+    """GET /api/calendar/<token>.ics - personal activities and confirmed visits (?past=&days=)"""
+    calendar_token = CalendarToken.objects.filter(token=token).select_related('user').first()
+    if calendar_token is None or not calendar_token.user.is_active:
+        raise Http404
+
+    try:
+        past_days = min(max(int(request.GET.get('past', DEFAULT_PAST_DAYS)), 0), MAX_FUTURE_DAYS)
+        future_days = min(max(int(request.GET.get('days', DEFAULT_FUTURE_DAYS)), 1), MAX_FUTURE_DAYS)
+    except ValueError:
+        past_days, future_days = DEFAULT_PAST_DAYS, DEFAULT_FUTURE_DAYS
+
+    # window aligned on whole days so the validators stay stable during the day
+    today = timezone.localdate()
+    window_start = timezone.make_aware(datetime.combine(today - timedelta(days=past_days), time.min))
+    window_end = timezone.make_aware(datetime.combine(today + timedelta(days=future_days), time.min))
+
+    user = calendar_token.user
+    activities = Activity.objects.filter(
+        assigned_to=user,
+        scheduled_time__gte=window_start,
+        scheduled_time__lt=window_end
+    ).exclude(status='CN')
+    visits = Visit.objects.filter(
+        volunteer=user,
+        status='CF',
+        scheduled_date__gte=window_start,
+        scheduled_date__lt=window_end
+    )
+
+    # validator: one aggregate per table, nothing is serialized for a 304.
+    # No Last-Modified: a cancelled, deleted or reassigned event leaves the
+    # feed without raising any updated_at, only the counts in the ETag see it
+    activity_state = activities.aggregate(changed=Max('updated_at'), total=Count('id'))
+    visit_state = visits.aggregate(changed=Max('updated_at'), total=Count('id'))
+
+    fingerprint = '|'.join(str(part) for part in (
+        user.pk, token, window_start.date(), window_end.date(),
+        activity_state['changed'], activity_state['total'],
+        visit_state['changed'], visit_state['total'],
+    ))
+    etag = '"%s"' % hashlib.md5(fingerprint.encode()).hexdigest()
+
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return not_modified
+
+    activities = activities.values(
+        'id', 'activity_type', 'title', 'description', 'scheduled_time',
+        'deadline', 'duration_minutes', 'updated_at', 'animal__name'
+    ).order_by('scheduled_time')
+    visits = visits.values(
+        'id', 'scheduled_date', 'notes', 'updated_at',
+        'adoption__animal__name', 'adoption__user__username'
+    ).order_by('scheduled_date')
+
+    response = StreamingHttpResponse(
+        _stream_feed(activities, visits, timezone.now()),
+        content_type='text/calendar; charset=utf-8'
+    )
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, max-age=300'
+    response['Content-Disposition'] = 'inline; filename="happytails.ics"'
+    return response
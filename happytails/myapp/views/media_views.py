@@ -0,0 +1,37 @@
+import mimetypes
+import os
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.http import http_date
+from django.views.decorators.http import require_GET
+from myapp.models import Animal
+from myapp.storage import check_media_signature
+
+
+# content-addressed blobs never change under the same name
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+
+@require_GET
+def media_file(request, name):
+    """GET /media/<name>?e=&s= - signed media URL (ContentAddressedStorage)"""
+    if not check_media_signature(name, request.GET.get('e'), request.GET.get('s')):
+        raise Http404
+
+    storage = Animal._meta.get_field('image').storage
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    accel_prefix = getattr(settings, 'MEDIA_ACCEL_REDIRECT_PREFIX', '')
+
+    if accel_prefix:
+        # nginx serves the bytes from an `internal` location, the worker is free right away
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = accel_prefix.rstrip('/') + '/' + name
+    else:
+        try:
+            response = FileResponse(open(storage.path(name), 'rb'), content_type=content_type)
+        except (FileNotFoundError, IsADirectoryError, NotImplementedError):
+            raise Http404
+        response['Last-Modified'] = http_date(os.path.getmtime(storage.path(name)))
+
+    response['Cache-Control'] = IMMUTABLE
+    return response
@@ -0,0 +1,146 @@
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from django.db import transaction
+from django.utils import timezone
+from myapp.models import IssueReport
+from myapp.serializers import IssueReportSerializer, IssueReportResolveSerializer
+from myapp.decorators import get_user_roles
+from myapp.services.notifications import notify_urgent_report
+from myapp.realtime import report_event
+
+
+class IssueReportViewSet(viewsets.ModelViewSet):
+    """
+    list: own reports (volunteer) or the triage queue of open reports (admin)
+    create: report a health / behaviour problem or an incident (volunteer, admin)
+    resolve: mark a report as resolved (admin)
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = IssueReportSerializer
+    http_method_names = ['get', 'post', 'put', 'head', 'options']
+
+    def get_queryset(self):
+        user = self.request.user
+        roles = get_user_roles(self.request)
+
+        queryset = IssueReport.objects.select_related('animal', 'reporter', 'resolved_by')
+        if 'admin' in roles:
+            return queryset
+        if 'volunteer' in roles:
+            return queryset.filter(reporter=user)
+        return IssueReport.objects.none()
+
+    def list(self, request, *args, **kwargs):
+        """GET /api/reports/ - admins get the open reports, most severe and oldest first (?resolved=true for all)"""
+        queryset = self.get_queryset()
+        roles = get_user_roles(request)
+
+        if 'admin' in roles and request.query_params.get('resolved', 'false').lower() != 'true':
+            # served by the partial triage index, resolved reports are not in it
+            queryset = queryset.filter(resolved_at__isnull=True).order_by('-severity', 'created_at')
+        else:
+            queryset = queryset.order_by('-created_at')
+
+        category = request.query_params.get('category', None)
+        if category:
+            queryset = queryset.filter(category=category)
+
+        animal_id = request.query_params.get('animal', None)
+        if animal_id:
+            queryset = queryset.filter(animal_id=animal_id)
+
+        serializer = self.get_serializer(queryset, many=True)
+
+        return Response({
+            'success': True,
+            'data': serializer.data,
+            'count': len(serializer.data)
+        })
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        serializer = self.get_serializer(instance)
+
+        return Response({
+            'success': True,
+            'data': serializer.data
+        })
+
+    def create(self, request, *args, **kwargs):
+        """POST /api/reports/ - report a problem (volunteer, admin)"""
+        roles = get_user_roles(request)
+
+        if 'volunteer' not in roles and 'admin' not in roles:
+            return Response({
+                'success': False,
+                'error': 'Only volunteers and admins can report issues',
+                'required_roles': ['volunteer', 'admin'],
+                'user_roles': roles
+            }, status=status.HTTP_403_FORBIDDEN)
+
+        serializer = self.get_serializer(data=request.data)
+        if serializer.is_valid():
+            with transaction.atomic():
+                report = serializer.save()
+                # urgent reports go out now, the rest wait for send_report_digest
+                if report.is_urgent:
+                    notify_urgent_report(report)
+
+            return Response({
+                'success': True,
+                'message': 'Report sent successfully',
+                'data': self.get_serializer(report).data
+            }, status=status.HTTP_201_CREATED)
+
+        return Response({
+            'success': False,
+            'errors': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    def update(self, request, *args, **kwargs):
+        return Response({
+            'success': False,
+            'error': 'Reports cannot be edited, use /resolve/ to close them'
+        }, status=status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    @action(detail=True, methods=['put'], url_path='resolve')
+    def resolve(self, request, pk=None):
+        """PUT /api/reports/{id}/resolve/ - mark as resolved (admin)"""
+        roles = get_user_roles(request)
+
+        if 'admin' not in roles:
+            return Response({
+                'success': False,
+                'error': 'Only administrators can resolve reports',
+                'required_role': 'admin',
+                'user_roles': roles
+            }, status=status.HTTP_403_FORBIDDEN)
+
+        report = self.get_object()
+
+        if report.resolved_at is not None:
+            return Response({
+                'success': False,
+                'error': 'The report is already resolved'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = IssueReportResolveSerializer(data=request.data)
+        if serializer.is_valid():
+            report.resolved_at = timezone.now()
+            report.resolved_by = request.user
+            report.resolution_notes = serializer.validated_data.get('resolution_notes', '')
+            report.save(update_fields=['resolved_at', 'resolved_by', 'resolution_notes'])
+            report_event(report, 'report.resolved')
+
+            return Response({
+                'success': True,
+                'message': f'Report "{report.title}" marked as resolved',
+                'data': self.get_serializer(report).data
+            })
+
+        return Response({
+            'success': False,
+            'errors': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
@@ -3,17 +3,36 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
+from django.db import transaction
+from django.db.models import Q
+from datetime import date, timedelta
 from django.utils import timezone
-from myapp.models import Visit, Adoption
+from myapp.models import Visit, Adoption, Animal
 from myapp.serializers import (
     VisitListSerializer, VisitDetailSerializer,
-    VisitConfirmSerializer, VisitReportSerializer
+    VisitConfirmSerializer, VisitReportSerializer, VisitListValuesSerializer,
+    VisitSlotSerializer, VisitCreateSerializer
 )
 from myapp.decorators import get_user_roles
+from myapp.services.visit_slots import SlotError, available_slots, book_visit, shelter_today
+from myapp.services.visit_matching import match_new_visit, match_visits
+from myapp.conditional import ConditionalResponseMixin
+from myapp.sync import IncrementalSyncMixin
+from myapp.replicas import ReplicaReadMixin
+from myapp.events import emit
 
 
-class VisitViewSet(viewsets.ModelViewSet):
+MAX_AVAILABILITY_DAYS = 30
+
+
+class VisitViewSet(ReplicaReadMixin, ConditionalResponseMixin, IncrementalSyncMixin, viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
+    conditional_models = (Visit, Adoption, Animal, Animal.favorites.through)
+    conditional_actions = ('list', 'retrieve', 'availability')
+    replica_actions = ('list', 'retrieve', 'availability')
+    # ?upcoming=true and past slots depend on the clock
+    conditional_time_bucket = 60
+    sync_serializer_class = VisitListValuesSerializer
     
     def get_queryset(self):
         user = self.request.user
@@ -22,14 +41,25 @@ class VisitViewSet(viewsets.ModelViewSet):
         if 'admin' in roles:
             return Visit.objects.all().select_related('adoption', 'adoption__animal', 'adoption__user', 'volunteer', 'scheduled_by')
         
+        # visits are matched to volunteers when booked and again when a shift
+        # covering their day is added (services.visit_matching)
         if 'volunteer' in roles:
-            from django.db.models import Q
-            return Visit.objects.filter(
-                Q(volunteer=user) | Q(volunteer__isnull=True, status='SC')
-            ).select_related('adoption', 'adoption__animal', 'adoption__user', 'volunteer')
+            return Visit.objects.filter(volunteer=user).select_related(
+                'adoption', 'adoption__animal', 'adoption__user', 'volunteer'
+            )
         
         return Visit.objects.none()
     
+    def get_confirmable_object(self):
+        """admins confirm any visit; volunteers their own and the scheduled ones no volunteer was matched to"""
+        queryset = self.get_queryset()
+        if 'admin' not in get_user_roles(self.request):
+            queryset = Visit.objects.filter(
+                Q(volunteer=self.request.user) | Q(volunteer__isnull=True, status='SC')
+            ).select_related('adoption', 'adoption__animal', 'adoption__user', 'volunteer')
+        # two volunteers picking up the same unmatched visit: the second waits, then sees it confirmed
+        return get_object_or_404(queryset.select_for_update(of=('self',)), pk=self.kwargs['pk'])
+
     def get_serializer_class(self):
         if self.action in ['list']:
             return VisitListSerializer
@@ -47,7 +77,7 @@ class VisitViewSet(viewsets.ModelViewSet):
         if upcoming_only == 'true':
             queryset = queryset.filter(scheduled_date__gte=timezone.now())
         
-        serializer = self.get_serializer(queryset, many=True)
+        serializer = VisitListValuesSerializer(queryset, context=self.get_serializer_context())
         roles = get_user_roles(request)
         
         return Response({
@@ -57,6 +87,116 @@ class VisitViewSet(viewsets.ModelViewSet):
             'viewing_as': 'admin' if 'admin' in roles else 'volunteer'
         })
     
+    @action(detail=False, methods=['get'], url_path='availability')
+    def availability(self, request):
+        """GET /visits/availability/?from=YYYY-MM-DD&to=YYYY-MM-DD - free visit slots (default: the next two weeks)"""
+        today = shelter_today()
+        try:
+            first_day = date.fromisoformat(request.query_params['from']) if 'from' in request.query_params else today
+            last_day = (
+                date.fromisoformat(request.query_params['to']) if 'to' in request.query_params
+                else first_day + timedelta(days=13)
+            )
+        except ValueError:
+            return Response({
+                'success': False,
+                'error': 'from and to must be dates (YYYY-MM-DD)'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        if last_day < first_day or (last_day - first_day).days > MAX_AVAILABILITY_DAYS:
+            return Response({
+                'success': False,
+                'error': f'The range must cover 1 to {MAX_AVAILABILITY_DAYS + 1} days'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        slots = [slot for slot in available_slots(first_day, last_day, now=timezone.now()) if slot['available']]
+        
+        return Response({
+            'success': True,
+            'data': VisitSlotSerializer(slots, many=True).data,
+            'count': len(slots)
+        })
+    
+    @action(detail=False, methods=['post'], url_path='auto-assign')
+    def auto_assign(self, request):
+        """POST /visits/auto-assign/ - match the day's unassigned visits with volunteers on shift (admin)"""
+        roles = get_user_roles(request)
+        
+        if 'admin' not in roles:
+            return Response({
+                'success': False,
+                'error': 'Only administrators can auto-assign visits',
+                'required_role': 'admin',
+                'user_roles': roles
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        day = date.today()
+        if request.data.get('date'):
+            try:
+                day = date.fromisoformat(request.data['date'])
+            except (TypeError, ValueError):
+                return Response({
+                    'success': False,
+                    'errors': {'date': ['Use the YYYY-MM-DD format.']}
+                }, status=status.HTTP_400_BAD_REQUEST)
+        
+        dry_run = str(request.data.get('dry_run', 'false')).lower() == 'true'
+        result = match_visits(day, dry_run=dry_run)
+        
+        return Response({
+            'success': True,
+            'message': f"{result['matched']} of {result['visits']} visits matched with {result['volunteers']} volunteers",
+            'date': day.isoformat(),
+            'dry_run': dry_run,
+            'data': result
+        })
+    
+    def create(self, request, *args, **kwargs):
+        """POST /visits/ - book a visit for an approved application (admin), under the slot capacity"""
+        roles = get_user_roles(request)
+        
+        if 'admin' not in roles:
+            return Response({
+                'success': False,
+                'error': 'Only administrators can create visits',
+                'required_role': 'admin',
+                'user_roles': roles
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        serializer = VisitCreateSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response({
+                'success': False,
+                'errors': serializer.errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        adoption = serializer.validated_data['adoption']
+        if adoption.status != 'AP':
+            return Response({
+                'success': False,
+                'error': 'The visit can only be scheduled for approved applications.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            visit = book_visit(
+                adoption,
+                serializer.validated_data['scheduled_date'],
+                request.user,
+                serializer.validated_data.get('notes', '')
+            )
+        except SlotError as exc:
+            return Response({
+                'success': False,
+                'error': str(exc)
+            }, status=status.HTTP_400_BAD_REQUEST)
+        match_new_visit(visit)
+        
+        return Response({
+            'success': True,
+            'message': 'Visit scheduled',
+            'data': VisitDetailSerializer(visit, context=self.get_serializer_context()).data
+        }, status=status.HTTP_201_CREATED)
+    
     def retrieve(self, request, *args, **kwargs):
         """GET /visits/{id}/ - visit details"""
         instance = self.get_object()
@@ -68,6 +208,7 @@ class VisitViewSet(viewsets.ModelViewSet):
         })
     
     @action(detail=True, methods=['post'], url_path='confirm')
+    @transaction.atomic
     def confirm(self, request, pk=None):
         """POST /visits/{id}/confirm/ - visit confirm (volunteer)"""
         roles = get_user_roles(request)
@@ -80,7 +221,7 @@ class VisitViewSet(viewsets.ModelViewSet):
                 'user_roles': roles
             }, status=status.HTTP_403_FORBIDDEN)
         
-        visit = self.get_object()
+        visit = self.get_confirmable_object()
         
         if visit.status != 'SC':
             return Response({
@@ -96,7 +237,7 @@ class VisitViewSet(viewsets.ModelViewSet):
             if serializer.validated_data.get('notes'):
                 visit.notes = serializer.validated_data['notes']
             visit.save()
-            
+            emit('visit.confirmed', visit=visit)
             
             return Response({
                 'success': True,
@@ -150,7 +291,7 @@ class VisitViewSet(viewsets.ModelViewSet):
                 visit.volunteer = request.user
             
             visit.save()
-            
+            emit('visit.reported', visit=visit)
             
             return Response({
                 'success': True,
@@ -183,6 +324,7 @@ class VisitViewSet(viewsets.ModelViewSet):
         
         visit.status = 'CN'
         visit.save()
+        emit('visit.cancelled', visit=visit)
         
         return Response({
             'success': True,
@@ -0,0 +1,190 @@
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from psycopg2.extras import DateTimeTZRange
+from myapp.models import VolunteerAvailability
+from myapp.serializers import AvailabilityVolunteerSerializer, VolunteerAvailabilitySerializer
+from myapp.services.shifts import volunteers_on_shift
+from myapp.services.visit_matching import match_shift_days
+from myapp.decorators import get_user_roles
+
+
+def _datetime_param(request, name):
+    """the ?name= datetime, None when absent or malformed; ValueError when it names no real time"""
+    value = parse_datetime(request.query_params.get(name, ''))
+    if value is not None and timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
+class VolunteerAvailabilityViewSet(viewsets.ModelViewSet):
+    """
+    list: own availability (volunteer) or everyone's (admin), ?from=&to= window
+    create/update/destroy: shifts, days off, vacations
+    on_shift: volunteers on shift at ?at= (default now)
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = VolunteerAvailabilitySerializer
+
+    def get_queryset(self):
+        user = self.request.user
+        roles = get_user_roles(self.request)
+
+        if 'admin' in roles:
+            queryset = VolunteerAvailability.objects.all()
+            volunteer_id = self.request.query_params.get('volunteer', None)
+            if volunteer_id:
+                queryset = queryset.filter(volunteer_id=volunteer_id)
+            return queryset.select_related('volunteer')
+
+        if 'volunteer' in roles:
+            return VolunteerAvailability.objects.filter(volunteer=user).select_related('volunteer')
+
+        return VolunteerAvailability.objects.none()
+
+    def _forbidden(self, roles):
+        return Response({
+            'success': False,
+            'error': 'Only volunteers and admins can manage availability',
+            'required_roles': ['volunteer', 'admin'],
+            'user_roles': roles
+        }, status=status.HTTP_403_FORBIDDEN)
+
+    def list(self, request, *args, **kwargs):
+        """GET /api/availability/ - availability overlapping a window (default: from now on)"""
+        queryset = self.get_queryset()
+
+        try:
+            window_start = _datetime_param(request, 'from') or timezone.now()
+            window_end = _datetime_param(request, 'to')
+        except ValueError:
+            return Response({
+                'success': False,
+                'error': 'from and to must be valid datetimes (ISO 8601)'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        queryset = queryset.filter(
+            period__overlap=DateTimeTZRange(window_start, window_end, '[)')
+        ).order_by('period')
+
+        kind = request.query_params.get('kind', None)
+        if kind:
+            queryset = queryset.filter(kind=kind)
+
+        serializer = self.get_serializer(queryset, many=True)
+
+        return Response({
+            'success': True,
+            'data': serializer.data,
+            'count': len(serializer.data)
+        })
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        serializer = self.get_serializer(instance)
+
+        return Response({
+            'success': True,
+            'data': serializer.data
+        })
+
+    def create(self, request, *args, **kwargs):
+        """POST /api/availability/ - add shift / day off / vacation"""
+        roles = get_user_roles(request)
+
+        if 'volunteer' not in roles and 'admin' not in roles:
+            return self._forbidden(roles)
+
+        # admins can plan shifts for any volunteer
+        volunteer = request.user
+        if 'admin' in roles:
+            target = AvailabilityVolunteerSerializer(data=request.data)
+            if not target.is_valid():
+                return Response({
+                    'success': False,
+                    'errors': target.errors
+                }, status=status.HTTP_400_BAD_REQUEST)
+            volunteer = target.validated_data.get('volunteer') or volunteer
+
+        serializer = self.get_serializer(data=request.data)
+        if serializer.is_valid():
+            # visits booked before this shift existed can be matched now
+            match_shift_days(serializer.save(volunteer=volunteer))
+            return Response({
+                'success': True,
+                'message': 'Availability saved',
+                'data': serializer.data
+            }, status=status.HTTP_201_CREATED)
+
+        return Response({
+            'success': False,
+            'errors': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    def update(self, request, *args, **kwargs):
+        roles = get_user_roles(request)
+
+        if 'volunteer' not in roles and 'admin' not in roles:
+            return self._forbidden(roles)
+
+        partial = kwargs.pop('partial', False)
+        instance = self.get_object()
+        serializer = self.get_serializer(instance, data=request.data, partial=partial)
+
+        if serializer.is_valid():
+            match_shift_days(serializer.save())
+            return Response({
+                'success': True,
+                'message': 'Availability updated',
+                'data': serializer.data
+            })
+
+        return Response({
+            'success': False,
+            'errors': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    def partial_update(self, request, *args, **kwargs):
+        kwargs['partial'] = True
+        return self.update(request, *args, **kwargs)
+
+    def destroy(self, request, *args, **kwargs):
+        roles = get_user_roles(request)
+
+        if 'volunteer' not in roles and 'admin' not in roles:
+            return self._forbidden(roles)
+
+        instance = self.get_object()
+        instance.delete()
+
+        return Response({
+            'success': True,
+            'message': 'Availability removed'
+        }, status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=False, methods=['get'], url_path='on-shift')
+    def on_shift(self, request):
+        """GET /api/availability/on-shift/?at= - volunteers on shift at a given moment"""
+        roles = get_user_roles(request)
+
+        if 'volunteer' not in roles and 'admin' not in roles:
+            return self._forbidden(roles)
+
+        try:
+            at = _datetime_param(request, 'at') or timezone.now()
+        except ValueError:
+            return Response({
+                'success': False,
+                'error': 'at must be a valid datetime (ISO 8601)'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        volunteers = volunteers_on_shift(at).values('id', 'username', 'first_name', 'last_name')
+
+        data = list(volunteers)
+        return Response({
+            'success': True,
+            'at': at,
+            'data': data,
+            'count': len(data)
+        })